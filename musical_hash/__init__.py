@@ -47,4 +47,22 @@ G_SHARP_MINOR_PENTATONIC
 
 
 from ._scales import *
-from ._musical_hash import MusicalHash
+from ._musical_hash import MusicalHash, StreamingMusicalHash
+from ._stats import RenderStats
+from ._renderer import Renderer
+from ._note_bank import build_note_bank, load_note_bank, note_bank_path
+from ._cache import RenderCache
+from ._batch import midi_batch, midi_multitrack, samples_batch, wave_batch
+from ._archive import ArchiveWriter
+from ._similarity import (common_prefix_length, hamming_distance, nearest,
+                          note_indices)
+from ._codec import COMPACT_SAMPLE_RATE
+from ._server import RenderService, make_server, serve
+from ._async import hash_async, midi_async, samples_async, wave_async
+from ._shared import SharedSamples, samples_shared
+from ._incremental import IncrementalRenderer, UpdateResult
+from ._decoder import WaveDecoder
+from ._export import export_notes
+from ._manifest import ManifestEntry, read_manifest, render_manifest
+from ._scheduler import (PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL,
+                         Scheduler)
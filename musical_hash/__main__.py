@@ -0,0 +1,96 @@
+"""Command line entry point: python -m musical_hash serve|render|manifest
+[options]."""
+
+
+import argparse
+from ._cache import RenderCache
+from ._export import EXPORT_FORMATS
+from ._incremental import OUTPUT_FORMATS, IncrementalRenderer
+from ._manifest import render_manifest
+from ._renderer import Renderer
+from ._server import DEFAULT_PORT, RenderService, serve
+
+
+def main() -> None:
+    """Parse the command line and run the requested command."""
+    parser = argparse.ArgumentParser(prog='python -m musical_hash')
+    commands = parser.add_subparsers(dest='command')
+    server = commands.add_parser(
+        'serve', help='run a local render server with warm caches')
+    server.add_argument('--host', default='127.0.0.1')
+    server.add_argument('--port', type=int, default=DEFAULT_PORT)
+    server.add_argument('--socket', help='listen on a Unix domain socket')
+    server.add_argument('--workers', type=int, default=4)
+    server.add_argument('--cache-items', type=int, default=1024)
+    server.add_argument('--cache-memory-bytes', type=int,
+                        default=64 * 1024 * 1024)
+    server.add_argument('--cache-dir', help='directory for the disk cache')
+    server.add_argument('--verbose', action='store_true')
+    render = commands.add_parser(
+        'render', help='incrementally render every file of a directory tree')
+    render.add_argument('source')
+    render.add_argument('output')
+    render.add_argument('--format', choices=sorted(OUTPUT_FORMATS),
+                        default='wav')
+    render.add_argument('--hash-method', default='sha256')
+    render.add_argument('--key', type=lambda text: int(text, 0),
+                        default=0xfff)
+    render.add_argument('--workers', type=int, default=1)
+    render.add_argument('--watch', action='store_true',
+                        help='keep polling the source tree for changes')
+    render.add_argument('--interval', type=float, default=1.0)
+    manifest = commands.add_parser(
+        'manifest', help='render every entry of a sha256sum/md5sum manifest')
+    manifest.add_argument('manifest', help="manifest path, or '-' for stdin")
+    manifest.add_argument('output',
+                          help='output directory, or file for jsonl/csv')
+    manifest.add_argument(
+        '--format', choices=sorted(set(OUTPUT_FORMATS) | set(EXPORT_FORMATS)),
+        default='wav')
+    manifest.add_argument('--hash-method')
+    manifest.add_argument('--key', type=lambda text: int(text, 0),
+                          default=0xfff)
+    args = parser.parse_args()
+    if args.command == 'render':
+        _render(args)
+        return
+    if args.command == 'manifest':
+        print(render_manifest(args.manifest, args.output,
+                              Renderer(key=args.key), args.format,
+                              args.hash_method), 'entries rendered')
+        return
+    if args.command != 'serve':
+        parser.print_help()
+        return
+    cache = RenderCache(args.cache_items, args.cache_dir,
+                        max_memory_bytes=args.cache_memory_bytes)
+    serve(service=RenderService(cache=cache),
+          host=args.host,
+          port=args.port,
+          unix_socket=args.socket,
+          workers=args.workers,
+          verbose=args.verbose)
+
+
+def _render(args: argparse.Namespace) -> None:
+    """Run the render command."""
+    incremental = IncrementalRenderer(
+        args.source, args.output, Renderer(key=args.key),
+        hash_method=args.hash_method, fmt=args.format, workers=args.workers)
+
+    def report(result) -> None:
+        for relative_path in result.rendered:
+            print('rendered', relative_path)
+        for relative_path in result.removed:
+            print('removed', relative_path)
+
+    report(incremental.update())
+    if args.watch:
+        try:
+            incremental.watch(args.interval, report)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Streaming tar and zip output for bulk renders."""
+
+
+from typing import BinaryIO, Optional, Union
+import io
+import sys
+import tarfile
+import time
+import zipfile
+from ._renderer import HashSource, Renderer
+
+
+ARCHIVE_FORMATS = ('tar', 'tar.gz', 'zip')
+
+
+class ArchiveWriter:
+    """Streams rendered wave and midi files into a single tar or zip archive.
+
+    Each entry is written as soon as it is added, so only one rendered file
+    is held in memory at a time and no temporary files are created.  The
+    writer can be used as a context manager.
+
+    # Args
+    - *target*: path of the output archive, '-' for standard output, or a
+        binary file object.  Standard output and other file objects are
+        written as a stream and never seeked.
+    - *fmt*: archive format, one of 'tar', 'tar.gz' or 'zip'.
+
+    # Raises
+    A ValueError if fmt is not a supported archive format, or a
+    FileNotFoundError if target is an empty path.
+    """
+
+    def __init__(self,
+                 target: Union[str, BinaryIO],
+                 fmt: str = 'tar') -> None:
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(
+                'The archive format: {} is not supported.'.format(fmt))
+        if target == '':
+            raise FileNotFoundError('Empty filename not permitted')
+        self.fmt = fmt
+        self._file = None  # type: Optional[BinaryIO]
+        stream = target
+        if target == '-':
+            stream = sys.stdout.buffer
+        elif isinstance(target, str):
+            stream = open(target, 'wb')  # pylint: disable=consider-using-with
+            self._file = stream
+        if fmt == 'zip':
+            self._archive = zipfile.ZipFile(
+                stream, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            # pylint: disable=consider-using-with
+            self._archive = tarfile.open(
+                fileobj=stream,
+                mode='w|gz' if fmt == 'tar.gz' else 'w|')
+
+    def add(self, name: str, data: bytes) -> None:
+        """Add one file called name holding data to the archive."""
+        if self.fmt == 'zip':
+            self._archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def add_wave(self,
+                 name: str,
+                 source: HashSource,
+                 renderer: Renderer) -> None:
+        """Render a hash as a wave file and add it to the archive.
+
+        # Args
+        - *name*: name of the entry inside the archive.
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *renderer*: Renderer holding the key, note duration and sample
+            rate.
+        """
+        self.add(name, renderer.wave_bytes(source))
+
+    def add_midi(self,
+                 name: str,
+                 source: HashSource,
+                 renderer: Renderer) -> None:
+        """Render a hash as a midi file and add it to the archive.
+
+        # Args
+        - *name*: name of the entry inside the archive.
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *renderer*: Renderer holding the key, ticks per note and
+            instrument.
+        """
+        self.add(name, renderer.midi_bytes(source))
+
+    def close(self) -> None:
+        """Finish the archive and close the output file if it was opened
+        here."""
+        self._archive.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.close()
+        return False
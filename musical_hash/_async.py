@@ -0,0 +1,184 @@
+"""asyncio rendering API with cancellation between notes."""
+
+
+from concurrent.futures import Executor
+from typing import Optional, Union
+import asyncio
+import numpy
+from ._cache import midi_bytes, wave_bytes
+from ._hashing import HashFunction
+from ._musical_hash import MusicalHash
+from ._renderer import HashSource, Renderer
+from ._stats import count, timed
+
+
+DEFAULT_CHUNK_NOTES = 16
+
+
+async def _run(executor: Optional[Executor], function, *args):
+    """Run function(*args) in executor (None for the loop's default)."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, function, *args)
+
+
+async def _with_timeout(coroutine, timeout: Optional[float]):
+    """Await coroutine, cancelling it after timeout seconds if given."""
+    if timeout is None:
+        return await coroutine
+    return await asyncio.wait_for(coroutine, timeout)
+
+
+async def hash_async(data: bytearray,
+                     hash_method: Union[str, HashFunction],
+                     executor: Optional[Executor] = None,
+                     timeout: Optional[float] = None) -> MusicalHash:
+    """Construct a MusicalHash in an executor without blocking the loop.
+
+    # Args
+    - *data*: the input data to the musical hash.
+    - *hash_method*: the method to use for hashing (see MusicalHash).
+    - *executor*: executor to hash in; None uses the loop's default.
+    - *timeout*: optional timeout in seconds.
+
+    # Raises
+    A ValueError if an unsupported hash method is specified, or
+    asyncio.TimeoutError if the timeout expires.
+    """
+    return await _with_timeout(
+        _run(executor, MusicalHash, data, hash_method), timeout)
+
+
+async def _samples(source: HashSource,
+                   renderer: Renderer,
+                   executor: Optional[Executor],
+                   chunk_notes: int) -> numpy.ndarray:
+    """Synthesize source chunk by chunk, yielding to the loop in between."""
+    digits = await _run(executor, renderer.digits, source)
+    tune = numpy.empty(len(digits) * renderer.note_length)
+    length = renderer.note_length
+    with timed(renderer.stats, 'pitches_to_tune'):
+        for start in range(0, len(digits), chunk_notes):
+            stop = min(start + chunk_notes, len(digits))
+            await _run(executor, renderer.synthesize, digits[start:stop],
+                       tune[start * length:stop * length])
+    count(renderer.stats, 'samples', tune.size)
+    return tune
+
+
+async def samples_async(source: HashSource,
+                        renderer: Renderer,
+                        executor: Optional[Executor] = None,
+                        timeout: Optional[float] = None,
+                        chunk_notes: int = DEFAULT_CHUNK_NOTES
+                        ) -> numpy.ndarray:
+    """Return a hash as a numpy array of samples without blocking the loop.
+
+    The tune is synthesized chunk_notes notes at a time in the executor, so
+    cancelling the awaiting task (or reaching the timeout) stops the work
+    after the current chunk, and other coroutines run between chunks.
+
+    # Args
+    - *source*: a MusicalHash object or the raw hashed bytes.
+    - *renderer*: Renderer holding the key, note duration and sample rate.
+    - *executor*: executor to render in; None uses the loop's default.
+    - *timeout*: optional timeout in seconds.
+    - *chunk_notes*: number of notes synthesized per executor call.
+
+    # Returns
+    The same array as renderer.samples(source).
+
+    # Raises
+    A ValueError if chunk_notes is not positive, or asyncio.TimeoutError if
+    the timeout expires.
+    """
+    if chunk_notes <= 0:
+        raise ValueError('chunk_notes must be a positive integer')
+    return await _with_timeout(
+        _samples(source, renderer, executor, chunk_notes), timeout)
+
+
+def _write(filename: str, contents: bytes) -> None:
+    """Write contents to filename."""
+    with open(filename, 'wb') as file:
+        file.write(contents)
+
+
+async def _wave(filename: str,
+                source: HashSource,
+                renderer: Renderer,
+                executor: Optional[Executor],
+                chunk_notes: int) -> None:
+    """Synthesize, encode and write a wave file step by step."""
+    tune = await _samples(source, renderer, executor, chunk_notes)
+    with timed(renderer.stats, 'wave_write'):
+        contents = await _run(executor, wave_bytes, tune,
+                              renderer.sample_rate, renderer.encoding)
+    await _run(executor, _write, filename, contents)
+
+
+async def wave_async(filename: str,  # pylint: disable=too-many-arguments
+                     source: HashSource,
+                     renderer: Renderer,
+                     executor: Optional[Executor] = None,
+                     timeout: Optional[float] = None,
+                     chunk_notes: int = DEFAULT_CHUNK_NOTES) -> None:
+    """Write a hash to a wave file without blocking the loop.
+
+    Synthesis runs as in samples_async; encoding and writing the file each
+    run as one further executor call.  No file is written if the task is
+    cancelled or times out before synthesis completes.
+
+    # Args
+    - *filename*: file path for the output wave file.
+    - *source*: a MusicalHash object or the raw hashed bytes.
+    - *renderer*: Renderer holding the key, note duration, sample rate and
+        encoding.
+    - *executor*: executor to render in; None uses the loop's default.
+    - *timeout*: optional timeout in seconds.
+    - *chunk_notes*: number of notes synthesized per executor call.
+
+    # Raises
+    A FileNotFoundError if filename is empty, a ValueError if chunk_notes is
+    not positive, or asyncio.TimeoutError if the timeout expires.
+    """
+    if filename == '':
+        raise FileNotFoundError('Empty filename not permitted')
+    if chunk_notes <= 0:
+        raise ValueError('chunk_notes must be a positive integer')
+    await _with_timeout(
+        _wave(filename, source, renderer, executor, chunk_notes), timeout)
+
+
+async def _midi(filename: str,
+                source: HashSource,
+                renderer: Renderer,
+                executor: Optional[Executor]) -> None:
+    """Encode and write a midi file step by step."""
+    file = await _run(executor, renderer.midi_file, source)
+    with timed(renderer.stats, 'midi_write'):
+        contents = await _run(executor, midi_bytes, file)
+    await _run(executor, _write, filename, contents)
+
+
+async def midi_async(filename: str,
+                     source: HashSource,
+                     renderer: Renderer,
+                     executor: Optional[Executor] = None,
+                     timeout: Optional[float] = None) -> None:
+    """Write a hash to a midi file without blocking the loop.
+
+    # Args
+    - *filename*: file path for the output midi file.
+    - *source*: a MusicalHash object or the raw hashed bytes.
+    - *renderer*: Renderer holding the key, ticks per note and instrument.
+    - *executor*: executor to render in; None uses the loop's default.
+    - *timeout*: optional timeout in seconds.
+
+    # Raises
+    A FileNotFoundError if filename is empty, or asyncio.TimeoutError if the
+    timeout expires.
+    """
+    if filename == '':
+        raise FileNotFoundError('Empty filename not permitted')
+    await _with_timeout(
+        _midi(filename, source, renderer, executor), timeout)
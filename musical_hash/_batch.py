@@ -0,0 +1,232 @@
+"""Batch rendering of many hashes with digest-level deduplication."""
+
+
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+import io
+import os
+import struct
+import numpy
+from ._renderer import HashSource, Renderer, _hashed_bytes
+
+
+BatchItem = Tuple[HashSource, str]
+TrackItem = Tuple[str, HashSource]
+
+
+MIDI_TICKS_PER_BEAT = 480
+MIDI_MAX_TRACKS = 65535
+
+
+def _group(items: Iterable[BatchItem]) -> OrderedDict:
+    """Group output filenames by the digest they render."""
+    groups = OrderedDict()  # type: OrderedDict
+    for source, filename in items:
+        if filename == '':
+            raise FileNotFoundError('Empty filename not permitted')
+        groups.setdefault(bytes(_hashed_bytes(source)), []).append(filename)
+    return groups
+
+
+def _fan_out(contents: bytes, filenames: List[str], link: bool) -> None:
+    """Write contents to the first filename and hard link the others to it.
+
+    Existing files are unlinked before they are written, so a file that an
+    earlier batch hard linked to other outputs is replaced rather than
+    overwritten through the link.  Falls back to writing a copy when hard
+    links are not supported.
+    """
+    for filename in filenames:
+        if os.path.lexists(filename):
+            os.remove(filename)
+    with open(filenames[0], 'wb') as file:
+        file.write(contents)
+    for filename in filenames[1:]:
+        if link:
+            try:
+                os.link(filenames[0], filename)
+                continue
+            except OSError:
+                pass
+        with open(filename, 'wb') as file:
+            file.write(contents)
+
+
+def _write_batch(items: Iterable[BatchItem],
+                 render: Callable[[bytes], bytes],
+                 link: bool) -> int:
+    """Render every unique digest once and write it to all its files."""
+    groups = _group(items)
+    for digest, filenames in groups.items():
+        _fan_out(render(digest), filenames, link)
+    return len(groups)
+
+
+def wave_batch(items: Iterable[BatchItem],
+               renderer: Renderer,
+               link: bool = True) -> int:
+    """Write many hashes to wave files, synthesizing each digest only once.
+
+    # Args
+    - *items*: iterable of (source, filename) pairs, where source is a
+        MusicalHash object or the raw hashed bytes.
+    - *renderer*: Renderer holding the key, note duration and sample rate.
+    - *link*: if True, files with the same digest are hard links to a single
+        file when the file system supports it; otherwise each one is a copy.
+
+    # Returns
+    The number of unique tunes that were synthesized.
+
+    # Raises
+    A FileNotFoundError if any filename is empty.
+    """
+    return _write_batch(items, renderer.wave_bytes, link)
+
+
+def midi_batch(items: Iterable[BatchItem],
+               renderer: Renderer,
+               link: bool = True) -> int:
+    """Write many hashes to midi files, encoding each digest only once.
+
+    # Args
+    - *items*: iterable of (source, filename) pairs, where source is a
+        MusicalHash object or the raw hashed bytes.
+    - *renderer*: Renderer holding the key, note duration and instrument.
+    - *link*: if True, files with the same digest are hard links to a single
+        file when the file system supports it; otherwise each one is a copy.
+
+    # Returns
+    The number of unique tunes that were encoded.
+
+    # Raises
+    A FileNotFoundError if any filename is empty.
+    """
+    return _write_batch(items, renderer.midi_bytes, link)
+
+
+def samples_batch(sources: Iterable[HashSource],
+                  renderer: Renderer) -> List[numpy.ndarray]:
+    """Return the samples of many hashes, synthesizing each digest once.
+
+    # Args
+    - *sources*: iterable of MusicalHash objects or raw hashed bytes.
+    - *renderer*: Renderer holding the key, note duration and sample rate.
+
+    # Returns
+    A list with one array of samples per source, in order.  Sources with the
+    same digest share a single read-only array.
+    """
+    tunes = {}
+    result = []
+    for source in sources:
+        digest = bytes(_hashed_bytes(source))
+        if digest not in tunes:
+            tune = renderer.samples(digest)
+            tune.flags.writeable = False
+            tunes[digest] = tune
+        result.append(tunes[digest])
+    return result
+
+
+def _midi_header(tracks: int) -> bytes:
+    """Return the header chunk of a type 2 standard midi file."""
+    return b'MThd' + struct.pack('>LHHH', 6, 2, tracks, MIDI_TICKS_PER_BEAT)
+
+
+def midi_multitrack(items: Iterable[TrackItem],
+                    filename: str,
+                    renderer: Renderer,
+                    max_tracks: Optional[int] = None,
+                    buffer_size: int = 1024 * 1024) -> List[str]:
+    """Write many hashes into one type 2 standard midi file, one track each.
+
+    A type 2 file holds independent sequences, so each track is a separate
+    tune that players and sequencers treat on its own rather than play at
+    the same time as the others.  Every track is named after its artifact
+    ID and is encoded and written as soon as it is rendered, so only one
+    track is held in memory at a time.  When max_tracks is given the output
+    is split into several files of at most max_tracks tracks each.  A
+    standard midi file holds at most MIDI_MAX_TRACKS (65535) tracks, so
+    larger batches need max_tracks.
+
+    # Args
+    - *items*: iterable of (name, source) pairs, where name is the track
+        name (e.g. the artifact ID) and source is a MusicalHash object or the
+        raw hashed bytes.
+    - *filename*: file path for the output midi file.  If max_tracks is
+        given it must contain a '{}' placeholder that is replaced by the
+        index of each file, starting at 0.
+    - *renderer*: Renderer holding the key, ticks per note and instrument.
+    - *max_tracks*: optional maximum number of tracks per file, at most
+        MIDI_MAX_TRACKS.
+    - *buffer_size*: size in bytes of the write buffer of each file.
+
+    # Returns
+    A list of the paths of all the files that were written.
+
+    # Raises
+    A FileNotFoundError if filename is empty, or a ValueError if max_tracks
+    is not between 1 and MIDI_MAX_TRACKS, if filename has no placeholder
+    when one is needed or if max_tracks is None and items has more than
+    MIDI_MAX_TRACKS items; the incomplete file is then removed.
+    """
+    if filename == '':
+        raise FileNotFoundError('Empty filename not permitted')
+    if max_tracks is not None:
+        if not 0 < max_tracks <= MIDI_MAX_TRACKS:
+            raise ValueError(
+                'max_tracks must be between 1 and {}'.format(MIDI_MAX_TRACKS))
+        if '{}' not in filename:
+            raise ValueError(
+                'filename must contain a {} placeholder when max_tracks is '
+                'given')
+    written = []  # type: List[str]
+    file = None
+    tracks = 0
+    try:
+        for name, source in items:
+            if tracks == MIDI_MAX_TRACKS and file is not None:
+                file.close()
+                file = None
+                os.remove(written[-1])
+                raise ValueError(
+                    'A midi file holds at most {} tracks; give max_tracks '
+                    'to split larger batches'.format(MIDI_MAX_TRACKS))
+            if file is None:
+                file = _open_multitrack(
+                    filename, max_tracks, written, buffer_size)
+                tracks = 0
+            file.write(renderer.midi_track_bytes(source, name))
+            tracks += 1
+            if max_tracks is not None and tracks == max_tracks:
+                _finish_multitrack(file, tracks)
+                file = None
+        if not written:
+            file = _open_multitrack(filename, max_tracks, written, buffer_size)
+        if file is not None:
+            _finish_multitrack(file, tracks)
+            file = None
+    finally:
+        if file is not None:
+            file.close()
+    return written
+
+
+def _open_multitrack(filename: str,
+                     max_tracks: Optional[int],
+                     written: List[str],
+                     buffer_size: int) -> io.BufferedWriter:
+    """Open the next output file of midi_multitrack and write its header."""
+    path = filename if max_tracks is None else filename.format(len(written))
+    file = open(  # pylint: disable=consider-using-with
+        path, 'wb', buffering=buffer_size)
+    written.append(path)
+    file.write(_midi_header(0))
+    return file
+
+
+def _finish_multitrack(file: io.BufferedWriter, tracks: int) -> None:
+    """Patch the final track count into the header and close the file."""
+    file.seek(0)
+    file.write(_midi_header(tracks))
+    file.close()
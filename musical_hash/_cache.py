@@ -0,0 +1,242 @@
+"""Two-tier (memory and disk) cache for rendered output."""
+
+
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple, Union
+import hashlib
+import io
+import numbers
+import os
+import tempfile
+import threading
+import mido
+import numpy
+import wavio
+from ._codec import companded_wave_bytes
+from ._stats import RenderStats, count
+
+
+CacheKey = Tuple[bytes, Union[int, Tuple[int, ...]], float, Optional[int],
+                 str]
+
+
+def make_key(hashed_bytes: bytearray,
+             key: Union[int, Sequence[int]],
+             note_duration: Union[float, int],
+             sample_rate: Optional[int],
+             fmt: str) -> CacheKey:
+    """Return the cache key for one rendered output.
+
+    Args:
+        hashed_bytes: the digest that was rendered.
+        key: scale constant or sequence of midi note numbers used for the
+            render.
+        note_duration: note duration in seconds (audio) or ticks (midi).
+        sample_rate: sample rate for audio output or None for midi output.
+        fmt: name of the output format, e.g. 'wav', 'npy' or 'midi:1' where
+            the number after the colon is the midi instrument.
+
+    Returns:
+        A hashable tuple that identifies the output.
+    """
+    if isinstance(key, numbers.Integral):
+        key = int(key)
+    else:
+        key = tuple(int(note) for note in key)
+    return (bytes(hashed_bytes), key, note_duration, sample_rate, fmt)
+
+
+def samples_to_bytes(samples: numpy.ndarray) -> bytes:
+    """Serialize an array of samples in .npy format."""
+    buffer = io.BytesIO()
+    numpy.save(buffer, samples, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def bytes_to_samples(data: bytes) -> numpy.ndarray:
+    """Deserialize an array of samples from .npy format."""
+    return numpy.load(io.BytesIO(data), allow_pickle=False)
+
+
+def wave_format(encoding: str) -> str:
+    """Return the cache format name of a wave file with encoding."""
+    return 'wav' if encoding == 'pcm' else 'wav:' + encoding
+
+
+def wave_bytes(samples: numpy.ndarray,
+               sample_rate: int,
+               encoding: str = 'pcm') -> bytes:
+    """Return the contents of a wave file holding samples, either 16 bit
+    linear ('pcm') or 8 bit companded ('mulaw' or 'alaw')."""
+    if encoding != 'pcm':
+        return companded_wave_bytes(samples, sample_rate, encoding)
+    buffer = io.BytesIO()
+    wavio.write(file=buffer, data=samples, rate=sample_rate, sampwidth=2)
+    return buffer.getvalue()
+
+
+def midi_bytes(file: mido.MidiFile) -> bytes:
+    """Return the contents of a standard midi file."""
+    buffer = io.BytesIO()
+    file.save(file=buffer)
+    return buffer.getvalue()
+
+
+class RenderCache:  # pylint: disable=too-many-instance-attributes
+    """Content addressed cache of rendered samples, wave and midi files.
+
+    The first tier is an in-memory least recently used map holding at most
+    *max_items* entries and *max_memory_bytes* bytes of values; the least
+    recently used entries are dropped when either cap is exceeded.  The
+    optional second tier stores every entry as a
+    file in *directory*, named after the SHA-256 of its cache key; when the
+    total size of those files exceeds *max_disk_bytes* the least recently
+    used files are deleted.  Entries found on disk are promoted to memory.
+    One cache may be shared by any number of threads.
+
+    # Args
+    - *max_items*: maximum number of entries kept in memory.
+    - *directory*: directory for the disk tier or None to only use memory.
+    - *max_disk_bytes*: size cap for the disk tier in bytes.
+    - *max_memory_bytes*: size cap for the memory tier in bytes; a value
+        larger than the cap is only stored on disk.
+
+    # Attributes
+    - *hits*: number of lookups answered from either tier.
+    - *misses*: number of lookups that found nothing.
+    """
+
+    def __init__(self,
+                 max_items: int = 128,
+                 directory: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024,
+                 max_memory_bytes: int = 64 * 1024 * 1024) -> None:
+        if max_items < 0 or max_disk_bytes < 0 or max_memory_bytes < 0:
+            raise ValueError('Cache sizes must not be negative')
+        self.max_items = max_items
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # type: OrderedDict
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path) and not name.startswith('.'):
+                    self._disk_bytes += os.path.getsize(path)
+
+    def _path(self, key: CacheKey) -> str:
+        """Return the disk tier path for key."""
+        return os.path.join(
+            self.directory,
+            hashlib.sha256(repr(key).encode('utf-8')).hexdigest())
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        """Return the cached value for key, or None if it is not cached."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as file:
+                    value = file.read()
+                os.utime(path)
+            except OSError:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._remember(key, value)
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: CacheKey, value: bytes) -> None:
+        """Store value under key in both tiers."""
+        with self._lock:
+            self._remember(key, value)
+        if self.directory is None or len(value) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        if os.path.isfile(path):
+            return
+        handle, temp_path = tempfile.mkstemp(prefix='.', dir=self.directory)
+        with os.fdopen(handle, 'wb') as file:
+            file.write(value)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._disk_bytes += len(value)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self.directory is not None:
+                for name in os.listdir(self.directory):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+
+    def _remember(self, key: CacheKey, value: bytes) -> None:
+        """Insert value in the memory tier, evicting the oldest entries;
+        the caller holds the lock."""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        if len(value) > self.max_memory_bytes:
+            return
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+        while (len(self._memory) > self.max_items or
+               self._memory_bytes > self.max_memory_bytes):
+            self._memory_bytes -= len(self._memory.popitem(last=False)[1])
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until under max_disk_bytes; the
+        caller holds the lock."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isfile(path):
+                continue
+            status = os.stat(path)
+            entries.append((status.st_mtime, status.st_size, path))
+        entries.sort()
+        self._disk_bytes = sum(entry[1] for entry in entries)
+        for _, size, path in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+
+
+def lookup(cache: Optional[RenderCache],
+           key: CacheKey,
+           stats: Optional[RenderStats] = None) -> Optional[bytes]:
+    """Look up key in cache and count the hit or miss on stats.
+
+    Returns None when cache is None or does not contain key.
+    """
+    if cache is None:
+        return None
+    value = cache.get(key)
+    count(stats, 'cache_hits' if value is not None else 'cache_misses')
+    return value
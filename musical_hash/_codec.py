@@ -0,0 +1,130 @@
+"""Vectorized G.711 companding and 8 bit compressed wave files."""
+
+
+import struct
+import numpy
+
+
+COMPACT_SAMPLE_RATE = 8000
+WAVE_ENCODINGS = ('pcm', 'mulaw', 'alaw')
+
+
+_MULAW_BIAS = 0x21
+_MULAW_CLIP = 8159
+_MULAW_SEGMENT_ENDS = numpy.array(
+    [0x3f, 0x7f, 0xff, 0x1ff, 0x3ff, 0x7ff, 0xfff, 0x1fff])
+_ALAW_SEGMENT_ENDS = numpy.array(
+    [0x1f, 0x3f, 0x7f, 0xff, 0x1ff, 0x3ff, 0x7ff, 0xfff])
+_WAVE_FORMAT_TAGS = {'alaw': 6, 'mulaw': 7}
+
+
+def _to_pcm16(samples: numpy.ndarray) -> numpy.ndarray:
+    """Convert samples in [-1, 1] to signed 16 bit integers."""
+    return numpy.clip(
+        numpy.round(numpy.asarray(samples, dtype=numpy.float64) * 32767),
+        -32768, 32767).astype(numpy.int32)
+
+
+def mulaw_encode(samples: numpy.ndarray) -> numpy.ndarray:
+    """Encode samples in [-1, 1] with G.711 mu-law.
+
+    Args:
+        samples: numpy array of audio samples.
+
+    Returns:
+        A numpy array of uint8 codes, one per sample.
+    """
+    pcm = _to_pcm16(samples) >> 2
+    mask = numpy.where(pcm >= 0, 0xff, 0x7f)
+    pcm = numpy.minimum(numpy.abs(pcm), _MULAW_CLIP) + _MULAW_BIAS
+    segment = numpy.searchsorted(_MULAW_SEGMENT_ENDS, pcm, side='left')
+    code = (numpy.minimum(segment, 7) << 4) | ((pcm >> (segment + 1)) & 0x0f)
+    code = numpy.where(segment >= 8, 0x7f, code)
+    return ((code ^ mask) & 0xff).astype(numpy.uint8)
+
+
+def alaw_encode(samples: numpy.ndarray) -> numpy.ndarray:
+    """Encode samples in [-1, 1] with G.711 A-law.
+
+    Args:
+        samples: numpy array of audio samples.
+
+    Returns:
+        A numpy array of uint8 codes, one per sample.
+    """
+    pcm = _to_pcm16(samples) >> 3
+    mask = numpy.where(pcm >= 0, 0xd5, 0x55)
+    pcm = numpy.where(pcm >= 0, pcm, -pcm - 1)
+    segment = numpy.searchsorted(_ALAW_SEGMENT_ENDS, pcm, side='left')
+    shift = numpy.maximum(segment, 1)
+    code = (numpy.minimum(segment, 7) << 4) | ((pcm >> shift) & 0x0f)
+    code = numpy.where(segment >= 8, 0x7f, code)
+    return ((code ^ mask) & 0xff).astype(numpy.uint8)
+
+
+def _mulaw_table() -> numpy.ndarray:
+    """Return the 16 bit value of every mu-law code."""
+    code = ~numpy.arange(256) & 0xff
+    magnitude = (((code & 0x0f) << 3) + 0x84) << ((code & 0x70) >> 4)
+    return numpy.where(code & 0x80, 0x84 - magnitude,
+                       magnitude - 0x84).astype(numpy.int16)
+
+
+def _alaw_table() -> numpy.ndarray:
+    """Return the 16 bit value of every A-law code."""
+    code = numpy.arange(256) ^ 0x55
+    segment = (code & 0x70) >> 4
+    magnitude = (code & 0x0f) << 4
+    magnitude = numpy.where(
+        segment == 0, magnitude + 8,
+        (magnitude + 0x108) << numpy.maximum(segment - 1, 0))
+    return numpy.where(code & 0x80, magnitude, -magnitude).astype(numpy.int16)
+
+
+_DECODE_TABLES = {'mulaw': _mulaw_table(), 'alaw': _alaw_table()}
+
+
+def decode(codes: numpy.ndarray, encoding: str) -> numpy.ndarray:
+    """Expand G.711 codes back to samples in [-1, 1].
+
+    Args:
+        codes: numpy array of uint8 codes.
+        encoding: 'mulaw' or 'alaw'.
+
+    Returns:
+        A numpy array of float64 samples.
+    """
+    return _DECODE_TABLES[encoding][numpy.asarray(codes)] / 32767
+
+
+def companded_wave_bytes(samples: numpy.ndarray,
+                         sample_rate: int,
+                         encoding: str) -> bytes:
+    """Return the contents of an 8 bit mu-law or A-law mono wave file.
+
+    Args:
+        samples: numpy array of audio samples in [-1, 1].
+        sample_rate: sample rate of the samples.
+        encoding: 'mulaw' or 'alaw'.
+
+    Returns:
+        The bytes of a WAVE_FORMAT_MULAW or WAVE_FORMAT_ALAW file.
+
+    Raises:
+        A ValueError if encoding is not 'mulaw' or 'alaw'.
+    """
+    if encoding == 'mulaw':
+        data = mulaw_encode(samples).tobytes()
+    elif encoding == 'alaw':
+        data = alaw_encode(samples).tobytes()
+    else:
+        raise ValueError(
+            'The wave encoding: {} is not supported.'.format(encoding))
+    fmt = struct.pack('<HHIIHHH', _WAVE_FORMAT_TAGS[encoding], 1,
+                      sample_rate, sample_rate, 1, 8, 0)
+    fact = struct.pack('<I', len(data))
+    padding = b'\x00' * (len(data) % 2)
+    chunks = (b'fmt ' + struct.pack('<I', len(fmt)) + fmt +
+              b'fact' + struct.pack('<I', len(fact)) + fact +
+              b'data' + struct.pack('<I', len(data)) + data + padding)
+    return b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks
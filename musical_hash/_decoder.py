@@ -0,0 +1,188 @@
+"""Recover hashed bytes from rendered wave files."""
+
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Union
+import struct
+import numpy
+from ._codec import decode
+from ._hashing import digest_size, list_tree
+from ._musical_hash import DEFAULT_NOTE_DURATION, DEFAULT_SAMPLE_RATE, Key
+from ._renderer import Renderer
+from ._scales import CHROMATIC_SCALE
+
+
+_WAVE_FORMAT_ENCODINGS = {6: 'alaw', 7: 'mulaw'}
+
+
+def read_wave(source: Union[str, bytes]) -> Tuple[numpy.ndarray, int]:
+    """Read a mono wave file written by MusicalHash.wave or Renderer.wave.
+
+    Args:
+        source: path of the file, or its contents.
+
+    Returns:
+        A tuple of the samples, as float64 in [-1, 1], and the sample rate.
+
+    Raises:
+        A ValueError if the file is not a 16 bit PCM, mu-law or A-law mono
+        wave file.
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as file:
+            source = file.read()
+    if source[:4] != b'RIFF' or source[8:12] != b'WAVE':
+        raise ValueError('Not a wave file')
+    fmt = data = None
+    offset = 12
+    while offset + 8 <= len(source):
+        name, size = struct.unpack('<4sI', source[offset:offset + 8])
+        if name == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', source[offset + 8:offset + 24])
+        elif name == b'data':
+            data = source[offset + 8:offset + 8 + size]
+        offset += 8 + size + size % 2
+    if fmt is None or data is None:
+        raise ValueError('The wave file has no fmt or data chunk')
+    tag, channels, sample_rate, _, _, bits = fmt
+    if channels != 1:
+        raise ValueError('Only mono wave files can be decoded')
+    if tag == 1 and bits == 16:
+        samples = numpy.frombuffer(data, dtype='<i2') / 32767
+    elif tag in _WAVE_FORMAT_ENCODINGS and bits == 8:
+        samples = decode(numpy.frombuffer(data, dtype=numpy.uint8),
+                         _WAVE_FORMAT_ENCODINGS[tag])
+    else:
+        raise ValueError(
+            'Unsupported wave format tag {} with {} bits per sample'.format(
+                tag, bits))
+    return samples, sample_rate
+
+
+class WaveDecoder:
+    """Recovers the hashed bytes of wave files rendered with a known
+    configuration.
+
+    The audio is cut into frames of one note each and every frame is
+    compared against the waveform of every note of the key at once: one
+    matrix product of the frames with the normalized note waveforms (a
+    matched filter, i.e. a Goertzel-style correlation at exactly the pitches
+    of the key) gives a score per note, and the best score per frame is the
+    digit.  The digits are then recombined, most significant first, into the
+    integer that change_base split up.
+
+    # Args
+    - *key*: key the files were rendered in (see MusicalHash.notes).
+    - *note_duration*: duration of each note in seconds.
+    - *sample_rate*: sample rate of the files.
+    - *hash_method*: name of the built-in hash method that produced the
+        digests; the decoded bytes are padded to its digest size.  If None,
+        the shortest byte string is returned, which drops any trailing zero
+        bytes of the digest.
+
+    # Raises
+    A ValueError for an invalid key, note_duration, sample_rate or
+    hash_method.
+    """
+
+    def __init__(self,
+                 key: Key = CHROMATIC_SCALE,
+                 note_duration: float = DEFAULT_NOTE_DURATION,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE,
+                 hash_method: Optional[str] = None) -> None:
+        renderer = Renderer(key, note_duration, sample_rate)
+        self.key = key
+        self.sample_rate = sample_rate
+        self.base = renderer.base
+        self.note_length = renderer.note_length
+        self.digest_size = (None if hash_method is None
+                            else digest_size(hash_method))
+        norms = numpy.linalg.norm(renderer.waveforms, axis=1)
+        self.filters = (renderer.waveforms /
+                        numpy.maximum(norms, 1e-12)[:, None]).T
+
+    def digits(self, samples: numpy.ndarray) -> numpy.ndarray:
+        """Return the note index of every note of a tune.
+
+        # Raises
+        A ValueError if the tune is not a whole number of notes long.
+        """
+        samples = numpy.asarray(samples, dtype=numpy.float64).ravel()
+        if samples.size == 0 or samples.size % self.note_length:
+            raise ValueError(
+                'A tune of {} samples is not a whole number of notes of {} '
+                'samples'.format(samples.size, self.note_length))
+        frames = samples.reshape(-1, self.note_length)
+        return numpy.argmax(frames @ self.filters, axis=1)
+
+    def decode_samples(self, samples: numpy.ndarray) -> bytes:
+        """Return the hashed bytes of a tune.
+
+        # Args
+        - *samples*: numpy array of samples, e.g. from MusicalHash.samples.
+
+        # Raises
+        A ValueError if the tune is not a whole number of notes long or does
+        not fit in the digest size.
+        """
+        number = 0
+        for digit in reversed(self.digits(samples).tolist()):
+            number = number * self.base + digit
+        size = self.digest_size
+        if size is None:
+            size = max(1, (number.bit_length() + 7) // 8)
+        try:
+            return number.to_bytes(size, byteorder='little')
+        except OverflowError:
+            raise ValueError(
+                'The decoded tune does not fit in {} bytes; check the key, '
+                'note duration and hash method'.format(size))
+
+    def decode(self, source: Union[str, bytes]) -> bytes:
+        """Return the hashed bytes of a wave file.
+
+        # Args
+        - *source*: path of the wave file, or its contents.
+
+        # Raises
+        A ValueError if the file cannot be read, its sample rate differs
+        from this decoder's or its tune cannot be decoded.
+        """
+        samples, sample_rate = read_wave(source)
+        if sample_rate != self.sample_rate:
+            raise ValueError(
+                'The wave file has a sample rate of {} instead of {}'.format(
+                    sample_rate, self.sample_rate))
+        return self.decode_samples(samples)
+
+    def decode_directory(self,
+                         directory: str,
+                         suffix: str = '.wav',
+                         workers: int = 4) -> 'OrderedDict[str, bytes]':
+        """Decode every wave file below a directory.
+
+        Files are decoded in parallel on workers threads; NumPy releases the
+        GIL in the matrix products.
+
+        # Args
+        - *directory*: root of the directory tree.
+        - *suffix*: only files whose names end with suffix are decoded.
+        - *workers*: number of threads.
+
+        # Returns
+        An ordered dictionary from each relative path ('/' separated, sorted)
+        to its hashed bytes.
+
+        # Raises
+        A ValueError if any file cannot be decoded.
+        """
+        files = [(relative_path, full_path)
+                 for relative_path, full_path in list_tree(directory)
+                 if relative_path.endswith(suffix)]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            digests = list(executor.map(
+                lambda entry: self.decode(entry[1]), files))
+        return OrderedDict(
+            (relative_path, digest)
+            for (relative_path, _), digest in zip(files, digests))
@@ -0,0 +1,186 @@
+"""Streaming export of the note sequences of many hashes to JSONL or CSV."""
+
+
+from itertools import islice
+from typing import BinaryIO, Callable, Iterable, List, Optional, Tuple, Union
+import json
+import sys
+import numpy
+from ._hashing import hash_data
+from ._musical_hash import Key, MusicalHash, _key_notes, _note_name
+from ._scales import CHROMATIC_SCALE
+
+
+EXPORT_FORMATS = ('jsonl', 'csv')
+DEFAULT_CHUNK_ROWS = 4096
+
+ExportItem = Union[MusicalHash, bytes, bytearray, str]
+
+
+def _limbs(digests: List[bytes]) -> numpy.ndarray:
+    """Return digests as rows of big endian 32 bit limbs, in uint64."""
+    rows = len(digests)
+    length = max([len(digest) for digest in digests] + [1])
+    width = -(-length // 4) * 4
+    if all(len(digest) == length for digest in digests):
+        data = numpy.frombuffer(b''.join(digests), dtype=numpy.uint8)
+        data = data.reshape(rows, length)
+    else:
+        data = numpy.zeros((rows, length), dtype=numpy.uint8)
+        for i, digest in enumerate(digests):
+            data[i, :len(digest)] = numpy.frombuffer(digest, numpy.uint8)
+    padded = numpy.zeros((rows, width), dtype=numpy.uint8)
+    padded[:, width - length:] = data[:, ::-1]
+    return padded.view('>u4').astype(numpy.uint64)
+
+
+def batch_digits(digests: List[bytes],
+                 base: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Express many little endian digests in base at once.
+
+    The digests are laid out as rows of big endian 32 bit limbs and divided
+    by the largest power of base that fits in 32 bits with vectorized long
+    division, so every pass over the limbs yields several digits of every
+    row.
+
+    Args:
+        digests: list of digests; they may differ in length.
+        base: the base to convert to, from 2 to 128.
+
+    Returns:
+        A tuple of a two dimensional uint8 array of digits, least
+        significant first, and the number of digits of each row.  Row i
+        equals change_base(int.from_bytes(digests[i], 'little'), base) in its
+        first counts[i] entries and is zero after them.
+    """
+    limbs = _limbs(digests)
+    per_word = 1
+    while base ** (per_word + 1) <= 1 << 32:
+        per_word += 1
+    divisor = numpy.uint64(base ** per_word)
+    words = []
+    start = 0
+    while True:
+        remainder = numpy.zeros(len(digests), dtype=numpy.uint64)
+        for column in range(start, limbs.shape[1]):
+            current = (remainder << numpy.uint64(32)) | limbs[:, column]
+            limbs[:, column] = current // divisor
+            remainder = current % divisor
+        words.append(remainder)
+        while start < limbs.shape[1] and not limbs[:, start].any():
+            start += 1
+        if start == limbs.shape[1]:
+            break
+    digits = numpy.empty((len(digests), len(words) * per_word),
+                         dtype=numpy.uint8)
+    for i, word in enumerate(words):
+        for j in range(per_word):
+            digits[:, i * per_word + j] = word % numpy.uint64(base)
+            word = word // numpy.uint64(base)
+    nonzero = digits != 0
+    return digits, numpy.where(
+        nonzero.any(axis=1),
+        digits.shape[1] - numpy.argmax(nonzero[:, ::-1], axis=1), 1)
+
+
+def _digest(item: ExportItem, hash_method: Optional[str]) -> bytes:
+    """Return the digest of one exported item."""
+    if hash_method is not None:
+        return bytes(hash_data(item, hash_method))
+    if isinstance(item, MusicalHash):
+        return bytes(item.hashed_bytes)
+    if isinstance(item, str):
+        return bytes.fromhex(item)
+    return bytes(item)
+
+
+def _row_formatter(key: Key,
+                   sharps: bool,
+                   fmt: str) -> Callable[[List[bytes]], str]:
+    """Return a function that formats the rows of a chunk of digests, with
+    the note names of key encoded for fmt once up front."""
+    names = [_note_name(note, sharps) for note in _key_notes(key)]
+    if fmt == 'jsonl':
+        table = numpy.array([json.dumps(name) for name in names], dtype=object)
+        join = ','.join
+        template = '{{"digest":"{}","notes":[{}]}}\n'
+    else:
+        table = numpy.array(names, dtype=object)
+        join = ' '.join
+        template = ('{},"{}"\n' if any(',' in name for name in names)
+                    else '{},{}\n')
+
+    def rows(digests: List[bytes]) -> str:
+        digits, counts = batch_digits(digests, len(names))
+        return ''.join([
+            template.format(digest.hex(), join(row[:count].tolist()))
+            for digest, row, count in zip(digests, table[digits],
+                                          counts.tolist())])
+
+    return rows
+
+
+def export_notes(  # pylint: disable=too-many-arguments
+        items: Iterable[ExportItem],
+        target: Union[str, BinaryIO],
+        key: Key = CHROMATIC_SCALE,
+        sharps: bool = True,
+        fmt: str = 'jsonl',
+        hash_method: Optional[str] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """Write the note sequences of many hashes as JSONL or CSV.
+
+    Items are processed chunk_rows at a time: the digits of a whole chunk
+    are computed with batch_digits, mapped to precomputed note names and
+    written with a single write call, so memory stays bounded however many
+    items there are.  Each JSONL row is {"digest": hex, "notes": [names]};
+    CSV output has a 'digest,notes' header and the notes separated by
+    spaces.  The notes of every row equal MusicalHash.notes(key, sharps).
+
+    # Args
+    - *items*: iterable of MusicalHash objects, raw digests or hex digests;
+        or of raw data to hash when hash_method is given.
+    - *target*: output path, '-' for standard output, or a binary stream.
+    - *key*: integer (see scale constants) corresponding to the musical
+        key, or a sequence of midi note numbers (see MusicalHash.notes).
+    - *sharps*: True to name semitones as sharps (#A), False for flats (bB).
+    - *fmt*: 'jsonl' or 'csv'.
+    - *hash_method*: if given, items are data hashed with this method.
+    - *chunk_rows*: number of rows converted and written at a time.
+
+    # Returns
+    The number of rows written.
+
+    # Raises
+    A ValueError if the key, format or chunk_rows is invalid.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(
+            'The export format: {} is not supported.'.format(fmt))
+    if chunk_rows < 1:
+        raise ValueError('chunk_rows must be a positive integer')
+    rows = _row_formatter(key, sharps, fmt)
+    if target == '-':
+        stream = sys.stdout.buffer
+    elif isinstance(target, str):
+        stream = open(target, 'wb')  # pylint: disable=consider-using-with
+    else:
+        stream = target
+    total = 0
+    try:
+        if fmt == 'csv':
+            stream.write(b'digest,notes\n')
+        items = iter(items)
+        while True:
+            digests = [_digest(item, hash_method)
+                       for item in islice(items, chunk_rows)]
+            if not digests:
+                break
+            stream.write(rows(digests).encode('utf-8'))
+            total += len(digests)
+    finally:
+        if isinstance(target, str) and target != '-':
+            stream.close()
+        else:
+            stream.flush()
+    return total
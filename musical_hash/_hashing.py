@@ -0,0 +1,377 @@
+"""Built-in hash methods and helpers for hashing files and directory trees."""
+
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+import hashlib
+import mmap
+import os
+import zlib
+import numpy
+
+
+HashFunction = Callable[[bytearray], bytearray]
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+TREE_LEAF_SIZE = 1024 * 1024
+
+
+BUILTIN_METHODS = {
+    'md5': {'module': 'hashlib', 'constructor': hashlib.md5},
+    'sha1': {'module': 'hashlib', 'constructor': hashlib.sha1},
+    'sha224': {'module': 'hashlib', 'constructor': hashlib.sha224},
+    'sha256': {'module': 'hashlib', 'constructor': hashlib.sha256},
+    'sha384': {'module': 'hashlib', 'constructor': hashlib.sha384},
+    'sha512': {'module': 'hashlib', 'constructor': hashlib.sha512},
+    'blake2b': {'module': 'hashlib', 'constructor': hashlib.blake2b},
+    'blake2s': {'module': 'hashlib', 'constructor': hashlib.blake2s},
+    'blake2b_tree': {'module': 'blake2_tree', 'constructor': hashlib.blake2b},
+    'blake2s_tree': {'module': 'blake2_tree', 'constructor': hashlib.blake2s},
+    'adler32': {'module': 'zlib', 'function': zlib.adler32},
+    'crc32': {'module': 'zlib', 'function': zlib.crc32}}
+
+
+def check_hash_method(hash_method: Union[str, HashFunction]) -> None:
+    """Check that hash_method can be used without hashing anything.
+
+    Raises:
+        A ValueError if hash_method is neither callable nor the name of one of
+        the built-in methods.
+    """
+    if (not callable(hash_method) and
+            hash_method.lower() not in BUILTIN_METHODS):
+        raise ValueError(
+            'The hash_method: {} is not supported.'.format(hash_method))
+
+
+def hash_data(data: bytearray,
+              hash_method: Union[str, HashFunction]) -> bytearray:
+    """Hash data with a built-in or user-defined hash method.
+
+    Raises:
+        A ValueError if hash_method is neither callable nor the name of one of
+        the built-in methods.
+    """
+    if callable(hash_method):
+        return hash_method(data)
+    if hash_method.lower() in BUILTIN_METHODS:
+        if BUILTIN_METHODS[hash_method]['module'] == 'hashlib':
+            return BUILTIN_METHODS[hash_method]['constructor'](data).digest()
+        if BUILTIN_METHODS[hash_method]['module'] == 'zlib':
+            return BUILTIN_METHODS[hash_method]['function'](data).to_bytes(
+                4, byteorder='little', signed=False)
+        if BUILTIN_METHODS[hash_method]['module'] == 'blake2_tree':
+            return blake2_tree_digest(
+                data, BUILTIN_METHODS[hash_method]['constructor'])
+        raise ValueError(
+            'BUG: hash_method: {} not found in BUILTIN_METHODS map, '
+            'despite already checking the map for its existence. '
+            'Please report this issue to the maintainers of '
+            'musical_hash so it can be fixed'.format(hash_method))
+    raise ValueError(
+        'The hash_method: {} is not supported.'.format(hash_method))
+
+
+class ZlibHasher:
+    """Running zlib checksum with the same interface as a hashlib object.
+
+    # Args
+    - *function*: zlib.crc32 or zlib.adler32.
+    """
+
+    def __init__(self, function: Callable[..., int]) -> None:
+        self.function = function
+        self.value = function(b'')
+
+    def update(self, data: bytes) -> None:
+        """Feed data into the running checksum."""
+        self.value = self.function(data, self.value)
+
+    def digest(self) -> bytes:
+        """Return the checksum in the same byte order as hash_data."""
+        return self.value.to_bytes(4, byteorder='little', signed=False)
+
+    def copy(self) -> 'ZlibHasher':
+        """Return an independent copy of this running checksum."""
+        other = ZlibHasher(self.function)
+        other.value = self.value
+        return other
+
+
+def _tree_node(constructor: Callable,
+               data: bytes,
+               node_offset: int,
+               node_depth: int,
+               last_node: bool):
+    """Return the hash object of one node of a two level BLAKE2 tree with
+    unlimited fanout and leaves of TREE_LEAF_SIZE bytes."""
+    return constructor(data, fanout=0, depth=2, leaf_size=TREE_LEAF_SIZE,
+                       node_offset=node_offset, node_depth=node_depth,
+                       inner_size=constructor().digest_size,
+                       last_node=last_node)
+
+
+def _tree_root(constructor: Callable, leaf_digests: List[bytes]) -> bytes:
+    """Return the root digest of a BLAKE2 tree from its leaf digests."""
+    return _tree_node(
+        constructor, b''.join(leaf_digests), 0, 1, True).digest()
+
+
+def blake2_tree_digest(data: bytes,
+                       constructor: Callable,
+                       workers: Optional[int] = None) -> bytes:
+    """Hash data in BLAKE2 tree mode, hashing the leaves in parallel.
+
+    The data is split into leaves of TREE_LEAF_SIZE bytes, each hashed as a
+    leaf node (depth 0, node offset = leaf index, the final leaf flagged as
+    last node) and the concatenated leaf digests are hashed as the root node
+    (depth 1).  hashlib releases the GIL while hashing, so the leaves are
+    hashed in parallel on a thread pool.  The digest does not depend on the
+    number of workers.
+
+    Args:
+        data: any bytes-like object, e.g. an mmap of a file.
+        constructor: hashlib.blake2b or hashlib.blake2s.
+        workers: number of threads; defaults to the CPU count.
+
+    Returns:
+        The root digest.
+    """
+    view = memoryview(data).cast('B')
+    leaves = max(1, -(-len(view) // TREE_LEAF_SIZE))
+
+    def hash_leaf(index: int) -> bytes:
+        return _tree_node(
+            constructor,
+            view[index * TREE_LEAF_SIZE:(index + 1) * TREE_LEAF_SIZE],
+            index, 0, index == leaves - 1).digest()
+
+    workers = min(workers or os.cpu_count() or 1, leaves)
+    try:
+        if workers <= 1:
+            digests = [hash_leaf(index) for index in range(leaves)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                digests = list(executor.map(hash_leaf, range(leaves)))
+    finally:
+        view.release()
+    return _tree_root(constructor, digests)
+
+
+class Blake2TreeHasher:
+    """Running BLAKE2 tree hash with the same interface as a hashlib object.
+
+    Produces the same digest as blake2_tree_digest() of all data fed to
+    update().  A full leaf can only be hashed once more data arrives, since
+    the final leaf is flagged differently, so up to one leaf is buffered.
+
+    # Args
+    - *constructor*: hashlib.blake2b or hashlib.blake2s.
+    """
+
+    def __init__(self, constructor: Callable) -> None:
+        self.constructor = constructor
+        self.leaf_digests = []  # type: List[bytes]
+        self.buffer = bytearray()
+
+    def update(self, data: bytes) -> None:
+        """Feed data into the running hash."""
+        self.buffer += data
+        if len(self.buffer) <= TREE_LEAF_SIZE:
+            return
+        full = (len(self.buffer) - 1) // TREE_LEAF_SIZE
+        view = memoryview(self.buffer)
+        for index in range(full):
+            self.leaf_digests.append(_tree_node(
+                self.constructor,
+                view[index * TREE_LEAF_SIZE:(index + 1) * TREE_LEAF_SIZE],
+                len(self.leaf_digests), 0, False).digest())
+        view.release()
+        del self.buffer[:full * TREE_LEAF_SIZE]
+
+    def digest(self) -> bytes:
+        """Return the root digest of the data fed so far."""
+        last = _tree_node(self.constructor, bytes(self.buffer),
+                          len(self.leaf_digests), 0, True).digest()
+        return _tree_root(self.constructor, self.leaf_digests + [last])
+
+    def copy(self) -> 'Blake2TreeHasher':
+        """Return an independent copy of this running hash."""
+        other = Blake2TreeHasher(self.constructor)
+        other.leaf_digests = list(self.leaf_digests)
+        other.buffer = bytearray(self.buffer)
+        return other
+
+
+def new_hasher(hash_method: str):
+    """Return a new running hash object for a built-in hash method.
+
+    The returned object has update(), digest() and copy() methods.
+
+    Raises:
+        A ValueError if hash_method is not the name of a built-in method.
+    """
+    if callable(hash_method) or hash_method.lower() not in BUILTIN_METHODS:
+        raise ValueError(
+            'The hash_method: {} does not support incremental '
+            'hashing.'.format(hash_method))
+    method = BUILTIN_METHODS[hash_method.lower()]
+    if method['module'] == 'hashlib':
+        return method['constructor']()
+    if method['module'] == 'blake2_tree':
+        return Blake2TreeHasher(method['constructor'])
+    return ZlibHasher(method['function'])
+
+
+def digest_size(hash_method: str) -> int:
+    """Return the size in bytes of the digests of a built-in hash method.
+
+    Raises:
+        A ValueError if hash_method is not the name of a built-in method.
+    """
+    if callable(hash_method) or hash_method.lower() not in BUILTIN_METHODS:
+        raise ValueError(
+            'The hash_method: {} is not supported.'.format(hash_method))
+    method = BUILTIN_METHODS[hash_method.lower()]
+    if method['module'] in ('hashlib', 'blake2_tree'):
+        return method['constructor']().digest_size
+    return 4
+
+
+def parse_digest(digest: Union[bytes, bytearray, str],
+                 hash_method: str) -> bytes:
+    """Return a digest given as bytes or a hex string as bytes, checking
+    that its size matches hash_method.
+
+    Raises:
+        A ValueError if the digest is not valid hex or has the wrong size.
+    """
+    if isinstance(digest, str):
+        digest = bytes.fromhex(digest)
+    size = digest_size(hash_method)
+    if len(digest) != size:
+        raise ValueError(
+            'A {} digest must be {} bytes long, not {}'.format(
+                hash_method, size, len(digest)))
+    return bytes(digest)
+
+
+def parse_hex_digests(digests: Iterable[str],
+                      hash_method: str) -> numpy.ndarray:
+    """Decode many hex digests of a built-in hash method at once.
+
+    The lengths of all strings are checked with one numpy operation and the
+    hex is decoded with a single bytes.fromhex call over the joined strings.
+
+    Returns:
+        A two dimensional numpy array of uint8 with one digest per row.
+
+    Raises:
+        A ValueError if any digest is not valid hex or has the wrong size.
+    """
+    size = digest_size(hash_method)
+    digests = numpy.asarray(list(digests), dtype=str)
+    if digests.size == 0:
+        return numpy.empty((0, size), dtype=numpy.uint8)
+    lengths = numpy.char.str_len(digests.ravel())
+    wrong = numpy.flatnonzero(lengths != 2 * size)
+    if wrong.size:
+        raise ValueError(
+            'A {} digest must be {} hex digits long; digest {} has {}'.format(
+                hash_method, 2 * size, wrong[0], lengths[wrong[0]]))
+    try:
+        joined = bytes.fromhex(''.join(digests.ravel().tolist()))
+    except ValueError:
+        raise ValueError('The digests are not all valid hex strings')
+    return numpy.frombuffer(joined, dtype=numpy.uint8).reshape(-1, size)
+
+
+def hash_file(path: str,
+              hash_method: Union[str, HashFunction],
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              workers: int = 1) -> bytearray:
+    """Hash the contents of a file, reading it in chunks of chunk_size bytes.
+
+    A user-defined hash method is called once with the whole contents of the
+    file since it cannot be fed incrementally.  The BLAKE2 tree methods map
+    the file into memory and hash its leaves on workers threads.
+    """
+    with open(path, 'rb') as file:
+        if callable(hash_method):
+            return hash_method(file.read())
+        method = BUILTIN_METHODS.get(hash_method.lower(), {})
+        if method.get('module') == 'blake2_tree':
+            if os.fstat(file.fileno()).st_size == 0:
+                return blake2_tree_digest(b'', method['constructor'], 1)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return blake2_tree_digest(
+                    view, method['constructor'], workers)
+        hasher = new_hasher(hash_method)
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        size = file.readinto(buffer)
+        while size:
+            hasher.update(view[:size])
+            size = file.readinto(buffer)
+        return hasher.digest()
+
+
+def list_tree(path: str) -> List[Tuple[str, str]]:
+    """Return (relative path, absolute path) of every file below path, sorted
+    by relative path.  Relative paths always use '/' as separator."""
+    files = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            full_path = os.path.join(root, name)
+            if os.path.isfile(full_path):
+                files.append(
+                    (os.path.relpath(full_path, path).replace(os.sep, '/'),
+                     full_path))
+    files.sort()
+    return files
+
+
+def hash_tree(path: str,
+              hash_method: Union[str, HashFunction],
+              workers: int = 1,
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[bytearray, int]:
+    """Return a Merkle digest of every file in a directory tree.
+
+    Every file is hashed with hash_method, in parallel on workers threads.
+    The root digest is hash_method applied to the concatenation, in order of
+    sorted relative path, of each relative path encoded as UTF-8, a zero byte
+    and the digest of the file.  The result therefore only depends on the
+    names and contents of the files, not on the number of workers or on the
+    order in which the file system lists them.
+
+    Returns:
+        A tuple of the root digest and the total number of bytes hashed.
+
+    Raises:
+        A ValueError if workers is less than one, a FileNotFoundError if path
+        does not exist or a NotADirectoryError if it is not a directory.
+    """
+    if workers < 1:
+        raise ValueError('The number of workers must be at least one')
+    if not os.path.isdir(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                'The directory: {} does not exist'.format(path))
+        raise NotADirectoryError(
+            'The path: {} is not a directory'.format(path))
+    files = list_tree(path)
+
+    def hash_one(entry: Tuple[str, str]) -> bytearray:
+        return hash_file(entry[1], hash_method, chunk_size)
+
+    if workers == 1:
+        digests = [hash_one(entry) for entry in files]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            digests = list(executor.map(hash_one, files))
+    nodes = b''.join(
+        relative_path.encode('utf-8') + b'\x00' + bytes(digest)
+        for (relative_path, _), digest in zip(files, digests))
+    total = sum(os.path.getsize(full_path) for _, full_path in files)
+    return hash_data(nodes, hash_method), total
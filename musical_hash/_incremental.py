@@ -0,0 +1,225 @@
+"""Incremental rendering of a directory tree driven by a manifest."""
+
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import json
+import os
+import tempfile
+import threading
+from ._hashing import hash_file, list_tree
+from ._renderer import Renderer
+
+
+MANIFEST_NAME = '.musical_hash_manifest.json'
+MANIFEST_VERSION = 1
+OUTPUT_FORMATS = {'wav': '.wav', 'midi': '.mid'}
+
+
+UpdateResult = NamedTuple('UpdateResult', [('rendered', List[str]),
+                                           ('unchanged', int),
+                                           ('removed', List[str])])
+
+
+class IncrementalRenderer:
+    """Keeps a rendered copy of every file in a directory tree up to date.
+
+    Every file below *source* is rendered to a wave or midi file at the same
+    relative path below *output*, with '.wav' or '.mid' appended.  A JSON
+    manifest records, for each file, its size, modification time, digest and
+    output path, together with the render parameters.  update() only hashes
+    files whose size or modification time changed, and only renders files
+    whose digest changed, so a rebuild costs time proportional to the number
+    of changed files.  Changing any render parameter re-renders everything.
+
+    # Args
+    - *source*: root directory of the input tree.
+    - *output*: root directory of the rendered tree.
+    - *renderer*: Renderer holding the key and the wave or midi parameters.
+    - *hash_method*: name of the built-in hash method used for fingerprints.
+    - *fmt*: 'wav' or 'midi'.
+    - *manifest*: path of the manifest; defaults to a file named
+        MANIFEST_NAME in the output directory.
+    - *workers*: number of threads used to hash changed files.
+
+    # Raises
+    A ValueError if fmt is not supported or workers is less than one.
+    """
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 source: str,
+                 output: str,
+                 renderer: Renderer,
+                 hash_method: str = 'sha256',
+                 fmt: str = 'wav',
+                 manifest: Optional[str] = None,
+                 workers: int = 1) -> None:
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(
+                'The output format: {} is not supported.'.format(fmt))
+        if workers < 1:
+            raise ValueError('The number of workers must be at least one')
+        self.source = source
+        self.output = output
+        self.renderer = renderer
+        self.hash_method = hash_method
+        self.fmt = fmt
+        self.manifest = manifest or os.path.join(output, MANIFEST_NAME)
+        self.workers = workers
+
+    def params(self) -> Dict:
+        """Return the render parameters recorded in the manifest."""
+        key = self.renderer.key
+        params = {'hash_method': self.hash_method,
+                  'format': self.fmt,
+                  'key': key if isinstance(key, int) else list(key)}
+        if self.fmt == 'wav':
+            params.update(note_duration=self.renderer.note_duration,
+                          sample_rate=self.renderer.sample_rate,
+                          encoding=self.renderer.encoding)
+        else:
+            params.update(ticks_per_note=self.renderer.ticks_per_note,
+                          instrument=self.renderer.instrument)
+        return json.loads(json.dumps(params))
+
+    def _load(self) -> Dict:
+        """Return the manifest on disk, or an empty one."""
+        try:
+            with open(self.manifest, 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return {'files': {}}
+        if manifest.get('version') != MANIFEST_VERSION:
+            return {'files': {}}
+        return manifest
+
+    def _save(self, manifest: Dict) -> None:
+        """Atomically replace the manifest on disk."""
+        directory = os.path.dirname(os.path.abspath(self.manifest))
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as file:
+                json.dump(manifest, file, indent=1, sort_keys=True)
+            os.replace(temporary, self.manifest)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def _render(self, digest: bytes, output_path: str) -> None:
+        """Render one digest to output_path."""
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if self.fmt == 'wav':
+            self.renderer.wave(output_path, digest)
+        else:
+            self.renderer.midi(output_path, digest)
+
+    def _scan(self, old_entries: Dict) -> Tuple[Dict, List[Tuple[str, str]]]:
+        """Stat every input file and return the new manifest entries and the
+        (relative path, full path) of files that need to be hashed.  Files
+        deleted since they were listed are left out."""
+        output_dir = os.path.join(os.path.abspath(self.output), '')
+        manifest_path = os.path.abspath(self.manifest)
+        entries = {}
+        stale = []
+        for relative_path, full_path in list_tree(self.source):
+            full_path = os.path.abspath(full_path)
+            if full_path.startswith(output_dir) or full_path == manifest_path:
+                continue
+            try:
+                status = os.stat(full_path)
+            except FileNotFoundError:
+                continue
+            entry = {'size': status.st_size,
+                     'mtime_ns': status.st_mtime_ns,
+                     'output': os.path.join(
+                         self.output,
+                         relative_path + OUTPUT_FORMATS[self.fmt])}
+            old = old_entries.get(relative_path)
+            if (old is not None and old['size'] == entry['size'] and
+                    old['mtime_ns'] == entry['mtime_ns'] and
+                    os.path.isfile(old['output'])):
+                entries[relative_path] = old
+            else:
+                entries[relative_path] = entry
+                stale.append((relative_path, full_path))
+        return entries, stale
+
+    def update(self) -> UpdateResult:
+        """Bring the output tree and the manifest up to date.
+
+        Files deleted while the update runs are treated as removed.  The
+        manifest is only rewritten when an entry changed.
+
+        # Returns
+        An UpdateResult with the relative paths of the rendered files, the
+        number of unchanged files and the relative paths of files whose
+        input was removed (their outputs are deleted).
+        """
+        manifest = self._load()
+        params = self.params()
+        old_entries = manifest['files']
+        if manifest.get('params') != params:
+            old_entries = {}
+        entries, stale = self._scan(old_entries)
+
+        def fingerprint(item):
+            try:
+                return hash_file(item[1], self.hash_method).hex()
+            except FileNotFoundError:
+                return None
+
+        if self.workers == 1:
+            digests = [fingerprint(item) for item in stale]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                digests = list(executor.map(fingerprint, stale))
+        rendered = []
+        for (relative_path, _), digest in zip(stale, digests):
+            if digest is None:
+                del entries[relative_path]
+                continue
+            entry = entries[relative_path]
+            entry['digest'] = digest
+            old = old_entries.get(relative_path)
+            if (old is None or old.get('digest') != digest or
+                    not os.path.isfile(entry['output'])):
+                self._render(bytes.fromhex(digest), entry['output'])
+                rendered.append(relative_path)
+        removed = sorted(set(manifest['files']) - set(entries))
+        for relative_path, old in manifest['files'].items():
+            if (relative_path not in entries or
+                    entries[relative_path]['output'] != old['output']):
+                if os.path.isfile(old['output']):
+                    os.remove(old['output'])
+        if (manifest.get('version') != MANIFEST_VERSION or
+                manifest.get('params') != params or
+                manifest['files'] != entries):
+            self._save({'version': MANIFEST_VERSION,
+                        'params': params,
+                        'files': entries})
+        return UpdateResult(rendered, len(entries) - len(rendered), removed)
+
+    def watch(self,
+              interval: float = 1.0,
+              callback: Optional[Callable[[UpdateResult], None]] = None,
+              stop: Optional[threading.Event] = None) -> None:
+        """Poll the source tree and call update() every interval seconds.
+
+        Each poll only stats the files of the tree; files are hashed and
+        rendered only when they change.  Runs until stop is set, or forever
+        if stop is None.
+
+        # Args
+        - *interval*: seconds between polls.
+        - *callback*: optional function called with the UpdateResult of
+            every poll that rendered or removed something.
+        - *stop*: optional threading.Event that ends the watch when set.
+        """
+        if stop is None:
+            stop = threading.Event()
+        while not stop.is_set():
+            result = self.update()
+            if callback is not None and (result.rendered or result.removed):
+                callback(result)
+            stop.wait(interval)
@@ -0,0 +1,197 @@
+"""Streaming reader of sha256sum/md5sum style checksum manifests."""
+
+
+from itertools import islice
+from typing import Iterator, List, NamedTuple, Optional, TextIO, Union
+import os
+import sys
+from ._batch import midi_batch, wave_batch
+from ._export import EXPORT_FORMATS, export_notes
+from ._hashing import parse_hex_digests
+from ._incremental import OUTPUT_FORMATS
+from ._renderer import Renderer
+
+
+DEFAULT_CHUNK_LINES = 65536
+
+_HEX_DIGITS = '0123456789abcdefABCDEF'
+
+
+ManifestEntry = NamedTuple('ManifestEntry', [('path', str),
+                                             ('digest', bytes)])
+
+
+def _unescape(name: str) -> str:
+    """Undo the escaping sha256sum applies to names with a backslash or a
+    newline."""
+    result = []
+    characters = iter(name)
+    for character in characters:
+        if character == '\\':
+            character = next(characters, '')
+            character = '\n' if character == 'n' else character
+        result.append(character)
+    return ''.join(result)
+
+
+def _parse_line(line: str, number: int) -> Optional[List[str]]:
+    """Return the [hex digest, path] of one manifest line, or None for a
+    blank line or a comment.
+
+    Both the default format ('<hex>  <path>' or '<hex> *<path>') and the
+    BSD format written with --tag ('<NAME> (<path>) = <hex>') are accepted.
+    """
+    line = line.rstrip('\r\n')
+    if not line or line.startswith('#'):
+        return None
+    escaped = line.startswith('\\')
+    if escaped:
+        line = line[1:]
+    digest, _, path = line.partition(' ')
+    if path[:1] in (' ', '*') and digest and not digest.strip(_HEX_DIGITS):
+        path = path[1:]
+    else:
+        tag, separator, digest = line.rpartition(') = ')
+        path = tag.partition(' (')[2]
+        if not separator or ' (' not in tag:
+            raise ValueError(
+                'Line {} is not a checksum line: {!r}'.format(number, line))
+    if not path:
+        raise ValueError('Line {} has an empty path'.format(number))
+    return [digest, _unescape(path) if escaped else path]
+
+
+def _decode_digests(digests: List[str],
+                    hash_method: Optional[str],
+                    number: int) -> List[bytes]:
+    """Decode the hex digests of one chunk of a manifest that ends at line
+    number."""
+    if hash_method is not None:
+        return [row.tobytes() for row in parse_hex_digests(
+            [digest.lower() for digest in digests], hash_method)]
+    try:
+        return [bytes.fromhex(digest) for digest in digests]
+    except ValueError:
+        raise ValueError(
+            'The manifest has a digest that is not valid hex before line '
+            '{}'.format(number + 1))
+
+
+def read_manifest(source: Union[str, TextIO],
+                  hash_method: Optional[str] = None,
+                  chunk_lines: int = DEFAULT_CHUNK_LINES
+                  ) -> Iterator[ManifestEntry]:
+    """Stream the entries of a sha256sum/md5sum style checksum manifest.
+
+    The manifest is read chunk_lines lines at a time and the hex digests of
+    each chunk are decoded together, without rehashing any file, so memory
+    stays bounded however long the manifest is.
+
+    # Args
+    - *source*: path of the manifest, '-' for standard input, or a text
+        stream.
+    - *hash_method*: name of the built-in hash method of the digests, e.g.
+        'sha256' or 'md5'; every digest is checked to have its size.  If
+        None, digests of any size are accepted.
+    - *chunk_lines*: number of lines decoded at a time.
+
+    # Returns
+    An iterator of ManifestEntry (path, digest) tuples in manifest order.
+
+    # Raises
+    A ValueError if a line is malformed or a digest is not valid hex or has
+    the wrong size.
+    """
+    if chunk_lines < 1:
+        raise ValueError('chunk_lines must be a positive integer')
+    if source == '-':
+        stream = sys.stdin
+    elif isinstance(source, str):
+        stream = open(  # pylint: disable=consider-using-with
+            source, 'r', encoding='utf-8', newline='\n')
+    else:
+        stream = source
+    try:
+        number = 0
+        while True:
+            lines = list(islice(stream, chunk_lines))
+            if not lines:
+                break
+            parsed = []
+            for line in lines:
+                number += 1
+                fields = _parse_line(line, number)
+                if fields is not None:
+                    parsed.append(fields)
+            digests = _decode_digests([digest for digest, _ in parsed],
+                                      hash_method, number)
+            for (_, path), digest in zip(parsed, digests):
+                yield ManifestEntry(path, digest)
+    finally:
+        if isinstance(source, str) and source != '-':
+            stream.close()
+
+
+def _output_path(output: str, path: str, suffix: str) -> str:
+    """Return the output file of a manifest path below output."""
+    parts = [part for part in path.replace('\\', '/').split('/')
+             if part not in ('', '.')]
+    if not parts or '..' in parts:
+        raise ValueError(
+            'The manifest path: {} cannot be rendered below the output '
+            'directory'.format(path))
+    return os.path.join(output, *parts) + suffix
+
+
+def render_manifest(  # pylint: disable=too-many-arguments
+        source: Union[str, TextIO],
+        output: str,
+        renderer: Renderer,
+        fmt: str = 'wav',
+        hash_method: Optional[str] = None,
+        chunk_lines: int = DEFAULT_CHUNK_LINES,
+        link: bool = True) -> int:
+    """Render every entry of a checksum manifest.
+
+    For 'wav' and 'midi', each entry is written below the output directory
+    at its manifest path with '.wav' or '.mid' appended, through wave_batch
+    or midi_batch one chunk at a time, so repeated digests within a chunk
+    are rendered once.  For 'jsonl' and 'csv', output is a file that
+    receives the notes of every digest through export_notes.
+
+    # Args
+    - *source*: path of the manifest, '-' for standard input, or a text
+        stream.
+    - *output*: output directory, or output file for 'jsonl' and 'csv'.
+    - *renderer*: Renderer holding the key and the wave or midi parameters.
+    - *fmt*: 'wav', 'midi', 'jsonl' or 'csv'.
+    - *hash_method*: optional built-in hash method the digests must match.
+    - *chunk_lines*: number of manifest lines processed at a time.
+    - *link*: hard link files with the same digest (see wave_batch).
+
+    # Returns
+    The number of entries rendered.
+
+    # Raises
+    A ValueError if fmt is not supported, a line of the manifest is
+    malformed or a path would be rendered outside the output directory.
+    """
+    entries = read_manifest(source, hash_method, chunk_lines)
+    if fmt in EXPORT_FORMATS:
+        return export_notes((entry.digest for entry in entries), output,
+                            renderer.key, fmt=fmt, chunk_rows=chunk_lines)
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(
+            'The output format: {} is not supported.'.format(fmt))
+    batch = wave_batch if fmt == 'wav' else midi_batch
+    total = 0
+    while True:
+        items = [(entry.digest,
+                  _output_path(output, entry.path, OUTPUT_FORMATS[fmt]))
+                 for entry in islice(entries, chunk_lines)]
+        if not items:
+            return total
+        for directory in {os.path.dirname(path) for _, path in items}:
+            os.makedirs(directory, exist_ok=True)
+        batch(items, renderer, link)
+        total += len(items)
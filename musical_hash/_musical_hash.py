@@ -1,13 +1,20 @@
 """MusicalHash class and helper functions."""
 
 
-from typing import Callable, List, Union
-import hashlib
-import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+import numbers
+import os
 import mido
 import numpy
 import wavio
+from ._cache import (RenderCache, bytes_to_samples, lookup, make_key,
+                     midi_bytes, samples_to_bytes, wave_bytes, wave_format)
+from ._codec import WAVE_ENCODINGS
+from ._hashing import (HashFunction, check_hash_method, hash_data, hash_file,
+                       hash_tree, new_hasher, parse_digest, parse_hex_digests)
 from ._scales import CHROMATIC_SCALE
+from ._stats import RenderStats, count, timed
 
 
 DEFAULT_NOTE_DURATION = 0.5
@@ -15,8 +22,7 @@ DEFAULT_SAMPLE_RATE = 44100
 DEFAULT_TICKS_PER_NOTE = 500
 PITCH_STANDARD = 440
 
-
-HashFunction = Callable[[bytearray], bytearray]
+Key = Union[int, Sequence[int]]
 
 
 def get_notes_in_scale(all_notes: List[Union[float, int, str]],
@@ -54,36 +60,135 @@ def get_notes_in_scale(all_notes: List[Union[float, int, str]],
     return scale_notes
 
 
-def change_base(number: int, base: int) -> List[int]:
+def change_base(number: int,
+                base: int,
+                stats: Optional[RenderStats] = None) -> List[int]:
     """Express an integer in another base.
 
     Args:
         number: The integer to convert.
         base: The base to which to convert number.
+        stats: optional RenderStats object that records the time spent in
+            this function.
 
     Returns:
         A list of integers, where each integer is a digit in number expressed
         as base. The first element in the list is least significant digit and
         the final element is the most significant digit.
     """
-    digits = []
-    while number >= base:
-        remainder = number % base
-        digits.append(remainder)
-        number = number // base
-    digits.append(number)
+    with timed(stats, 'change_base'):
+        digits = []
+        while number >= base:
+            remainder = number % base
+            digits.append(remainder)
+            number = number // base
+        digits.append(number)
+    count(stats, 'notes', len(digits))
     return digits
 
 
+def _note_names(sharps: bool = True) -> List[str]:
+    """Return the names of all twelve semitones starting from A."""
+    if sharps:
+        return ['A', '#A', 'B', 'C', '#C', 'D',
+                '#D', 'E', 'F', '#F', 'G', '#G']
+    return ['A', 'bB', 'B', 'C', 'bD', 'D',
+            'Eb', 'E', 'F', 'bG', 'G', 'bA']
+
+
+def _midi_notes() -> List[int]:
+    """Return the midi note numbers of all twelve semitones starting from
+    A."""
+    return [69 + n for n in range(12)]
+
+
+def _key_notes(key: Key) -> List[int]:
+    """Return the midi note numbers of a key in digit order.
+
+    An integer key is a scale mask over the twelve semitones starting from A
+    (see get_notes_in_scale).  Any other key is a sequence of distinct midi
+    note numbers, which may span several octaves and have up to 128 notes.
+    """
+    if isinstance(key, numbers.Integral):
+        return get_notes_in_scale(_midi_notes(), key)
+    notes = [int(note) for note in key]
+    if (len(notes) <= 1 or len(set(notes)) != len(notes) or
+            min(notes) < 0 or max(notes) > 127):
+        raise ValueError(
+            'A key of midi note numbers must include at least two distinct '
+            'notes from 0 to 127')
+    return notes
+
+
+def _note_name(note: int, sharps: bool = True) -> str:
+    """Return the name of a midi note: the name of its semitone followed by
+    one apostrophe for each octave above the A of the standard pitch, or one
+    comma for each octave below it."""
+    octave, semitone = divmod(note - 69, 12)
+    name = _note_names(sharps)[semitone]
+    if octave >= 0:
+        return name + "'" * octave
+    return name + ',' * -octave
+
+
+def _pitch(note: int) -> float:
+    """Return the frequency of a midi note."""
+    return PITCH_STANDARD * (2 ** ((note - 69) / 12))
+
+
+def _digits(hashed_bytes: bytearray,
+            base: int,
+            stats: Optional[RenderStats] = None) -> List[int]:
+    """Return hashed_bytes as a little endian integer expressed in base."""
+    return change_base(
+        int.from_bytes(hashed_bytes, byteorder='little'), base, stats)
+
+
+def _in_note_ranges(function: Callable[[int, int], None],
+                    notes: int,
+                    threads: int = 1) -> None:
+    """Split notes into contiguous ranges and call function(start, stop) for
+    each range, on threads threads.
+
+    Args:
+        function: callable that renders the notes from start to stop, e.g.
+            into a disjoint slice of a preallocated buffer.  NumPy releases
+            the GIL in its ufuncs, so the ranges are rendered in parallel.
+        notes: total number of notes.
+        threads: number of threads; 1 calls function once on this thread.
+
+    Raises:
+        A ValueError if threads is less than one.
+    """
+    if threads < 1:
+        raise ValueError('The number of threads must be at least one')
+    threads = min(threads, notes)
+    if threads <= 1:
+        function(0, notes)
+        return
+    bounds = [notes * i // threads for i in range(threads + 1)]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(function, start, stop)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]:
+            future.result()
+
+
 def pitches_to_tune(pitches: List[float],
                     note_duration: float = DEFAULT_NOTE_DURATION,
-                    sample_rate: int = DEFAULT_SAMPLE_RATE) -> numpy.ndarray:
+                    sample_rate: int = DEFAULT_SAMPLE_RATE,
+                    stats: Optional[RenderStats] = None,
+                    threads: int = 1) -> numpy.ndarray:
     """Convert a list of pitches to a tune.
 
     Args:
         pitches: list of floats, each corresponding to a pitch in Hertz.
         note_duration: default note duration in seconds.
         sample_rate: the sample rate for the output tune.
+        stats: optional RenderStats object that records the time spent in
+            this function and the number of samples produced.
+        threads: number of threads that synthesize contiguous ranges of
+            notes into one preallocated tune.  The output does not depend on
+            the number of threads.
 
     Returns:
         A numpy array of samples at sample_rate that represents a tune
@@ -91,25 +196,31 @@ def pitches_to_tune(pitches: List[float],
 
     Raises:
         A ValueError if the note duration or sample rate is less than or equal
-        to zero.
+        to zero, or if threads is less than one.
     """
     if note_duration <= 0 or sample_rate <= 0:
         raise ValueError(
             'The note duration and sample rate must be positive, '
             'non-zero numbers')
-    envelope = numpy.exp(
-        0 - numpy.linspace(0, note_duration, int(sample_rate * note_duration)))
-    tune = numpy.empty(0)
-    for pitch in pitches:
-        tune = numpy.append(
-            tune,
-            envelope * numpy.sin(
-                2 * numpy.pi * pitch * numpy.linspace(
-                    0, note_duration, int(sample_rate * note_duration))))
+    with timed(stats, 'pitches_to_tune'):
+        note_length = int(sample_rate * note_duration)
+        time_axis = numpy.linspace(0, note_duration, note_length)
+        envelope = numpy.exp(0 - time_axis)
+        tune = numpy.empty(len(pitches) * note_length)
+
+        def synthesize(start: int, stop: int) -> None:
+            for i in range(start, stop):
+                note = tune[i * note_length:(i + 1) * note_length]
+                numpy.multiply(2 * numpy.pi * pitches[i], time_axis, out=note)
+                numpy.sin(note, out=note)
+                numpy.multiply(envelope, note, out=note)
+
+        _in_note_ranges(synthesize, len(pitches), threads)
+    count(stats, 'samples', tune.size)
     return tune
 
 
-class MusicalHash:
+class MusicalHash:  # pylint: disable=too-many-instance-attributes
     """Represents a musical hash of a bytearray.
 
     # Args
@@ -119,90 +230,280 @@ class MusicalHash:
         user-defined hash method is a Callable object that takes a single
         argument (bytearray) and returns a bytearray, which is the hashed value
         of the input.  The built-in hash methods are: 'md5', 'sha1', 'sha224',
-        'sha384', 'sha512', 'blake2b', 'blake2s', 'adler32', 'crc32'.
+        'sha256', 'sha384', 'sha512', 'blake2b', 'blake2s', 'blake2b_tree',
+        'blake2s_tree', 'adler32', 'crc32'.  The '_tree' methods hash in
+        BLAKE2 tree mode with 1 MiB leaves, so large inputs are hashed on all
+        cores (see from_file).
+    - *stats*: optional RenderStats object.  When given, the time spent
+        hashing and in every later rendering stage is recorded on it along
+        with byte, note and sample counts.
+    - *cache*: optional RenderCache object.  When given, samples(), wave()
+        and midi() look up their output in the cache before synthesizing
+        anything and store it there afterwards.
+    - *lazy*: if True, the constructor only records data and hash_method,
+        and the data is hashed when hashed_bytes is first accessed, e.g. by
+        notes(), samples(), wave() or midi().  The data must not be modified
+        until then.  Either way the digest and its digits in each base are
+        computed at most once per object.
 
     # Raises
     A ValueError if an unsupported hash method is specified in the constructor.
     """
 
-    def __init__(self,
+    def __init__(self,  # pylint: disable=too-many-arguments
                  data: bytearray,
-                 hash_method: Union[str, HashFunction]) -> None:
+                 hash_method: Union[str, HashFunction],
+                 stats: Optional[RenderStats] = None,
+                 cache: Optional[RenderCache] = None,
+                 lazy: bool = False) -> None:
+        if lazy:
+            check_hash_method(hash_method)
+        self._init(data, None, hash_method, stats, cache)
+        if not lazy:
+            self._hash()
+
+    def _init(self,  # pylint: disable=too-many-arguments
+              data: Optional[bytearray],
+              path: Optional[str],
+              hash_method: Union[str, HashFunction],
+              stats: Optional[RenderStats],
+              cache: Optional[RenderCache],
+              workers: int = 1) -> None:
+        """Record the source of the hash without hashing anything."""
         self.data = data
+        self.path = path
         self.hash_method = hash_method
-        self.hashed_bytes = None
-        builtin_methods = {
-            'md5': {'module': 'hashlib', 'constructor': hashlib.md5},
-            'sha1': {'module': 'hashlib', 'constructor': hashlib.sha1},
-            'sha224': {'module': 'hashlib', 'constructor': hashlib.sha224},
-            'sha384': {'module': 'hashlib', 'constructor': hashlib.sha384},
-            'sha512': {'module': 'hashlib', 'constructor': hashlib.sha512},
-            'blake2b': {'module': 'hashlib', 'constructor': hashlib.blake2b},
-            'blake2s': {'module': 'hashlib', 'constructor': hashlib.blake2s},
-            'adler32': {'module': 'zlib', 'function': zlib.adler32},
-            'crc32': {'module': 'zlib', 'function': zlib.crc32}}
-        if callable(self.hash_method):
-            self.hashed_bytes = self.hash_method(data)
-        elif self.hash_method.lower() in builtin_methods:
-            if builtin_methods[self.hash_method]['module'] == 'hashlib':
-                self.hashed_bytes = (builtin_methods[self.hash_method]
-                                     ['constructor'](self.data).digest())
-            elif builtin_methods[self.hash_method]['module'] == 'zlib':
-                self.hashed_bytes = (builtin_methods[self.hash_method]
-                                     ['function'](self.data).to_bytes(
-                                         4, byteorder='little', signed=False))
+        self.stats = stats
+        self.cache = cache
+        self._workers = workers
+        self._hashed_bytes = None  # type: Optional[bytearray]
+        self._base_digits = {}  # type: Dict[int, List[int]]
+
+    def _hash(self) -> None:
+        """Hash the recorded data or file."""
+        with timed(self.stats, 'hash'):
+            if self.path is None:
+                hashed_bytes = hash_data(self.data, self.hash_method)
             else:
-                raise ValueError(
-                    'BUG: hash_method: {} not found in builtin_methods map, '
-                    'despite already checking the map for its existence. '
-                    'Please report this issue to the maintainers of '
-                    'musical_hash so it can be fixed'.format(self.hash_method))
-        else:
-            raise ValueError(
-                'The hash_method: {} is not '
-                'supported.'.format(self.hash_method))
+                hashed_bytes = hash_file(self.path, self.hash_method,
+                                         workers=self._workers)
+        count(self.stats, 'bytes_hashed',
+              len(self.data) if self.path is None
+              else os.path.getsize(self.path))
+        self._hashed_bytes = hashed_bytes
+
+    @property
+    def hashed_bytes(self) -> bytearray:
+        """The digest; a lazy object hashes its source on first access."""
+        if self._hashed_bytes is None:
+            self._hash()
+        return self._hashed_bytes
+
+    @hashed_bytes.setter
+    def hashed_bytes(self, hashed_bytes: bytearray) -> None:
+        self._hashed_bytes = hashed_bytes
+        self._base_digits = {}
+
+    def _digits_in(self, base: int) -> List[int]:
+        """Return the memoized digits of the digest in base; callers must
+        not modify the list.
+
+        Only the first conversion per base is timed as 'change_base'; the
+        render methods count the 'notes' they render on every call.
+        """
+        digits = self._base_digits.get(base)
+        if digits is None:
+            hashed_bytes = self.hashed_bytes
+            with timed(self.stats, 'change_base'):
+                digits = _digits(hashed_bytes, base)
+            self._base_digits[base] = digits
+        return digits
+
+    @classmethod
+    def _from_hashed_bytes(cls,
+                           hashed_bytes: bytearray,
+                           hash_method: Union[str, HashFunction],
+                           stats: Optional[RenderStats] = None,
+                           cache: Optional[RenderCache] = None
+                           ) -> 'MusicalHash':
+        """Return a MusicalHash object for an already computed digest; its
+        data attribute is None."""
+        musical_hash = cls.__new__(cls)
+        musical_hash._init(  # pylint: disable=protected-access
+            None, None, hash_method, stats, cache)
+        musical_hash.hashed_bytes = hashed_bytes
+        return musical_hash
+
+    @classmethod
+    def from_digest(cls,
+                    digest: Union[bytes, bytearray, str],
+                    hash_method: str,
+                    stats: Optional[RenderStats] = None,
+                    cache: Optional[RenderCache] = None) -> 'MusicalHash':
+        """Return the musical hash of a stored digest without rehashing.
+
+        The data attribute of the result is None.
+
+        # Args
+        - *digest*: the digest as bytes or as a hex string.
+        - *hash_method*: name of the built-in hash method (see MusicalHash)
+            that produced the digest.
+        - *stats*: optional RenderStats object (see MusicalHash).
+        - *cache*: optional RenderCache object (see MusicalHash).
+
+        # Raises
+        A ValueError if hash_method is not the name of a built-in hash method,
+        or if the digest is not valid hex or not the size of its digests.
+        """
+        return cls._from_hashed_bytes(
+            parse_digest(digest, hash_method), hash_method, stats, cache)
+
+    @classmethod
+    def from_digests(cls,
+                     digests: Iterable[str],
+                     hash_method: str,
+                     stats: Optional[RenderStats] = None,
+                     cache: Optional[RenderCache] = None
+                     ) -> List['MusicalHash']:
+        """Return the musical hashes of many stored hex digests.
+
+        All digests are validated and decoded together, so building the
+        objects for a large table of checksums costs little more than the
+        decoding of its hex.
+
+        # Args
+        - *digests*: iterable (e.g. list or numpy array) of hex strings.
+        - *hash_method*: name of the built-in hash method (see MusicalHash)
+            that produced the digests.
+        - *stats*: optional RenderStats object (see MusicalHash).
+        - *cache*: optional RenderCache object (see MusicalHash).
+
+        # Raises
+        A ValueError if hash_method is not the name of a built-in hash method,
+        or if any digest is not valid hex or not the size of its digests.
+        """
+        rows = parse_hex_digests(digests, hash_method)
+        return [cls._from_hashed_bytes(row.tobytes(), hash_method, stats,
+                                       cache)
+                for row in rows]
+
+    @classmethod
+    def from_file(cls,  # pylint: disable=too-many-arguments
+                  path: str,
+                  hash_method: Union[str, HashFunction],
+                  workers: int = 1,
+                  stats: Optional[RenderStats] = None,
+                  cache: Optional[RenderCache] = None,
+                  lazy: bool = False) -> 'MusicalHash':
+        """Return the musical hash of the contents of a file.
+
+        The file is read in chunks and never loaded into memory as a whole,
+        except by a user-defined hash method.  With 'blake2b_tree' or
+        'blake2s_tree' the file is mapped into memory and its leaves are
+        hashed in parallel on workers threads, so hashing a single large
+        file scales with the number of cores.  The digest does not depend
+        on workers.  The data attribute of the result is None and its path
+        attribute is path.
+
+        # Args
+        - *path*: path of the file.
+        - *hash_method*: the method to use for hashing (see MusicalHash).
+        - *workers*: number of threads used by the tree hash methods.
+        - *stats*: optional RenderStats object (see MusicalHash).
+        - *cache*: optional RenderCache object (see MusicalHash).
+        - *lazy*: if True, the file is only hashed when the hashed bytes are
+            first needed (see MusicalHash).
+
+        # Raises
+        A ValueError if an unsupported hash method is specified or workers is
+        less than one.
+        """
+        if workers < 1:
+            raise ValueError('The number of workers must be at least one')
+        if lazy:
+            check_hash_method(hash_method)
+        musical_hash = cls.__new__(cls)
+        musical_hash._init(  # pylint: disable=protected-access
+            None, path, hash_method, stats, cache, workers)
+        if not lazy:
+            musical_hash._hash()  # pylint: disable=protected-access
+        return musical_hash
+
+    @classmethod
+    def from_tree(cls,
+                  path: str,
+                  hash_method: Union[str, HashFunction],
+                  workers: int = 1,
+                  stats: Optional[RenderStats] = None,
+                  cache: Optional[RenderCache] = None) -> 'MusicalHash':
+        """Return the musical hash of every file in a directory tree.
+
+        Files are read in chunks and hashed in parallel, then combined in a
+        deterministic Merkle order: the hashed bytes are hash_method applied
+        to each file's relative path (sorted, '/' separated, UTF-8), a zero
+        byte and the file's digest, concatenated.  The tree is never loaded
+        into memory as a whole and the data attribute of the result is None.
+
+        # Args
+        - *path*: the root directory of the tree.
+        - *hash_method*: the method to use for hashing (see MusicalHash).
+        - *workers*: number of threads used to hash files.
+        - *stats*: optional RenderStats object (see MusicalHash).
+        - *cache*: optional RenderCache object (see MusicalHash).
+
+        # Raises
+        A ValueError if an unsupported hash method is specified or workers is
+        less than one, a FileNotFoundError if path does not exist or a
+        NotADirectoryError if it is not a directory.
+        """
+        with timed(stats, 'hash'):
+            hashed_bytes, size = hash_tree(path, hash_method, workers)
+        count(stats, 'bytes_hashed', size)
+        return cls._from_hashed_bytes(hashed_bytes, hash_method, stats, cache)
 
     def notes(self,
-              key: int = CHROMATIC_SCALE,
+              key: Key = CHROMATIC_SCALE,
               sharps: bool = True) -> List[str]:
         """Return the hash as a list of notes ('A', '#A', B, '#B', ... ).
 
         # Args
         - *key*: integer (see scale constants) corresponding to the musical
-            key.
+            key, or a sequence of distinct midi note numbers (see
+            repeat_scale) for a key spanning several octaves.  Larger keys
+            need fewer notes per hash.
         - *sharps*: boolean True if semitones should be reported as sharps
                 (#A) or False if they should be reported as flats (bB).
 
         # Returns
         A List of string where each element corresponds to a note in the
-        musical representation of this hash value.
+        musical representation of this hash value.  Notes outside the octave
+        starting at the standard pitch A carry one apostrophe per octave
+        above it (A') or one comma per octave below it (A,).
 
         # Raises
-        A ValueError if the key argument has one or fewer notes or more than
-        twelve notes.
+        A ValueError if the key is an integer scale mask outside 0x002 to
+        0xfff, or a sequence that is not at least two distinct midi note
+        numbers from 0 to 127.
         """
-        notes = []
-        if sharps:
-            notes = ['A', '#A', 'B', 'C', '#C', 'D',
-                     '#D', 'E', 'F', '#F', 'G', '#G']
-        else:
-            notes = ['A', 'bB', 'B', 'C', 'bD', 'D',
-                     'Eb', 'E', 'F', 'bG', 'G', 'bA']
-        scale = get_notes_in_scale(notes, key)
-        return [scale[i] for i in
-                change_base(int.from_bytes(self.hashed_bytes,
-                                           byteorder='little'), len(scale))]
+        scale = [_note_name(note, sharps) for note in _key_notes(key)]
+        digits = self._digits_in(len(scale))
+        count(self.stats, 'notes', len(digits))
+        return [scale[i] for i in digits]
 
     def samples(self,
-                key: int = CHROMATIC_SCALE,
+                key: Key = CHROMATIC_SCALE,
                 note_duration: int = DEFAULT_NOTE_DURATION,
-                sample_rate: int = DEFAULT_SAMPLE_RATE) -> numpy.ndarray:
+                sample_rate: int = DEFAULT_SAMPLE_RATE,
+                threads: int = 1) -> numpy.ndarray:
         """Return the hash as a numpy array of samples.
 
         # Args
         - *key*: integer (see scale constants) corresponding to the musical key
+            or a sequence of midi note numbers (see notes)
         - *note_duration*: duration of each note in seconds
         - *sample_rate*: sample rate for the output audio
+        - *threads*: number of threads synthesizing contiguous ranges of
+            notes in parallel; the samples do not depend on it
 
         # Returns
         Numpy array of audio samples with sample rate.  The hash will be
@@ -210,60 +511,103 @@ class MusicalHash:
         seconds.
 
         # Raises
-        A ValueError if the key argument has one or fewer notes or more than
-        twelve notes or if the sample_rate or note_duration are less than or
-        equal to zero.
+        A ValueError if the key is an integer scale mask outside 0x002 to 0xfff
+        or a sequence that is not at least two distinct midi note numbers from
+        0 to 127, if the sample_rate or note_duration are less than or equal to
+        zero or if threads is less than one.
         """
         if note_duration <= 0 or sample_rate <= 0:
             raise ValueError(
                 'Note duration and sample rate must be positive, non-zero '
                 'integers')
-        scale = get_notes_in_scale(
-            [PITCH_STANDARD * (2 ** (n / 12)) for n in range(12)],
-            key)
-        return pitches_to_tune(
-            [scale[i] for i in change_base(
-                int.from_bytes(self.hashed_bytes, byteorder='little'),
-                len(scale))],
+        if threads < 1:
+            raise ValueError('The number of threads must be at least one')
+        if self.cache is not None:
+            cache_key = make_key(
+                self.hashed_bytes, key, note_duration, sample_rate, 'npy')
+            cached = lookup(self.cache, cache_key, self.stats)
+            if cached is not None:
+                return bytes_to_samples(cached)
+        scale = [_pitch(note) for note in _key_notes(key)]
+        digits = self._digits_in(len(scale))
+        count(self.stats, 'notes', len(digits))
+        tune = pitches_to_tune(
+            [scale[i] for i in digits],
             note_duration,
-            sample_rate)
-
-    def wave(self,
+            sample_rate,
+            self.stats,
+            threads)
+        if self.cache is not None:
+            self.cache.put(cache_key, samples_to_bytes(tune))
+        return tune
+
+    def wave(self,  # pylint: disable=too-many-arguments
              filename: str,
-             key: int = CHROMATIC_SCALE,
+             key: Key = CHROMATIC_SCALE,
              note_duration: int = DEFAULT_NOTE_DURATION,
-             sample_rate: int = DEFAULT_SAMPLE_RATE) -> None:
+             sample_rate: int = DEFAULT_SAMPLE_RATE,
+             encoding: str = 'pcm',
+             threads: int = 1) -> None:
         """Returns the hash as a wave file.
 
         # Args
         - *filename*: file path for the output wave file.
-        - *key*: integer (see constants) corresponding to the musical key.
+        - *key*: integer (see constants) corresponding to the musical key,
+            or a sequence of midi note numbers (see notes).
         - *note_duration*: duration of each note in seconds.
         - *sample_rate*: sample rate for the output audio.
+        - *encoding*: 'pcm' for 16 bit linear samples, or 'mulaw' or 'alaw'
+            for 8 bit G.711 companded samples.  Combined with a sample_rate
+            of COMPACT_SAMPLE_RATE (8000) the compressed encodings make a
+            compact, low-bandwidth audio profile.
+        - *threads*: number of threads synthesizing the samples (see
+            samples).
 
         # Raises
-        A ValueError if the key argument has one or fewer notes or more than
-        twelve notes or if the sample_rate or note_duration are less than or
-        equal to zero.
+        A ValueError if the key is an integer scale mask outside 0x002 to 0xfff
+        or a sequence that is not at least two distinct midi note numbers from
+        0 to 127, if the sample_rate or note_duration are less than or equal to
+        zero or if the encoding is not supported.
         """
         if filename == '':
             raise FileNotFoundError('Empty filename not permitted')
-        wavio.write(
-            file=filename,
-            data=self.samples(key, note_duration, sample_rate),
-            rate=sample_rate,
-            sampwidth=2)
+        if encoding not in WAVE_ENCODINGS:
+            raise ValueError(
+                'The wave encoding: {} is not supported.'.format(encoding))
+        if self.cache is None and encoding == 'pcm':
+            samples = self.samples(key, note_duration, sample_rate, threads)
+            with timed(self.stats, 'wave_write'):
+                wavio.write(
+                    file=filename,
+                    data=samples,
+                    rate=sample_rate,
+                    sampwidth=2)
+            return
+        contents = None
+        if self.cache is not None:
+            cache_key = make_key(self.hashed_bytes, key, note_duration,
+                                 sample_rate, wave_format(encoding))
+            contents = lookup(self.cache, cache_key, self.stats)
+        if contents is None:
+            samples = self.samples(key, note_duration, sample_rate, threads)
+            with timed(self.stats, 'wave_write'):
+                contents = wave_bytes(samples, sample_rate, encoding)
+            if self.cache is not None:
+                self.cache.put(cache_key, contents)
+        with open(filename, 'wb') as file:
+            file.write(contents)
 
     def midi(self,
              filename: str,
-             key: int = CHROMATIC_SCALE,
+             key: Key = CHROMATIC_SCALE,
              note_duration: int = DEFAULT_TICKS_PER_NOTE,
              instrument: int = 1) -> None:
         """Returns the hash as a midi file.
 
         # Args
         - *filename*: file path for the output midi file.
-        - *key*: integer (see constants) corresponding to the musical key.
+        - *key*: integer (see constants) corresponding to the musical key,
+            or a sequence of midi note numbers (see notes).
         - *note_duration*: duration of each note in midi ticks.
         - *instrument*: integer between 0 and 128 corresponding to the desired
             midi program.
@@ -272,23 +616,101 @@ class MusicalHash:
             raise FileNotFoundError('Empty filename not permitted')
         if note_duration <= 0:
             raise ValueError('Note duration must be a positive integer')
-        file = mido.MidiFile()
-        track = mido.MidiTrack()
-        track.append(
-            mido.Message('program_change', program=instrument, time=0))
-        scale = get_notes_in_scale([69 + n for n in range(12)], key)
-        for note in change_base(
-                int.from_bytes(self.hashed_bytes, byteorder='little'),
-                len(scale)):
-            track.append(mido.Message(
-                'note_on',
-                note=scale[note],
-                velocity=127,
-                time=0))
-            track.append(mido.Message(
-                'note_off',
-                note=scale[note],
-                velocity=127,
-                time=note_duration))
-        file.tracks.append(track)
-        file.save(filename)
+        if self.cache is not None:
+            cache_key = make_key(self.hashed_bytes, key, note_duration, None,
+                                 'midi:{}'.format(instrument))
+            contents = lookup(self.cache, cache_key, self.stats)
+            if contents is not None:
+                with open(filename, 'wb') as file:
+                    file.write(contents)
+                return
+        scale = _key_notes(key)
+        digits = self._digits_in(len(scale))
+        count(self.stats, 'notes', len(digits))
+        with timed(self.stats, 'midi_encode'):
+            file = mido.MidiFile()
+            track = mido.MidiTrack()
+            track.append(
+                mido.Message('program_change', program=instrument, time=0))
+            for note in digits:
+                track.append(mido.Message(
+                    'note_on',
+                    note=scale[note],
+                    velocity=127,
+                    time=0))
+                track.append(mido.Message(
+                    'note_off',
+                    note=scale[note],
+                    velocity=127,
+                    time=note_duration))
+            file.tracks.append(track)
+        with timed(self.stats, 'midi_write'):
+            if self.cache is not None:
+                self.cache.put(cache_key, midi_bytes(file))
+            file.save(filename)
+
+
+class StreamingMusicalHash:
+    """Incrementally computes a musical hash, like a hashlib object.
+
+    Data is fed in chunks with update(), and snapshot() returns a
+    **MusicalHash** of everything fed so far without rehashing it, so the tune
+    of a growing stream can be rendered at any checkpoint at a cost
+    proportional to the new data only.
+
+    # Args
+    - *hash_method*: name of a built-in hash method (see MusicalHash);
+        user-defined hash methods cannot be fed incrementally.
+    - *data*: optional initial data.
+    - *stats*: optional RenderStats object passed on to every snapshot; the
+        time spent in update() is recorded on it as the 'hash' stage.
+    - *cache*: optional RenderCache object passed on to every snapshot.
+
+    # Raises
+    A ValueError if hash_method is not the name of a built-in hash method.
+    """
+
+    def __init__(self,
+                 hash_method: str,
+                 data: bytearray = b'',
+                 stats: Optional[RenderStats] = None,
+                 cache: Optional[RenderCache] = None) -> None:
+        self.hash_method = hash_method
+        self.stats = stats
+        self.cache = cache
+        self._hasher = new_hasher(hash_method)
+        if data:
+            self.update(data)
+
+    def update(self, data: bytearray) -> None:
+        """Feed data into the running hash."""
+        with timed(self.stats, 'hash'):
+            self._hasher.update(data)
+        count(self.stats, 'bytes_hashed', len(data))
+
+    def copy(self) -> 'StreamingMusicalHash':
+        """Return an independent copy of the running hash."""
+        other = StreamingMusicalHash.__new__(StreamingMusicalHash)
+        other.hash_method = self.hash_method
+        other.stats = self.stats
+        other.cache = self.cache
+        other._hasher = self._hasher.copy()  # pylint: disable=protected-access
+        return other
+
+    def digest(self) -> bytes:
+        """Return the digest of all data fed so far."""
+        return self._hasher.digest()
+
+    def hexdigest(self) -> str:
+        """Return the digest of all data fed so far as a hex string."""
+        return self.digest().hex()
+
+    def snapshot(self) -> MusicalHash:
+        """Return a MusicalHash of all data fed so far.
+
+        The result's data attribute is None; further calls to update() do not
+        affect it.
+        """
+        # pylint: disable=protected-access
+        return MusicalHash._from_hashed_bytes(
+            self.digest(), self.hash_method, self.stats, self.cache)
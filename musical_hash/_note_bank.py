@@ -0,0 +1,145 @@
+"""Prebuilt note waveforms stored as memory-mapped .npy files."""
+
+
+from typing import Dict
+import hashlib
+import json
+import os
+import tempfile
+import numpy
+from ._musical_hash import Key, _key_notes, _pitch
+
+
+NOTE_BANK_VERSION = 1
+
+
+def note_waveforms(key: Key,
+                   note_duration: float,
+                   sample_rate: int) -> numpy.ndarray:
+    """Synthesize the waveform of every note of a key.
+
+    Args:
+        key: scale constant or sequence of midi note numbers.
+        note_duration: duration of each note in seconds.
+        sample_rate: sample rate of the waveforms.
+
+    Returns:
+        A float64 array with one row of int(sample_rate * note_duration)
+        samples per note of the key.
+    """
+    note_length = int(sample_rate * note_duration)
+    time_axis = numpy.linspace(0, note_duration, note_length)
+    envelope = numpy.exp(0 - time_axis)
+    notes = _key_notes(key)
+    waveforms = numpy.empty((len(notes), note_length))
+    for i, note in enumerate(notes):
+        waveforms[i] = envelope * numpy.sin(
+            2 * numpy.pi * _pitch(note) * time_axis)
+    return waveforms
+
+
+def _params(key: Key, note_duration: float, sample_rate: int) -> Dict:
+    """Return the parameters recorded in the sidecar of a note bank."""
+    return {'version': NOTE_BANK_VERSION,
+            'midi_notes': _key_notes(key),
+            'note_duration': note_duration,
+            'sample_rate': sample_rate}
+
+
+def note_bank_path(directory: str,
+                   key: Key,
+                   note_duration: float,
+                   sample_rate: int) -> str:
+    """Return the path of the note bank of a configuration in directory.
+
+    The file name is derived from the notes of the key, the note duration
+    and the sample rate, so any number of configurations can share one
+    directory.  The JSON sidecar is the same path with '.json' appended.
+    """
+    params = json.dumps(_params(key, note_duration, sample_rate),
+                        sort_keys=True)
+    return os.path.join(directory, 'notes-{}.npy'.format(
+        hashlib.sha256(params.encode('utf-8')).hexdigest()[:32]))
+
+
+def _replace(path: str, write) -> None:
+    """Write a file through write(file) and atomically move it to path."""
+    handle, temp_path = tempfile.mkstemp(
+        prefix='.', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            write(file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def build_note_bank(directory: str,
+                    key: Key,
+                    note_duration: float,
+                    sample_rate: int) -> str:
+    """Synthesize the notes of a configuration and save them as a note bank.
+
+    The waveforms are written as an .npy file next to a JSON sidecar holding
+    the configuration.  Both files are replaced atomically, so processes
+    building the same bank concurrently only waste work.
+
+    Args:
+        directory: directory of the note bank; created if needed.
+        key: scale constant or sequence of midi note numbers.
+        note_duration: duration of each note in seconds.
+        sample_rate: sample rate of the waveforms.
+
+    Returns:
+        The path of the .npy file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = note_bank_path(directory, key, note_duration, sample_rate)
+    waveforms = note_waveforms(key, note_duration, sample_rate)
+    _replace(path, lambda file: numpy.save(file, waveforms,
+                                           allow_pickle=False))
+    params = _params(key, note_duration, sample_rate)
+    params['shape'] = list(waveforms.shape)
+    _replace(path + '.json', lambda file: file.write(
+        json.dumps(params, indent=1, sort_keys=True).encode('utf-8')))
+    return path
+
+
+def load_note_bank(directory: str,
+                   key: Key,
+                   note_duration: float,
+                   sample_rate: int) -> numpy.ndarray:
+    """Open the note bank of a configuration, building it if needed.
+
+    The waveforms are memory-mapped read-only, so every process that opens
+    the same bank shares one copy of them in the page cache.  A bank whose
+    sidecar is missing or does not match the configuration is rebuilt.
+
+    Args:
+        directory: directory of the note bank.
+        key: scale constant or sequence of midi note numbers.
+        note_duration: duration of each note in seconds.
+        sample_rate: sample rate of the waveforms.
+
+    Returns:
+        A read-only memory-mapped float64 array with one row per note of the
+        key, equal to note_waveforms(key, note_duration, sample_rate).
+    """
+    path = note_bank_path(directory, key, note_duration, sample_rate)
+    params = _params(key, note_duration, sample_rate)
+    params['shape'] = [len(params['midi_notes']),
+                       int(sample_rate * note_duration)]
+    try:
+        with open(path + '.json', 'r', encoding='utf-8') as file:
+            valid = json.load(file) == json.loads(json.dumps(params))
+        if valid:
+            waveforms = numpy.load(path, mmap_mode='r', allow_pickle=False)
+            valid = (waveforms.dtype == numpy.float64 and
+                     list(waveforms.shape) == params['shape'])
+    except (OSError, ValueError):
+        valid = False
+    if not valid:
+        build_note_bank(directory, key, note_duration, sample_rate)
+        waveforms = numpy.load(path, mmap_mode='r', allow_pickle=False)
+    return waveforms
@@ -0,0 +1,351 @@
+"""Renderer class for rendering many hashes with one fixed configuration."""
+
+
+from typing import List, Optional, Union
+import struct
+import mido
+import numpy
+import wavio
+from ._cache import (RenderCache, bytes_to_samples, lookup, make_key,
+                     midi_bytes, samples_to_bytes, wave_bytes, wave_format)
+from ._codec import WAVE_ENCODINGS
+from ._musical_hash import (DEFAULT_NOTE_DURATION, DEFAULT_SAMPLE_RATE,
+                            DEFAULT_TICKS_PER_NOTE, Key, MusicalHash,
+                            _digits, _in_note_ranges, _key_notes, _note_name,
+                            _pitch)
+from ._note_bank import load_note_bank, note_waveforms
+from ._scales import CHROMATIC_SCALE
+from ._stats import RenderStats, count, timed
+
+
+HashSource = Union[MusicalHash, bytes, bytearray]
+
+
+def _variable_int(value: int) -> bytes:
+    """Encode value as a midi variable length quantity."""
+    encoded = [value & 0x7f]
+    value >>= 7
+    while value:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    return bytes(reversed(encoded))
+
+
+def _hashed_bytes(source: HashSource) -> bytearray:
+    """Return the digest of a MusicalHash object or the digest itself."""
+    if isinstance(source, MusicalHash):
+        return source.hashed_bytes
+    return source
+
+
+class Renderer:  # pylint: disable=too-many-instance-attributes
+    """Renders any number of hashes with a single, fixed configuration.
+
+    All of the work that only depends on the configuration (argument
+    validation, decoding the scale mask, building the frequency table, the
+    envelope, the time axis and the waveform of every note in the scale) is
+    done once in the constructor.  Every render method accepts either a
+    **MusicalHash** object or the raw digest bytes.  The output of each method
+    is identical to the output of the **MusicalHash** method of the same
+    name.
+
+    # Args
+    - *key*: integer (see scale constants) corresponding to the musical key,
+        or a sequence of midi note numbers (see MusicalHash.notes).
+    - *note_duration*: duration of each note in seconds for audio output.
+    - *sample_rate*: sample rate for audio output.
+    - *instrument*: integer between 0 and 128 corresponding to the desired
+        midi program.
+    - *ticks_per_note*: duration of each note in midi ticks for midi output.
+    - *encoding*: encoding of wave output, 'pcm', 'mulaw' or 'alaw' (see
+        MusicalHash.wave).
+    - *stats*: optional RenderStats object on which every render is
+        recorded.
+    - *cache*: optional RenderCache object that samples(), wave() and midi()
+        check before synthesizing anything.
+    - *note_bank*: optional directory of note banks (see load_note_bank).
+        The note waveforms are then memory-mapped from a prebuilt .npy file,
+        built on first use, instead of synthesized, so processes rendering
+        the same configuration share one read-only copy of them.
+
+    # Raises
+    A ValueError if the key is an integer scale mask outside 0x002 to 0xfff or
+    a sequence that is not at least two distinct midi note numbers from 0 to
+    127, if the sample_rate, note_duration or ticks_per_note are less than or
+    equal to zero or if the encoding is not supported.
+    """
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 key: Key = CHROMATIC_SCALE,
+                 note_duration: float = DEFAULT_NOTE_DURATION,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE,
+                 instrument: int = 1,
+                 ticks_per_note: int = DEFAULT_TICKS_PER_NOTE,
+                 encoding: str = 'pcm',
+                 stats: Optional[RenderStats] = None,
+                 cache: Optional[RenderCache] = None,
+                 note_bank: Optional[str] = None) -> None:
+        if note_duration <= 0 or sample_rate <= 0:
+            raise ValueError(
+                'Note duration and sample rate must be positive, non-zero '
+                'integers')
+        if ticks_per_note <= 0:
+            raise ValueError('Note duration must be a positive integer')
+        if encoding not in WAVE_ENCODINGS:
+            raise ValueError(
+                'The wave encoding: {} is not supported.'.format(encoding))
+        self.key = key
+        self.note_duration = note_duration
+        self.sample_rate = sample_rate
+        self.instrument = instrument
+        self.ticks_per_note = ticks_per_note
+        self.encoding = encoding
+        self.stats = stats
+        self.cache = cache
+        self.midi_notes = _key_notes(key)
+        self.sharp_names = [_note_name(note, True) for note in self.midi_notes]
+        self.flat_names = [_note_name(note, False) for note in self.midi_notes]
+        self.pitches = [_pitch(note) for note in self.midi_notes]
+        self.base = len(self.pitches)
+        self.note_length = int(sample_rate * note_duration)
+        self.note_bank = note_bank
+        if note_bank is None:
+            self.waveforms = note_waveforms(key, note_duration, sample_rate)
+        else:
+            self.waveforms = load_note_bank(note_bank, key, note_duration,
+                                            sample_rate)
+        self.midi_messages = [
+            (mido.Message('note_on', note=note, velocity=127, time=0),
+             mido.Message('note_off', note=note, velocity=127,
+                          time=ticks_per_note))
+            for note in self.midi_notes]
+        self.midi_note_bytes = [
+            b'\x00' + bytes(note_on.bytes()) +
+            _variable_int(ticks_per_note) + bytes(note_off.bytes())
+            for note_on, note_off in self.midi_messages]
+
+    def digits(self, source: HashSource) -> List[int]:
+        """Return the digits of a hash in the base of this renderer's key.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+
+        # Returns
+        A list of integers, least significant digit first, where each digit
+        is an index into the notes of the key.
+        """
+        return _digits(_hashed_bytes(source), self.base, self.stats)
+
+    def notes(self, source: HashSource, sharps: bool = True) -> List[str]:
+        """Return a hash as a list of notes ('A', '#A', B, '#B', ... ).
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *sharps*: boolean True if semitones should be reported as sharps
+                (#A) or False if they should be reported as flats (bB).
+
+        # Returns
+        A List of string where each element corresponds to a note in the
+        musical representation of the hash value.
+        """
+        names = self.sharp_names if sharps else self.flat_names
+        return [names[i] for i in self.digits(source)]
+
+    def samples(self,
+                source: HashSource,
+                threads: int = 1) -> numpy.ndarray:
+        """Return a hash as a numpy array of samples.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *threads*: number of threads synthesizing contiguous ranges of
+            notes into disjoint slices of the output; the samples do not
+            depend on it.
+
+        # Returns
+        Numpy array of audio samples at this renderer's sample rate.
+
+        # Raises
+        A ValueError if threads is less than one.
+        """
+        if threads < 1:
+            raise ValueError('The number of threads must be at least one')
+        if self.cache is not None:
+            cache_key = make_key(_hashed_bytes(source), self.key,
+                                 self.note_duration, self.sample_rate, 'npy')
+            cached = lookup(self.cache, cache_key, self.stats)
+            if cached is not None:
+                return bytes_to_samples(cached)
+        digits = self.digits(source)
+        with timed(self.stats, 'pitches_to_tune'):
+            tune = numpy.empty(len(digits) * self.note_length)
+            length = self.note_length
+            _in_note_ranges(
+                lambda start, stop: self.synthesize(
+                    digits[start:stop], tune[start * length:stop * length]),
+                len(digits), threads)
+        count(self.stats, 'samples', tune.size)
+        if self.cache is not None:
+            self.cache.put(cache_key, samples_to_bytes(tune))
+        return tune
+
+    def synthesize(self,
+                   digits: List[int],
+                   out: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+        """Return the samples of a sequence of note indices.
+
+        # Args
+        - *digits*: indices into the notes of the key, e.g. a contiguous
+            range of the output of digits().
+        - *out*: optional one dimensional float64 array of exactly
+            len(digits) * note_length samples to write the result into.
+
+        # Returns
+        The samples of the notes, one after the other; out if it was given.
+        """
+        if out is None:
+            out = numpy.empty(len(digits) * self.note_length)
+        numpy.take(self.waveforms, digits, axis=0,
+                   out=out.reshape(len(digits), self.note_length))
+        return out
+
+    def wave(self,
+             filename: str,
+             source: HashSource,
+             threads: int = 1) -> None:
+        """Write a hash to a wave file.
+
+        # Args
+        - *filename*: file path for the output wave file.
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *threads*: number of threads synthesizing the samples (see
+            samples).
+        """
+        if filename == '':
+            raise FileNotFoundError('Empty filename not permitted')
+        if self.cache is not None or self.encoding != 'pcm':
+            with open(filename, 'wb') as file:
+                file.write(self.wave_bytes(source, threads))
+            return
+        samples = self.samples(source, threads)
+        with timed(self.stats, 'wave_write'):
+            wavio.write(
+                file=filename,
+                data=samples,
+                rate=self.sample_rate,
+                sampwidth=2)
+
+    def wave_bytes(self, source: HashSource, threads: int = 1) -> bytes:
+        """Return a hash as the contents of a wave file.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *threads*: number of threads synthesizing the samples (see
+            samples).
+        """
+        if self.cache is not None:
+            cache_key = make_key(_hashed_bytes(source), self.key,
+                                 self.note_duration, self.sample_rate,
+                                 wave_format(self.encoding))
+            contents = lookup(self.cache, cache_key, self.stats)
+            if contents is not None:
+                return contents
+        samples = self.samples(source, threads)
+        with timed(self.stats, 'wave_write'):
+            contents = wave_bytes(samples, self.sample_rate, self.encoding)
+        if self.cache is not None:
+            self.cache.put(cache_key, contents)
+        return contents
+
+    def midi(self, filename: str, source: HashSource) -> None:
+        """Write a hash to a midi file.
+
+        # Args
+        - *filename*: file path for the output midi file.
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        """
+        if filename == '':
+            raise FileNotFoundError('Empty filename not permitted')
+        if self.cache is not None:
+            with open(filename, 'wb') as file:
+                file.write(self.midi_bytes(source))
+            return
+        file = self.midi_file(source)
+        with timed(self.stats, 'midi_write'):
+            file.save(filename)
+
+    def midi_bytes(self, source: HashSource) -> bytes:
+        """Return a hash as the contents of a midi file.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        """
+        if self.cache is not None:
+            cache_key = make_key(_hashed_bytes(source), self.key,
+                                 self.ticks_per_note, None,
+                                 'midi:{}'.format(self.instrument))
+            contents = lookup(self.cache, cache_key, self.stats)
+            if contents is not None:
+                return contents
+        file = self.midi_file(source)
+        with timed(self.stats, 'midi_write'):
+            contents = midi_bytes(file)
+        if self.cache is not None:
+            self.cache.put(cache_key, contents)
+        return contents
+
+    def midi_track(self, source: HashSource) -> mido.MidiTrack:
+        """Return a hash as a midi track.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+
+        # Returns
+        A mido.MidiTrack that selects the instrument and plays every note.
+        """
+        digits = self.digits(source)
+        with timed(self.stats, 'midi_encode'):
+            track = mido.MidiTrack()
+            track.append(
+                mido.Message('program_change', program=self.instrument,
+                             time=0))
+            for note in digits:
+                track.extend(self.midi_messages[note])
+        return track
+
+    def midi_file(self, source: HashSource) -> mido.MidiFile:
+        """Return a hash as a single track mido.MidiFile.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        """
+        file = mido.MidiFile()
+        file.tracks.append(self.midi_track(source))
+        return file
+
+    def midi_track_bytes(self,
+                         source: HashSource,
+                         name: Optional[str] = None) -> bytes:
+        """Return a hash as an encoded midi track chunk.
+
+        The chunk holds the same messages as midi_track(), preceded by a
+        track name meta message if name is given, and can be written
+        directly into a standard midi file.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *name*: optional track name, e.g. the artifact ID.
+        """
+        digits = self.digits(source)
+        with timed(self.stats, 'midi_encode'):
+            events = []
+            if name is not None:
+                events.append(b'\x00' + bytes(
+                    mido.MetaMessage('track_name', name=name).bytes()))
+            events.append(b'\x00' + bytes(mido.Message(
+                'program_change', program=self.instrument).bytes()))
+            events.extend([self.midi_note_bytes[note] for note in digits])
+            events.append(b'\x00' + bytes(
+                mido.MetaMessage('end_of_track').bytes()))
+            data = b''.join(events)
+        return b'MTrk' + struct.pack('>L', len(data)) + data
@@ -144,3 +144,43 @@ def get_scale(notes: List[str]) -> int:
             raise ValueError(
                 'The string {} is not a valid musical note'.format(note))
     return scale
+
+
+def repeat_scale(scale: int,
+                 octaves: int,
+                 first_note: int = 69) -> List[int]:
+    """Repeat a scale over several octaves to form a larger key.
+
+    A key with more notes encodes more bits in each note, so a hash is
+    represented by fewer notes: a chromatic scale repeated over four octaves
+    (48 notes) needs about a third fewer notes than the chromatic scale.
+
+    # Args
+    - *scale*: scale constant; its least significant bit is the first note.
+    - *octaves*: number of octaves to repeat the scale over.
+    - *first_note*: midi note number of the first note of the lowest
+        octave.  The default, 69, is the A of the standard pitch, so that
+        the first octave sounds the same as the scale constant itself.
+
+    # Returns
+    A list of midi note numbers, in ascending order, that can be used as the
+    key argument of any of the MusicalHash methods.
+
+    # Raises
+    A ValueError if the scale is not a valid scale constant, if octaves is
+    less than one or if a note falls outside the midi range 0 to 127.
+    """
+    if scale <= 1 or scale > 0xfff:
+        raise ValueError(
+            'A valid musical scale must include at least two notes and no '
+            'more then twelve notes (0x001 to 0xfff)')
+    if octaves < 1:
+        raise ValueError('A scale must be repeated over at least one octave')
+    notes = [first_note + 12 * octave + semitone
+             for octave in range(octaves)
+             for semitone in range(12) if scale & (0x1 << semitone)]
+    if notes[0] < 0 or notes[-1] > 127:
+        raise ValueError(
+            'The repeated scale spans midi notes {} to {}, outside of 0 to '
+            '127'.format(notes[0], notes[-1]))
+    return notes
@@ -0,0 +1,272 @@
+"""In-process render job scheduler that batches like-configured jobs."""
+
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+import heapq
+import itertools
+import queue
+import threading
+import time
+import numpy
+from ._cache import wave_bytes
+from ._export import batch_digits
+from ._renderer import HashSource, Renderer, _hashed_bytes
+from ._server import RenderService
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+JOB_FORMATS = ('notes', 'samples', 'wave', 'midi')
+
+# Below this many digests, converting them one by one is faster than the
+# fixed cost of batch_digits.
+_BATCH_DIGITS_MIN = 48
+
+
+class _Job:  # pylint: disable=too-few-public-methods
+    """One submitted render and the future that receives its output."""
+
+    def __init__(self,
+                 digest: bytes,
+                 fmt: str,
+                 sharps: bool,
+                 group: Tuple) -> None:
+        self.digest = digest
+        self.fmt = fmt
+        self.sharps = sharps
+        self.group = group
+        self.future = Future()  # type: Future
+        self.taken = False
+
+
+class Scheduler:  # pylint: disable=too-many-instance-attributes
+    """Runs render jobs submitted from any thread on a pool of workers.
+
+    submit() queues a job and returns a concurrent.futures.Future.  Pending
+    jobs wait in a priority queue: a worker always starts with the oldest
+    job of the most urgent priority class, then takes every other pending
+    job with the same renderer configuration (key, note duration, sample
+    rate and so on) along with it, up to max_batch jobs.  A batch shares one
+    warm Renderer, and the digits and samples of all its 'samples' and
+    'wave' jobs are computed with single vectorized operations.  At most
+    max_pending jobs may be pending; submit() blocks beyond that.
+
+    # Args
+    - *workers*: number of worker threads.
+    - *max_pending*: maximum number of queued jobs.
+    - *max_batch*: maximum number of jobs run together.
+    - *service*: optional RenderService whose warm renderers are used; a new
+        one is created by default.
+
+    # Raises
+    A ValueError if workers, max_pending or max_batch is less than one.
+    """
+
+    def __init__(self,
+                 workers: int = 2,
+                 max_pending: int = 1024,
+                 max_batch: int = 64,
+                 service: Optional[RenderService] = None) -> None:
+        if workers < 1 or max_pending < 1 or max_batch < 1:
+            raise ValueError(
+                'workers, max_pending and max_batch must be at least one')
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.service = service if service is not None else RenderService()
+        self._heap = []  # type: List[Tuple[int, int, _Job]]
+        self._groups = {}  # type: Dict[Tuple, OrderedDict]
+        self._pending = 0
+        self._order = itertools.count()
+        self._closed = False
+        lock = threading.Lock()
+        self._not_empty = threading.Condition(lock)
+        self._not_full = threading.Condition(lock)
+        self._threads = [threading.Thread(target=self._work, daemon=True)
+                         for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self,  # pylint: disable=too-many-arguments
+               source: HashSource,
+               fmt: str = 'samples',
+               priority: int = PRIORITY_NORMAL,
+               sharps: bool = True,
+               timeout: Optional[float] = None,
+               **config) -> Future:
+        """Queue one render.
+
+        # Args
+        - *source*: a MusicalHash object or the raw hashed bytes.
+        - *fmt*: 'notes', 'samples', 'wave' (wave file contents) or 'midi'
+            (midi file contents).
+        - *priority*: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW, or any
+            integer; lower values run first.
+        - *sharps*: note naming for 'notes' jobs (see MusicalHash.notes).
+        - *timeout*: seconds to wait for room in the queue; None waits
+            forever and 0 does not wait.
+        - *config*: keyword arguments of Renderer (key, note_duration,
+            sample_rate, encoding, ticks_per_note, instrument).
+
+        # Returns
+        A Future whose result is the rendered output.
+
+        # Raises
+        A ValueError if fmt is not supported, a RuntimeError if the
+        scheduler is shut down, or queue.Full if the queue stayed full for
+        timeout seconds.
+        """
+        if fmt not in JOB_FORMATS:
+            raise ValueError(
+                'The job format: {} is not supported.'.format(fmt))
+        if isinstance(config.get('key'), list):
+            config['key'] = tuple(config['key'])
+        group = tuple(sorted(config.items()))
+        job = _Job(bytes(_hashed_bytes(source)), fmt, sharps, group)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_full:
+            while not self._closed and self._pending >= self.max_pending:
+                remaining = (None if deadline is None
+                             else deadline - time.monotonic())
+                if remaining is not None and remaining <= 0:
+                    raise queue.Full('The render queue is full')
+                self._not_full.wait(remaining)
+            if self._closed:
+                raise RuntimeError('The scheduler is shut down')
+            entry = (priority, next(self._order), job)
+            heapq.heappush(self._heap, entry)
+            self._groups.setdefault(group, OrderedDict())[entry[1]] = job
+            self._pending += 1
+            self._not_empty.notify()
+        return job.future
+
+    def pending(self) -> int:
+        """Return the number of queued jobs that no worker has taken yet."""
+        with self._not_empty:
+            return self._pending
+
+    def _take(self) -> Optional[List[_Job]]:
+        """Wait for the most urgent job and return it with the pending jobs
+        of its group, or None once shut down and drained."""
+        with self._not_empty:
+            while True:
+                while self._heap and self._heap[0][2].taken:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    break
+                if self._closed:
+                    return None
+                self._not_empty.wait()
+            _, order, first = heapq.heappop(self._heap)
+            group = self._groups[first.group]
+            del group[order]
+            batch = [first]
+            while group and len(batch) < self.max_batch:
+                batch.append(group.popitem(last=False)[1])
+            if not group:
+                del self._groups[first.group]
+            for job in batch:
+                job.taken = True
+            self._pending -= len(batch)
+            self._not_full.notify(len(batch))
+            if self._heap:
+                self._not_empty.notify()
+        return batch
+
+    def _work(self) -> None:
+        """Worker thread: run batches until shut down."""
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            batch = [job for job in batch
+                     if job.future.set_running_or_notify_cancel()]
+            if batch:
+                self._run(batch)
+
+    def _run(self, batch: List[_Job]) -> None:
+        """Render a batch of jobs that share one configuration."""
+        try:
+            renderer = self.service.renderer(**dict(batch[0].group))
+        except Exception as error:  # pylint: disable=broad-except
+            for job in batch:
+                job.future.set_exception(error)
+            return
+        audio = [job for job in batch if job.fmt in ('samples', 'wave')]
+        tunes = {}  # type: Dict[int, numpy.ndarray]
+        if audio and renderer.cache is None and renderer.stats is None:
+            try:
+                tunes = dict(zip(map(id, audio), _batch_samples(
+                    renderer, [job.digest for job in audio])))
+            except Exception as error:  # pylint: disable=broad-except
+                for job in audio:
+                    job.future.set_exception(error)
+                batch = [job for job in batch if job not in audio]
+        for job in batch:
+            try:
+                result = _result(renderer, job, tunes.get(id(job)))
+            except Exception as error:  # pylint: disable=broad-except
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs; workers finish every queued job and exit.
+
+        # Args
+        - *wait*: if True, return only once every worker has exited.
+        """
+        with self._not_empty:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> 'Scheduler':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.shutdown()
+        return False
+
+
+def _result(renderer: Renderer,
+            job: _Job,
+            tune: Optional[numpy.ndarray]):
+    """Return the output of one job, given its samples if they were
+    synthesized with the batch."""
+    if job.fmt == 'notes':
+        return renderer.notes(job.digest, job.sharps)
+    if job.fmt == 'midi':
+        return renderer.midi_bytes(job.digest)
+    if tune is None:
+        return (renderer.samples(job.digest) if job.fmt == 'samples'
+                else renderer.wave_bytes(job.digest))
+    if job.fmt == 'samples':
+        return tune
+    return wave_bytes(tune, renderer.sample_rate, renderer.encoding)
+
+
+def _batch_samples(renderer: Renderer,
+                   digests: List[bytes]) -> List[numpy.ndarray]:
+    """Return the samples of many digests from one gather of note waveforms.
+
+    Each tune is copied out of the gathered buffer, so callers own
+    independent arrays and the buffer is freed on return.  Large batches
+    also convert all their digests with a single batch_digits call.
+    """
+    if len(digests) >= _BATCH_DIGITS_MIN:
+        digits, counts = batch_digits(digests, renderer.base)
+        digits = digits[numpy.arange(digits.shape[1]) < counts[:, None]]
+    else:
+        rows = [renderer.digits(digest) for digest in digests]
+        counts = numpy.array([len(row) for row in rows])
+        digits = list(itertools.chain.from_iterable(rows))
+    return [tune.copy() for tune in numpy.split(
+        renderer.synthesize(digits),
+        numpy.cumsum(counts * renderer.note_length)[:-1])]
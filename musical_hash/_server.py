@@ -0,0 +1,231 @@
+"""Long running local render server with warm caches and a worker pool."""
+
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import json
+import os
+import socketserver
+import stat
+import threading
+from ._cache import RenderCache
+from ._hashing import hash_data
+from ._musical_hash import (DEFAULT_NOTE_DURATION, DEFAULT_SAMPLE_RATE,
+                            DEFAULT_TICKS_PER_NOTE, Key)
+from ._renderer import Renderer
+from ._scales import CHROMATIC_SCALE
+
+
+DEFAULT_PORT = 8440
+
+Response = Tuple[int, str, bytes]
+
+
+def _parse_key(text: str) -> Key:
+    """Parse a scale constant, or comma separated midi note numbers."""
+    if ',' in text:
+        return tuple(int(note, 0) for note in text.split(','))
+    return int(text, 0)
+
+
+class RenderService:
+    """Serves render requests with warm, shared per-configuration state.
+
+    One Renderer (scale tables, envelope and note waveforms) is kept for each
+    of the most recently used configurations, and rendered output can be
+    shared through a RenderCache, so repeated requests skip all setup work.
+    This class holds no sockets; see serve() for the HTTP front end.
+
+    # Args
+    - *max_renderers*: maximum number of configurations kept warm.
+    - *cache*: optional RenderCache shared by every renderer.
+    """
+
+    def __init__(self,
+                 max_renderers: int = 32,
+                 cache: Optional[RenderCache] = None) -> None:
+        self.max_renderers = max_renderers
+        self.cache = cache
+        self._renderers = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    def renderer(self, **config) -> Renderer:
+        """Return the warm Renderer for a configuration, creating it if
+        needed.  The keyword arguments are those of Renderer."""
+        config_key = tuple(sorted(config.items()))
+        with self._lock:
+            if config_key in self._renderers:
+                self._renderers.move_to_end(config_key)
+                return self._renderers[config_key]
+        renderer = Renderer(cache=self.cache, **config)
+        with self._lock:
+            self._renderers[config_key] = renderer
+            while len(self._renderers) > self.max_renderers:
+                self._renderers.popitem(last=False)
+        return renderer
+
+    def handle(self,
+               path: str,
+               query: Dict[str, str],
+               body: bytes) -> Response:
+        """Answer one request.
+
+        # Args
+        - *path*: '/notes', '/wave' or '/midi'.
+        - *query*: request parameters: either 'digest' (hex string of the
+            hashed bytes) or 'hash_method' (body is then the raw data to
+            hash), and optionally 'key', 'sharps', 'note_duration',
+            'sample_rate', 'encoding', 'ticks_per_note' and 'instrument'.
+            'key' is a scale constant or comma separated midi note numbers.
+        - *body*: raw data to hash when no digest is given.
+
+        # Returns
+        A tuple of HTTP status, content type and response body: 400 for a
+        request with invalid parameters and 500 for any other error.
+        """
+        try:
+            if 'digest' in query:
+                digest = bytes.fromhex(query['digest'])
+            elif 'hash_method' in query:
+                digest = hash_data(body, query['hash_method'])
+            else:
+                raise ValueError(
+                    'Either a digest or a hash_method must be given')
+            key = _parse_key(query.get('key', str(CHROMATIC_SCALE)))
+            if path == '/notes':
+                renderer = self.renderer(key=key)
+                sharps = query.get('sharps', 'true').lower() != 'false'
+                return (200, 'application/json', json.dumps(
+                    renderer.notes(digest, sharps)).encode('utf-8'))
+            if path == '/wave':
+                renderer = self.renderer(
+                    key=key,
+                    note_duration=float(query.get(
+                        'note_duration', DEFAULT_NOTE_DURATION)),
+                    sample_rate=int(query.get(
+                        'sample_rate', DEFAULT_SAMPLE_RATE)),
+                    encoding=query.get('encoding', 'pcm'))
+                return 200, 'audio/wav', renderer.wave_bytes(digest)
+            if path == '/midi':
+                renderer = self.renderer(
+                    key=key,
+                    ticks_per_note=int(query.get(
+                        'ticks_per_note', DEFAULT_TICKS_PER_NOTE)),
+                    instrument=int(query.get('instrument', 1)))
+                return 200, 'audio/midi', renderer.midi_bytes(digest)
+            return 404, 'text/plain', b'Unknown path'
+        except (ValueError, OverflowError, KeyError, TypeError) as error:
+            return 400, 'text/plain', str(error).encode('utf-8')
+        except Exception:  # pylint: disable=broad-except
+            return 500, 'text/plain', b'Internal server error'
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a RenderService."""
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Render the request body or the digest in the query string."""
+        url = urlsplit(self.path)
+        query = {name: values[-1]
+                 for name, values in parse_qs(url.query).items()}
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        status, content_type, contents = self.server.service.handle(
+            url.path, query, body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(contents)))
+        self.end_headers()
+        self.wfile.write(contents)
+
+    do_GET = do_POST
+
+    def address_string(self) -> str:
+        """Return the client address; Unix sockets have none."""
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return 'unix'
+
+    def log_message(self, *args) -> None:
+        """Only log requests when the server is verbose."""
+        if self.server.verbose:
+            super().log_message(*args)
+
+
+class _PooledMixIn(socketserver.ThreadingMixIn):
+    """Serve each connection on a fixed size pool of worker threads."""
+
+    executor = None  # type: ThreadPoolExecutor
+    service = None  # type: RenderService
+    verbose = False
+
+    def process_request(self, request, client_address) -> None:
+        self.executor.submit(
+            self.process_request_thread, request, client_address)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+class RenderHTTPServer(_PooledMixIn, HTTPServer):
+    """HTTP server on a local TCP port backed by a RenderService."""
+
+
+class RenderUnixServer(_PooledMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a Unix domain socket backed by a RenderService."""
+
+
+def make_server(  # pylint: disable=too-many-arguments
+        service: Optional[RenderService] = None,
+        host: str = '127.0.0.1',
+        port: int = DEFAULT_PORT,
+        unix_socket: Optional[str] = None,
+        workers: int = 4,
+        verbose: bool = False) -> socketserver.BaseServer:
+    """Return a render server, ready for serve_forever().
+
+    # Args
+    - *service*: RenderService answering requests; a new one with an
+        in-memory RenderCache is created if None.
+    - *host*: address to listen on; defaults to localhost only.
+    - *port*: TCP port to listen on.
+    - *unix_socket*: if given, listen on this Unix domain socket path
+        instead of a TCP port.
+    - *workers*: number of worker threads serving requests.
+    - *verbose*: log every request to standard error.
+
+    # Raises
+    A FileExistsError if unix_socket names an existing path that is not a
+    socket; a stale socket left by an earlier server is removed.
+    """
+    if service is None:
+        service = RenderService(cache=RenderCache())
+    if unix_socket is not None:
+        if os.path.lexists(unix_socket):
+            if not stat.S_ISSOCK(os.lstat(unix_socket).st_mode):
+                raise FileExistsError(
+                    'The unix_socket path: {} exists and is not a '
+                    'socket'.format(unix_socket))
+            os.remove(unix_socket)
+        server = RenderUnixServer(unix_socket, _RequestHandler)
+    else:
+        server = RenderHTTPServer((host, port), _RequestHandler)
+    server.service = service
+    server.verbose = verbose
+    server.executor = ThreadPoolExecutor(max_workers=workers)
+    return server
+
+
+def serve(**kwargs) -> None:
+    """Run a render server until interrupted; see make_server for the
+    arguments."""
+    server = make_server(**kwargs)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
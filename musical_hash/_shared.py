@@ -0,0 +1,136 @@
+"""Multiprocess batch rendering into a shared memory arena."""
+
+
+from typing import Iterable, List, Optional, Tuple
+import multiprocessing
+import numpy
+from ._renderer import HashSource, Renderer
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+
+_WORKER = {}
+
+
+class SharedSamples:
+    """Tunes of a batch of hashes stored back to back in shared memory.
+
+    Indexing returns a zero-copy numpy view of one tune; negative indices
+    count from the end as for a list.  Call close() when done with the views
+    and unlink() once no process needs the block any more; used as a context
+    manager it does both on exit.
+
+    # Attributes
+    - *name*: name of the shared memory block, for other processes to attach.
+    - *buffer*: numpy float64 view of the whole arena.
+    - *offsets*: numpy array of len(self) + 1 sample offsets; tune i spans
+        buffer[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, block, offsets: numpy.ndarray) -> None:
+        self._block = block
+        self.name = block.name
+        self.offsets = offsets
+        self.buffer = numpy.ndarray(
+            (int(offsets[-1]),), dtype=numpy.float64, buffer=block.buf)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> numpy.ndarray:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SharedSamples index out of range')
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def close(self) -> None:
+        """Release this process's mapping of the block; views become
+        invalid."""
+        self.buffer = None
+        self._block.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory block."""
+        self._block.unlink()
+
+    def __enter__(self) -> 'SharedSamples':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.close()
+        self.unlink()
+        return False
+
+
+def _init_worker(config: dict, name: str) -> None:
+    """Create the worker's Renderer and attach it to the arena."""
+    block = shared_memory.SharedMemory(name=name)
+    _WORKER['renderer'] = Renderer(**config)
+    _WORKER['block'] = block
+    _WORKER['buffer'] = numpy.ndarray(
+        (block.size // 8,), dtype=numpy.float64, buffer=block.buf)
+
+
+def _render(task: Tuple[int, List[int]]) -> None:
+    """Synthesize one tune into its slice of the arena."""
+    offset, digits = task
+    renderer = _WORKER['renderer']
+    renderer.synthesize(
+        digits,
+        _WORKER['buffer'][offset:offset + len(digits) * renderer.note_length])
+
+
+def samples_shared(sources: Iterable[HashSource],
+                   renderer: Renderer,
+                   processes: Optional[int] = None,
+                   chunksize: int = 16) -> SharedSamples:
+    """Render the samples of many hashes on a process pool into shared
+    memory.
+
+    Workers write each tune straight into its slice of one shared memory
+    arena, so no audio is pickled between processes; the parent receives
+    zero-copy views.  Requires Python 3.8 or later.
+
+    # Args
+    - *sources*: iterable of MusicalHash objects or raw hashed bytes.
+    - *renderer*: Renderer holding the key, note duration and sample rate;
+        every worker builds an identical one.  If it has a note bank, the
+        workers memory-map the same bank instead of synthesizing notes.
+    - *processes*: number of worker processes; defaults to the CPU count.
+    - *chunksize*: number of tunes sent to a worker at a time.
+
+    # Returns
+    A SharedSamples object whose i-th element equals
+    renderer.samples(sources[i]).
+
+    # Raises
+    A RuntimeError if shared memory is not available in this Python.
+    """
+    if shared_memory is None:
+        raise RuntimeError('Shared memory rendering requires Python 3.8+')
+    digits = [renderer.digits(source) for source in sources]
+    offsets = numpy.zeros(len(digits) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(notes) * renderer.note_length for notes in digits],
+                 out=offsets[1:])
+    block = shared_memory.SharedMemory(
+        create=True, size=max(int(offsets[-1]) * 8, 1))
+    samples = SharedSamples(block, offsets)
+    config = {'key': renderer.key,
+              'note_duration': renderer.note_duration,
+              'sample_rate': renderer.sample_rate,
+              'note_bank': renderer.note_bank}
+    try:
+        with multiprocessing.Pool(processes, _init_worker,
+                                  (config, block.name)) as pool:
+            for _ in pool.imap_unordered(
+                    _render, zip(offsets[:-1].tolist(), digits), chunksize):
+                pass
+    except BaseException:
+        samples.close()
+        samples.unlink()
+        raise
+    return samples
@@ -0,0 +1,118 @@
+"""Vectorized comparison of the note sequences of many hashes."""
+
+
+from typing import Iterable, Tuple, Union
+import numpy
+from ._musical_hash import Key, MusicalHash, _digits, _key_notes
+from ._scales import CHROMATIC_SCALE
+
+
+PADDING = -1
+
+
+def note_indices(sources: Iterable[Union[MusicalHash, bytes, bytearray]],
+                 key: Key = CHROMATIC_SCALE) -> numpy.ndarray:
+    """Return the note sequences of many hashes as one integer array.
+
+    # Args
+    - *sources*: iterable of MusicalHash objects or raw hashed bytes.
+    - *key*: integer (see scale constants) corresponding to the musical key,
+        or a sequence of midi note numbers (see MusicalHash.notes).
+
+    # Returns
+    A two dimensional numpy array of int8 with one row per source.  Entry
+    (i, j) is the index in the key of the j-th note of source i, in the same
+    order as MusicalHash.notes(); rows shorter than the longest sequence are
+    padded with -1.
+
+    # Raises
+    A ValueError if the key is an integer scale mask outside 0x002 to
+    0xfff, or a sequence that is not at least two distinct midi note
+    numbers from 0 to 127.
+    """
+    base = len(_key_notes(key))
+    rows = []
+    for source in sources:
+        if isinstance(source, MusicalHash):
+            source = source.hashed_bytes
+        rows.append(_digits(source, base))
+    width = max((len(row) for row in rows), default=0)
+    indices = numpy.full((len(rows), width), PADDING, dtype=numpy.int8)
+    for i, row in enumerate(rows):
+        indices[i, :len(row)] = row
+    return indices
+
+
+def hamming_distance(query: numpy.ndarray,
+                     corpus: numpy.ndarray) -> numpy.ndarray:
+    """Return the positional Hamming distance between note sequences.
+
+    Positions where only one of two sequences has a note count as
+    differences, so sequences of different lengths are never identical.
+
+    # Args
+    - *query*: one row of note indices (see note_indices).
+    - *corpus*: two dimensional array of note indices.
+
+    # Returns
+    A one dimensional array with the distance from query to each row of
+    corpus.
+    """
+    query, corpus = _align(query, corpus)
+    return numpy.count_nonzero(corpus != query, axis=1)
+
+
+def common_prefix_length(query: numpy.ndarray,
+                         corpus: numpy.ndarray) -> numpy.ndarray:
+    """Return the length of the longest common prefix of note sequences.
+
+    # Args
+    - *query*: one row of note indices (see note_indices).
+    - *corpus*: two dimensional array of note indices.
+
+    # Returns
+    A one dimensional array with the number of leading notes that query
+    shares with each row of corpus.
+    """
+    query, corpus = _align(query, corpus)
+    mismatch = (corpus != query) | (corpus == PADDING)
+    return numpy.where(mismatch.any(axis=1),
+                       mismatch.argmax(axis=1),
+                       corpus.shape[1])
+
+
+def nearest(query: numpy.ndarray,
+            corpus: numpy.ndarray,
+            k: int = 10) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Return the k rows of corpus closest to query by Hamming distance.
+
+    # Args
+    - *query*: one row of note indices (see note_indices).
+    - *corpus*: two dimensional array of note indices.
+    - *k*: number of neighbours to return.
+
+    # Returns
+    A tuple of the row indices of the nearest neighbours and their
+    distances, ordered from nearest to farthest.  Ties are broken by row
+    index.
+    """
+    distances = hamming_distance(query, corpus)
+    indices = numpy.argsort(distances, kind='stable')[:max(k, 0)]
+    return indices, distances[indices]
+
+
+def _align(query: numpy.ndarray,
+           corpus: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Pad query and corpus with PADDING to the same number of columns."""
+    query = numpy.asarray(query).ravel()
+    corpus = numpy.atleast_2d(numpy.asarray(corpus))
+    width = max(query.size, corpus.shape[1])
+    if query.size < width:
+        query = numpy.concatenate(
+            (query, numpy.full(width - query.size, PADDING, query.dtype)))
+    if corpus.shape[1] < width:
+        corpus = numpy.concatenate(
+            (corpus, numpy.full((corpus.shape[0], width - corpus.shape[1]),
+                                PADDING, corpus.dtype)),
+            axis=1)
+    return query, corpus
@@ -0,0 +1,105 @@
+"""Opt-in instrumentation for hashing and rendering."""
+
+
+from typing import Callable, Dict, Optional
+import time
+
+
+StageCallback = Callable[[str, float], None]
+
+
+class _NullStage:
+    """Context manager that does nothing; used when stats are disabled."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+class _Stage:
+    """Context manager that times a single stage for a RenderStats object."""
+
+    def __init__(self, stats: 'RenderStats', name: str) -> None:
+        self.stats = stats
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> bool:
+        self.stats.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class RenderStats:
+    """Collects per-stage wall time and counters for musical hash renders.
+
+    Pass an instance as the *stats* argument of **MusicalHash** or of the
+    module level helper functions to start collecting; when no instance is
+    given nothing is recorded.
+
+    # Args
+    - *callback*: optional Callable taking the stage name and the elapsed
+        time in seconds; it is invoked every time a stage completes, which
+        makes it easy to forward timings to an external metrics pipeline.
+
+    # Attributes
+    - *timings*: dictionary mapping a stage name to its total wall time in
+        seconds.
+    - *calls*: dictionary mapping a stage name to the number of times it ran.
+    - *counters*: dictionary mapping a counter name (e.g. 'bytes_hashed',
+        'notes', 'samples', 'cache_hits') to its accumulated value.
+    """
+
+    def __init__(self, callback: Optional[StageCallback] = None) -> None:
+        self.callback = callback
+        self.timings = {}  # type: Dict[str, float]
+        self.calls = {}  # type: Dict[str, int]
+        self.counters = {}  # type: Dict[str, int]
+
+    def stage(self, name: str) -> _Stage:
+        """Return a context manager that times the stage called name."""
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add one completed run of the stage called name."""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Increase the counter called name by amount."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        """Discard all recorded timings and counters."""
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return a snapshot of all timings, call counts and counters."""
+        return {'timings': dict(self.timings),
+                'calls': dict(self.calls),
+                'counters': dict(self.counters)}
+
+
+def timed(stats: Optional[RenderStats], name: str):
+    """Return a context manager timing stage name, or a no-op if stats is
+    None."""
+    if stats is None:
+        return _NULL_STAGE
+    return stats.stage(name)
+
+
+def count(stats: Optional[RenderStats], name: str, amount: int = 1) -> None:
+    """Increment a counter on stats if stats is not None."""
+    if stats is not None:
+        stats.increment(name, amount)
@@ -0,0 +1,213 @@
+"""Golden corpus of rendered output and a harness to check render engines.
+
+The corpus (golden_corpus.json) records, for a fixed set of inputs, every
+built-in hash method and a set of keys, the digest, the note sequence, a
+checksum of the samples quantized to 16 bits and a checksum of the midi file
+bytes, together with minimum throughput baselines.  Any engine that renders
+hashes (see MusicalHashEngine) can be checked against it with check_engine()
+and check_throughput().
+
+Run this file with --write to regenerate the corpus from the reference
+engine; only do so when a change of output is intended.
+"""
+
+
+from typing import Dict, List, Union
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy
+import musical_hash
+from musical_hash._hashing import BUILTIN_METHODS
+
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'golden_corpus.json')
+
+INPUTS = [b'', b'Hello World', bytes(range(256))]
+KEYS = {
+    'CHROMATIC_SCALE': musical_hash.CHROMATIC_SCALE,
+    'C_MAJOR': musical_hash.C_MAJOR,
+    'A_MINOR_PENTATONIC': musical_hash.A_MINOR_PENTATONIC,
+    'E_FLAT_BLUES_MINOR': musical_hash.E_FLAT_BLUES_MINOR,
+    'TWO_NOTES': 0x5,
+    'CHROMATIC_SCALE_4_OCTAVES': musical_hash.repeat_scale(
+        musical_hash.CHROMATIC_SCALE, 4)}
+NOTE_DURATION = 0.01
+SAMPLE_RATE = 8000
+TICKS_PER_NOTE = 500
+
+Key = Union[int, List[int]]
+
+
+def samples_checksum(samples: numpy.ndarray) -> str:
+    """Return the SHA-256 of samples quantized to 16 bit integers, as they
+    are written to wave files."""
+    quantized = numpy.round(numpy.asarray(samples) * 32767).astype('<i2')
+    return hashlib.sha256(quantized.tobytes()).hexdigest()
+
+
+class MusicalHashEngine:
+    """Reference engine: renders with the MusicalHash methods.
+
+    Other engines implement the same four methods with another code path.
+    """
+
+    name = 'MusicalHash'
+
+    def digest(self, data: bytes, hash_method: str) -> bytes:
+        """Return the digest of data."""
+        return bytes(musical_hash.MusicalHash(data, hash_method).hashed_bytes)
+
+    def notes(self, digest: bytes, hash_method: str, key: Key) -> List[str]:
+        """Return the note names of a digest."""
+        return musical_hash.MusicalHash.from_digest(
+            digest, hash_method).notes(key)
+
+    def samples(self,
+                digest: bytes,
+                hash_method: str,
+                key: Key) -> numpy.ndarray:
+        """Return the samples of a digest."""
+        return musical_hash.MusicalHash.from_digest(
+            digest, hash_method).samples(key, NOTE_DURATION, SAMPLE_RATE)
+
+    def midi(self, digest: bytes, hash_method: str, key: Key) -> bytes:
+        """Return the midi file bytes of a digest."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'golden.mid')
+            musical_hash.MusicalHash.from_digest(digest, hash_method).midi(
+                path, key, TICKS_PER_NOTE)
+            with open(path, 'rb') as file:
+                return file.read()
+
+
+class RendererEngine(MusicalHashEngine):
+    """Engine that renders with one Renderer per key."""
+
+    name = 'Renderer'
+
+    def __init__(self) -> None:
+        self._renderers = {}  # type: Dict[str, musical_hash.Renderer]
+
+    def _renderer(self, key: Key) -> musical_hash.Renderer:
+        """Return the renderer for key."""
+        name = repr(key)
+        if name not in self._renderers:
+            self._renderers[name] = musical_hash.Renderer(
+                key, NOTE_DURATION, SAMPLE_RATE,
+                ticks_per_note=TICKS_PER_NOTE)
+        return self._renderers[name]
+
+    def notes(self, digest: bytes, hash_method: str, key: Key) -> List[str]:
+        return self._renderer(key).notes(digest)
+
+    def samples(self,
+                digest: bytes,
+                hash_method: str,
+                key: Key) -> numpy.ndarray:
+        return self._renderer(key).samples(digest)
+
+    def midi(self, digest: bytes, hash_method: str, key: Key) -> bytes:
+        return self._renderer(key).midi_bytes(digest)
+
+
+def build_corpus(engine: MusicalHashEngine) -> Dict:
+    """Render every input, hash method and key with engine."""
+    entries = []
+    for hash_method in sorted(BUILTIN_METHODS):
+        for data in INPUTS:
+            digest = engine.digest(data, hash_method)
+            for key_name, key in sorted(KEYS.items()):
+                entries.append({
+                    'hash_method': hash_method,
+                    'data': data.hex(),
+                    'digest': digest.hex(),
+                    'key_name': key_name,
+                    'key': key,
+                    'notes': ' '.join(engine.notes(digest, hash_method, key)),
+                    'samples_sha256': samples_checksum(
+                        engine.samples(digest, hash_method, key)),
+                    'midi_sha256': hashlib.sha256(
+                        engine.midi(digest, hash_method, key)).hexdigest()})
+    return {'note_duration': NOTE_DURATION,
+            'sample_rate': SAMPLE_RATE,
+            'ticks_per_note': TICKS_PER_NOTE,
+            'entries': entries}
+
+
+def load_corpus(path: str = CORPUS_PATH) -> Dict:
+    """Load the golden corpus."""
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def check_engine(engine: MusicalHashEngine, corpus: Dict) -> List[str]:
+    """Return a description of every difference between the output of
+    engine and the corpus; an empty list means the engine is equivalent."""
+    failures = []
+    for entry in corpus['entries']:
+        label = '{} {} {} {}'.format(engine.name, entry['hash_method'],
+                                     entry['data'][:16], entry['key_name'])
+        hash_method, key = entry['hash_method'], entry['key']
+        digest = engine.digest(bytes.fromhex(entry['data']), hash_method)
+        if digest.hex() != entry['digest']:
+            failures.append('{}: digest differs'.format(label))
+            continue
+        if ' '.join(engine.notes(digest, hash_method, key)) != entry['notes']:
+            failures.append('{}: notes differ'.format(label))
+        if (samples_checksum(engine.samples(digest, hash_method, key)) !=
+                entry['samples_sha256']):
+            failures.append('{}: samples differ'.format(label))
+        if (hashlib.sha256(engine.midi(digest, hash_method, key))
+                .hexdigest() != entry['midi_sha256']):
+            failures.append('{}: midi differs'.format(label))
+    return failures
+
+
+def measure_throughput(engine: MusicalHashEngine,
+                       repeat: int = 3) -> Dict[str, float]:
+    """Return the best of repeat measurements of the notes, samples and
+    midi throughput of engine, in notes per second, on sha512 digests in
+    the chromatic scale."""
+    digests = [engine.digest(bytes([i]) * i, 'sha512') for i in range(64)]
+    key = musical_hash.CHROMATIC_SCALE
+    notes = sum(len(engine.notes(digest, 'sha512', key))
+                for digest in digests)
+    rates = {}
+    for stage in ('notes', 'samples', 'midi'):
+        render = getattr(engine, stage)
+        best = 0.0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for digest in digests:
+                render(digest, 'sha512', key)
+            best = max(best, notes / (time.perf_counter() - start))
+        rates[stage] = best
+    return rates
+
+
+def check_throughput(engine: MusicalHashEngine, corpus: Dict) -> List[str]:
+    """Return a description of every stage of engine that is slower than
+    its baseline in the corpus, in notes per second.  Baselines are stored
+    per engine name and set well below typical rates, so that only real
+    regressions fail."""
+    baselines = corpus['baselines'].get(engine.name, {})
+    rates = measure_throughput(engine)
+    return ['{} {}: {:.0f} notes/s is below the baseline of {:.0f}'.format(
+        engine.name, stage, rates[stage], baseline)
+            for stage, baseline in sorted(baselines.items())
+            if rates[stage] < baseline]
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['--write']:
+        sys.exit('usage: python test/golden.py --write')
+    CORPUS = build_corpus(MusicalHashEngine())
+    CORPUS['baselines'] = load_corpus()['baselines'] if os.path.isfile(
+        CORPUS_PATH) else {}
+    with open(CORPUS_PATH, 'w', encoding='utf-8') as output:
+        json.dump(CORPUS, output, indent=1, sort_keys=True)
+        output.write('\n')
@@ -0,0 +1,82 @@
+"""Unit test cases for the _archive module."""
+
+
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+import musical_hash
+
+
+class _Unseekable(io.RawIOBase):
+    """Write-only stream that, like a pipe, cannot seek or tell."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.data = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.data.extend(data)
+        return len(data)
+
+
+class TestArchiveWriter(unittest.TestCase):
+    """Test case for the ArchiveWriter class."""
+
+    def setUp(self) -> None:
+        """Construct a MusicalHash object and a renderer for this test."""
+        self.hash = musical_hash.MusicalHash(b'Hello World', 'md5')
+        self.renderer = musical_hash.Renderer(
+            note_duration=0.01, sample_rate=1000)
+
+    def test_tar_file(self) -> None:
+        """Test writing a tar archive to a path."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.tar')
+            with musical_hash.ArchiveWriter(path) as archive:
+                archive.add_wave('hash.wav', self.hash, self.renderer)
+                archive.add_midi('hash.mid', self.hash, self.renderer)
+            with tarfile.open(path) as archive:
+                self.assertEqual(archive.getnames(), ['hash.wav', 'hash.mid'])
+                self.assertEqual(
+                    archive.extractfile('hash.wav').read(),
+                    self.renderer.wave_bytes(self.hash))
+
+    def test_compressed_tar_stream(self) -> None:
+        """Test streaming a compressed tar archive to an unseekable file."""
+        stream = _Unseekable()
+        with musical_hash.ArchiveWriter(stream, 'tar.gz') as archive:
+            archive.add_midi('hash.mid', self.hash, self.renderer)
+        with tarfile.open(fileobj=io.BytesIO(stream.data)) as archive:
+            self.assertEqual(
+                archive.extractfile('hash.mid').read(),
+                self.renderer.midi_bytes(self.hash))
+
+    def test_zip_stream(self) -> None:
+        """Test streaming a zip archive to an unseekable file."""
+        stream = _Unseekable()
+        with musical_hash.ArchiveWriter(stream, 'zip') as archive:
+            archive.add_wave('hash.wav', self.hash, self.renderer)
+        with zipfile.ZipFile(io.BytesIO(stream.data)) as archive:
+            self.assertEqual(
+                archive.read('hash.wav'),
+                self.renderer.wave_bytes(self.hash))
+
+    def test_invalid_format(self) -> None:
+        """Test with an unsupported archive format."""
+        with self.assertRaises(ValueError):
+            musical_hash.ArchiveWriter(io.BytesIO(), 'rar')
+
+    def test_empty_filename(self) -> None:
+        """Test with an empty filename."""
+        with self.assertRaises(FileNotFoundError):
+            musical_hash.ArchiveWriter('')
+
+
+if __name__ == '__main__':
+    unittest.main()
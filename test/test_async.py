@@ -0,0 +1,73 @@
+"""Unit test cases for the _async module."""
+
+
+import asyncio
+import os
+import unittest
+import numpy
+import musical_hash
+
+
+class TestAsync(unittest.TestCase):
+    """Test case for the asyncio rendering API."""
+
+    def setUp(self) -> None:
+        """Create an event loop, a hash and a renderer."""
+        self.loop = asyncio.new_event_loop()
+        self.hash = musical_hash.MusicalHash(b'Hello World', 'sha512')
+        self.renderer = musical_hash.Renderer(
+            note_duration=0.01, sample_rate=1000)
+
+    def run_async(self, coroutine):
+        """Run coroutine to completion on the test loop."""
+        return self.loop.run_until_complete(coroutine)
+
+    def test_hash_async(self) -> None:
+        """Test hashing in an executor."""
+        hash_object = self.run_async(
+            musical_hash.hash_async(b'Hello World', 'sha512'))
+        self.assertEqual(hash_object.hashed_bytes, self.hash.hashed_bytes)
+
+    def test_samples_async(self) -> None:
+        """Test that chunked synthesis matches Renderer.samples."""
+        numpy.testing.assert_array_equal(
+            self.run_async(musical_hash.samples_async(
+                self.hash, self.renderer, chunk_notes=7)),
+            self.renderer.samples(self.hash))
+        with self.assertRaises(ValueError):
+            self.run_async(musical_hash.samples_async(
+                self.hash, self.renderer, chunk_notes=0))
+
+    def test_wave_and_midi_async(self) -> None:
+        """Test that the written files match the synchronous methods."""
+        self.run_async(musical_hash.wave_async(
+            'async.wav', self.hash, self.renderer))
+        self.run_async(musical_hash.midi_async(
+            'async.mid', self.hash, self.renderer))
+        with open('async.wav', 'rb') as file:
+            self.assertEqual(file.read(), self.renderer.wave_bytes(self.hash))
+        with open('async.mid', 'rb') as file:
+            self.assertEqual(file.read(), self.renderer.midi_bytes(self.hash))
+
+    def test_timeout_stops_between_notes(self) -> None:
+        """Test that a timeout stops synthesis and writes nothing."""
+        stats = musical_hash.RenderStats()
+        renderer = musical_hash.Renderer(
+            note_duration=0.1, sample_rate=8000, stats=stats)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.run_async(musical_hash.wave_async(
+                'async.wav', bytes(range(256)) * 8, renderer,
+                timeout=0.01, chunk_notes=1))
+        self.assertFalse(os.path.isfile('async.wav'))
+        self.assertNotIn('samples', stats.counters)
+
+    def tearDown(self) -> None:
+        """Close the loop and clean up any created files."""
+        self.loop.close()
+        for file in ('async.wav', 'async.mid'):
+            if os.path.isfile(file):
+                os.remove(file)
+
+
+if __name__ == '__main__':
+    unittest.main()
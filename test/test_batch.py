@@ -0,0 +1,139 @@
+"""Unit test cases for the _batch module."""
+
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from unittest import mock
+import mido
+import musical_hash
+
+
+class TestBatch(unittest.TestCase):
+    """Test case for batch rendering with deduplication."""
+
+    def setUp(self) -> None:
+        """Create hashes with duplicated digests and a renderer."""
+        self.directory = tempfile.mkdtemp()
+        self.hashes = [musical_hash.MusicalHash(data, 'crc32')
+                       for data in (b'a', b'b', b'a', b'a')]
+        self.stats = musical_hash.RenderStats()
+        self.renderer = musical_hash.Renderer(
+            note_duration=0.01, sample_rate=1000, stats=self.stats)
+
+    def paths(self, extension: str):
+        """Return one output path per hash."""
+        return [os.path.join(self.directory, '{}.{}'.format(i, extension))
+                for i in range(len(self.hashes))]
+
+    def test_wave_batch(self) -> None:
+        """Test that each unique digest is synthesized once."""
+        paths = self.paths('wav')
+        self.assertEqual(
+            musical_hash.wave_batch(zip(self.hashes, paths), self.renderer),
+            2)
+        self.assertEqual(self.stats.calls['pitches_to_tune'], 2)
+        self.assertTrue(os.path.samefile(paths[0], paths[2]))
+        self.assertTrue(os.path.samefile(paths[0], paths[3]))
+        self.hashes[1].wave(os.path.join(self.directory, 'b.wav'),
+                            note_duration=0.01, sample_rate=1000)
+        with open(paths[1], 'rb') as batch, \
+                open(os.path.join(self.directory, 'b.wav'), 'rb') as single:
+            self.assertEqual(batch.read(), single.read())
+
+    def test_rerun_over_linked_outputs(self) -> None:
+        """Test that a later batch does not write through earlier links."""
+        first, second = self.paths('wav')[:2]
+        musical_hash.wave_batch([(self.hashes[0], first),
+                                 (self.hashes[0], second)], self.renderer)
+        self.assertTrue(os.path.samefile(first, second))
+        for link in (True, False):
+            musical_hash.wave_batch([(self.hashes[1], first)], self.renderer,
+                                    link)
+            with open(first, 'rb') as file:
+                self.assertEqual(file.read(),
+                                 self.renderer.wave_bytes(self.hashes[1]))
+            with open(second, 'rb') as file:
+                self.assertEqual(file.read(),
+                                 self.renderer.wave_bytes(self.hashes[0]))
+
+    def test_midi_batch_without_links(self) -> None:
+        """Test that copies are written when linking is disabled."""
+        paths = self.paths('mid')
+        musical_hash.midi_batch(zip(self.hashes, paths), self.renderer,
+                                link=False)
+        self.assertFalse(os.path.samefile(paths[0], paths[2]))
+        with open(paths[0], 'rb') as first, open(paths[2], 'rb') as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_samples_batch(self) -> None:
+        """Test that duplicated digests share one array."""
+        tunes = musical_hash.samples_batch(self.hashes, self.renderer)
+        self.assertIs(tunes[0], tunes[2])
+        self.assertIsNot(tunes[0], tunes[1])
+        self.assertFalse(tunes[0].flags.writeable)
+
+    def test_empty_filename(self) -> None:
+        """Test with an empty filename."""
+        with self.assertRaises(FileNotFoundError):
+            musical_hash.wave_batch([(self.hashes[0], '')], self.renderer)
+
+    def test_midi_multitrack(self) -> None:
+        """Test writing all hashes as named tracks of one midi file."""
+        path = os.path.join(self.directory, 'all.mid')
+        names = ['artifact-{}'.format(i) for i in range(len(self.hashes))]
+        self.assertEqual(
+            musical_hash.midi_multitrack(
+                zip(names, self.hashes), path, self.renderer),
+            [path])
+        midi_file = mido.MidiFile(path)
+        self.assertEqual(midi_file.type, 2)
+        self.assertEqual([track.name for track in midi_file.tracks], names)
+        for track, hash_object in zip(midi_file.tracks, self.hashes):
+            self.assertEqual(
+                [str(message) for message in track[1:-1]],
+                [str(message) for message in
+                 self.renderer.midi_track(hash_object)])
+
+    def test_midi_multitrack_split(self) -> None:
+        """Test splitting the tracks over files of bounded size."""
+        path = os.path.join(self.directory, 'part{}.mid')
+        paths = musical_hash.midi_multitrack(
+            [(str(i), hash_object)
+             for i, hash_object in enumerate(self.hashes)],
+            path, self.renderer, max_tracks=3)
+        self.assertEqual(paths, [path.format(0), path.format(1)])
+        self.assertEqual(
+            [len(mido.MidiFile(part).tracks) for part in paths], [3, 1])
+        with self.assertRaises(ValueError):
+            musical_hash.midi_multitrack([], 'all.mid', self.renderer,
+                                         max_tracks=3)
+
+    def test_midi_multitrack_track_limit(self) -> None:
+        """Test track counts above 32767 and the limit of 65535 tracks."""
+        renderer = musical_hash.Renderer(ticks_per_note=1)
+        path = os.path.join(self.directory, 'many.mid')
+        musical_hash.midi_multitrack(
+            ((str(i), b'\x01') for i in range(33000)), path, renderer)
+        with open(path, 'rb') as file:
+            self.assertEqual(struct.unpack('>4sLHHH', file.read(14)),
+                             (b'MThd', 6, 2, 33000, 480))
+        with mock.patch('musical_hash._batch.MIDI_MAX_TRACKS', 3):
+            with self.assertRaises(ValueError):
+                musical_hash.midi_multitrack(
+                    zip('abcd', self.hashes), path, renderer)
+            self.assertFalse(os.path.exists(path))
+        with self.assertRaises(ValueError):
+            musical_hash.midi_multitrack(
+                [], os.path.join(self.directory, '{}.mid'), renderer,
+                max_tracks=65536)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
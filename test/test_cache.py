@@ -0,0 +1,133 @@
+"""Unit test cases for the _cache module."""
+
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy
+import musical_hash
+from musical_hash._cache import make_key
+
+
+class TestRenderCache(unittest.TestCase):
+    """Test case for the RenderCache class."""
+
+    def setUp(self) -> None:
+        """Create a temporary directory for the disk tier."""
+        self.directory = tempfile.mkdtemp()
+
+    def test_memory_lru(self) -> None:
+        """Test that the least recently used entry is evicted first."""
+        cache = musical_hash.RenderCache(max_items=2)
+        keys = [make_key(bytes([i]), 0xfff, 0.5, 44100, 'wav')
+                for i in range(3)]
+        cache.put(keys[0], b'0')
+        cache.put(keys[1], b'1')
+        self.assertEqual(cache.get(keys[0]), b'0')
+        cache.put(keys[2], b'2')
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[0]), b'0')
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_memory_bytes(self) -> None:
+        """Test that the memory tier is kept under its byte cap."""
+        cache = musical_hash.RenderCache(max_memory_bytes=25)
+        keys = [make_key(bytes([i]), 0xfff, 0.5, 44100, 'npy')
+                for i in range(4)]
+        for key in keys[:3]:
+            cache.put(key, b'x' * 10)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[2]), b'x' * 10)
+        cache.put(keys[1], b'y' * 5)
+        cache.put(keys[3], b'z' * 30)
+        self.assertIsNone(cache.get(keys[3]))
+        self.assertEqual(cache.get(keys[1]), b'y' * 5)
+        self.assertEqual(cache.get(keys[2]), b'x' * 10)
+
+    def test_concurrent(self) -> None:
+        """Test that threads can share a small cache."""
+        cache = musical_hash.RenderCache(
+            max_items=2, directory=self.directory, max_disk_bytes=40)
+        keys = [make_key(bytes([i]), 0xfff, 0.5, 8000, 'wav')
+                for i in range(8)]
+        errors = []
+
+        def work(offset: int) -> None:
+            try:
+                for i in range(2000):
+                    key = keys[(i + offset) % len(keys)]
+                    value = cache.get(key)
+                    if value is None:
+                        cache.put(key, key[0] * 10)
+                    else:
+                        self.assertEqual(value, key[0] * 10)
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(cache.hits + cache.misses, 8000)
+        self.assertLessEqual(
+            len(cache._memory), 2)  # pylint: disable=protected-access
+
+    def test_disk_tier(self) -> None:
+        """Test that entries survive in the disk tier."""
+        key = make_key(b'A', 0xfff, 500, None, 'midi:1')
+        musical_hash.RenderCache(directory=self.directory).put(key, b'data')
+        cache = musical_hash.RenderCache(directory=self.directory)
+        self.assertEqual(cache.get(key), b'data')
+
+    def test_disk_eviction(self) -> None:
+        """Test that the disk tier is kept under its size cap."""
+        cache = musical_hash.RenderCache(
+            max_items=0, directory=self.directory, max_disk_bytes=25)
+        for i in range(5):
+            cache.put(make_key(bytes([i]), 0xfff, 0.5, 8000, 'wav'),
+                      b'x' * 10)
+        total = sum(os.path.getsize(os.path.join(self.directory, name))
+                    for name in os.listdir(self.directory))
+        self.assertLessEqual(total, 25)
+
+    def test_musical_hash_samples(self) -> None:
+        """Test that MusicalHash.samples is served from the cache."""
+        stats = musical_hash.RenderStats()
+        cache = musical_hash.RenderCache()
+        hash_object = musical_hash.MusicalHash(
+            b'Hello World', 'md5', stats, cache)
+        first = hash_object.samples(note_duration=0.01, sample_rate=1000)
+        second = hash_object.samples(note_duration=0.01, sample_rate=1000)
+        numpy.testing.assert_array_equal(first, second)
+        self.assertEqual(stats.counters['cache_hits'], 1)
+        self.assertEqual(stats.calls['pitches_to_tune'], 1)
+
+    def test_shared_between_hash_and_renderer(self) -> None:
+        """Test that MusicalHash and Renderer share cache entries."""
+        cache = musical_hash.RenderCache(directory=self.directory)
+        hash_object = musical_hash.MusicalHash(
+            b'Hello World', 'md5', cache=cache)
+        path = os.path.join(self.directory, 'out')
+        hash_object.wave(path + '.wav', note_duration=0.01, sample_rate=1000)
+        hash_object.midi(path + '.mid')
+        renderer = musical_hash.Renderer(note_duration=0.01, sample_rate=1000,
+                                         cache=cache)
+        hits = cache.hits
+        with open(path + '.wav', 'rb') as file:
+            self.assertEqual(renderer.wave_bytes(hash_object), file.read())
+        with open(path + '.mid', 'rb') as file:
+            self.assertEqual(renderer.midi_bytes(hash_object), file.read())
+        self.assertEqual(cache.hits, hits + 2)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
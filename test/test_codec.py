@@ -0,0 +1,88 @@
+"""Unit test cases for the _codec module."""
+
+
+import os
+import struct
+import unittest
+import numpy
+import musical_hash
+from musical_hash._codec import alaw_encode, decode, mulaw_encode
+
+
+class TestCompanding(unittest.TestCase):
+    """Test case for the G.711 encoders."""
+
+    def setUp(self) -> None:
+        """Create a ramp of samples covering the full range."""
+        self.samples = numpy.linspace(-1, 1, 10001)
+
+    def test_known_codes(self) -> None:
+        """Test the codes of silence and of both extremes."""
+        numpy.testing.assert_array_equal(
+            mulaw_encode(numpy.array([0.0, 1.0, -1.0])), [0xff, 0x80, 0x00])
+        numpy.testing.assert_array_equal(
+            alaw_encode(numpy.array([0.0, 1.0, -1.0])), [0xd5, 0xaa, 0x2a])
+
+    def test_round_trip(self) -> None:
+        """Test that decoding stays within the companding error."""
+        for encoding, encode in (('mulaw', mulaw_encode),
+                                 ('alaw', alaw_encode)):
+            decoded = decode(encode(self.samples), encoding)
+            self.assertLess(
+                numpy.max(numpy.abs(decoded - self.samples)), 0.035)
+            self.assertTrue(numpy.all(numpy.diff(decoded) >= 0))
+
+
+class TestCompactWave(unittest.TestCase):
+    """Test the compact wave profile of MusicalHash.wave."""
+
+    def setUp(self) -> None:
+        """Construct a MusicalHash object for this test."""
+        self.hash = musical_hash.MusicalHash(b'Hello World', 'md5')
+
+    def test_mulaw_file(self) -> None:
+        """Test the header and contents of a mu-law wave file."""
+        self.hash.wave('compact.wav', note_duration=0.1,
+                       sample_rate=musical_hash.COMPACT_SAMPLE_RATE,
+                       encoding='mulaw')
+        with open('compact.wav', 'rb') as file:
+            contents = file.read()
+        samples = self.hash.samples(note_duration=0.1, sample_rate=8000)
+        self.assertEqual(contents[:4], b'RIFF')
+        self.assertEqual(contents[8:12], b'WAVE')
+        self.assertEqual(
+            struct.unpack('<HHIIHH', contents[20:36]),
+            (7, 1, 8000, 8000, 1, 8))
+        data_start = contents.index(b'data') + 8
+        self.assertEqual(
+            struct.unpack('<I', contents[data_start - 4:data_start])[0],
+            samples.size)
+        numpy.testing.assert_array_equal(
+            numpy.frombuffer(contents[data_start:data_start + samples.size],
+                             dtype=numpy.uint8),
+            mulaw_encode(samples))
+
+    def test_alaw_renderer(self) -> None:
+        """Test that a Renderer writes the same A-law file."""
+        self.hash.wave('compact.wav', note_duration=0.1, sample_rate=8000,
+                       encoding='alaw')
+        renderer = musical_hash.Renderer(
+            note_duration=0.1, sample_rate=8000, encoding='alaw')
+        with open('compact.wav', 'rb') as file:
+            self.assertEqual(file.read(), renderer.wave_bytes(self.hash))
+
+    def test_invalid_encoding(self) -> None:
+        """Test with an unsupported encoding."""
+        with self.assertRaises(ValueError):
+            self.hash.wave('compact.wav', encoding='mp3')
+        with self.assertRaises(ValueError):
+            musical_hash.Renderer(encoding='mp3')
+
+    def tearDown(self) -> None:
+        """Clean up any created files."""
+        if os.path.isfile('compact.wav'):
+            os.remove('compact.wav')
+
+
+if __name__ == '__main__':
+    unittest.main()
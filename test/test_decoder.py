@@ -0,0 +1,102 @@
+"""Unit test cases for the _decoder module."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+import musical_hash
+
+
+class TestWaveDecoder(unittest.TestCase):
+    """Test case for the WaveDecoder class."""
+
+    def setUp(self) -> None:
+        """Construct hashes of a few inputs."""
+        self.hashes = [musical_hash.MusicalHash(data, 'sha256')
+                       for data in (b'alpha', b'beta', b'\x00' * 40)]
+
+    def test_round_trip(self) -> None:
+        """Test decoding wave files in several keys and hash methods."""
+        for key in (musical_hash.CHROMATIC_SCALE, musical_hash.C_MAJOR, 0x5,
+                    musical_hash.repeat_scale(musical_hash.C_MAJOR, 3)):
+            renderer = musical_hash.Renderer(key, 0.02, 16000)
+            decoder = musical_hash.WaveDecoder(key, 0.02, 16000, 'sha256')
+            for source in self.hashes:
+                self.assertEqual(decoder.decode(renderer.wave_bytes(source)),
+                                 source.hashed_bytes)
+        crc = musical_hash.MusicalHash(b'Hello World', 'crc32')
+        self.assertEqual(
+            musical_hash.WaveDecoder(note_duration=0.01, sample_rate=8000,
+                                     hash_method='crc32').decode_samples(
+                                         crc.samples(note_duration=0.01,
+                                                     sample_rate=8000)),
+            crc.hashed_bytes)
+
+    def test_companded(self) -> None:
+        """Test decoding mu-law and A-law files at 8000 Hz."""
+        decoder = musical_hash.WaveDecoder(
+            note_duration=0.01, sample_rate=8000, hash_method='sha256')
+        for encoding in ('mulaw', 'alaw'):
+            renderer = musical_hash.Renderer(
+                note_duration=0.01, sample_rate=8000, encoding=encoding)
+            self.assertEqual(decoder.decode(renderer.wave_bytes(
+                self.hashes[0])), self.hashes[0].hashed_bytes)
+
+    def test_digest_size(self) -> None:
+        """Test that trailing zero bytes need the hash method."""
+        digest = b'\x01' + b'\x00' * 31
+        samples = musical_hash.Renderer(
+            note_duration=0.01, sample_rate=8000).samples(digest)
+        self.assertEqual(
+            musical_hash.WaveDecoder(note_duration=0.01, sample_rate=8000)
+            .decode_samples(samples),
+            b'\x01')
+        self.assertEqual(
+            musical_hash.WaveDecoder(note_duration=0.01, sample_rate=8000,
+                                     hash_method='sha256')
+            .decode_samples(samples),
+            digest)
+        with self.assertRaises(ValueError):
+            musical_hash.WaveDecoder(
+                note_duration=0.01, sample_rate=8000, hash_method='crc32'
+            ).decode_samples(musical_hash.Renderer(
+                note_duration=0.01, sample_rate=8000).samples(b'\xff' * 8))
+
+    def test_mismatches(self) -> None:
+        """Test a wrong sample rate, a partial note and a non wave file."""
+        decoder = musical_hash.WaveDecoder(note_duration=0.01,
+                                           sample_rate=8000)
+        wave = musical_hash.Renderer(note_duration=0.01,
+                                     sample_rate=16000).wave_bytes(b'abc')
+        for contents in (wave, b'RIFF\x00\x00\x00\x00WAVX'):
+            with self.assertRaises(ValueError):
+                decoder.decode(contents)
+        with self.assertRaises(ValueError):
+            decoder.decode_samples([0.0] * 81)
+
+    def test_directory(self) -> None:
+        """Test decoding a directory of files."""
+        directory = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(directory, 'sub'))
+            renderer = musical_hash.Renderer(note_duration=0.01,
+                                             sample_rate=8000)
+            items = [(self.hashes[0], os.path.join(directory, 'a.wav')),
+                     (self.hashes[1],
+                      os.path.join(directory, 'sub', 'b.wav'))]
+            musical_hash.wave_batch(items, renderer)
+            with open(os.path.join(directory, 'notes.txt'), 'wb'):
+                pass
+            decoded = musical_hash.WaveDecoder(
+                note_duration=0.01, sample_rate=8000,
+                hash_method='sha256').decode_directory(directory, workers=2)
+            self.assertEqual(list(decoded.items()),
+                             [('a.wav', self.hashes[0].hashed_bytes),
+                              ('sub/b.wav', self.hashes[1].hashed_bytes)])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
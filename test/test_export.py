@@ -0,0 +1,93 @@
+"""Unit test cases for the _export module."""
+
+
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+import musical_hash
+from musical_hash._export import batch_digits
+from musical_hash._musical_hash import change_base
+
+
+class TestExportNotes(unittest.TestCase):
+    """Test case for the export_notes function."""
+
+    def setUp(self) -> None:
+        """Construct hashes of a few inputs."""
+        self.hashes = [musical_hash.MusicalHash(bytes([i]) * i, 'sha512')
+                       for i in range(20)]
+
+    def test_batch_digits(self) -> None:
+        """Test batch conversion against change_base for several bases and
+        digests of differing lengths."""
+        generator = random.Random(0)
+        digests = [bytes(generator.randrange(256) for _ in range(length))
+                   for length in (0, 1, 3, 4, 5, 16, 20, 64) * 4]
+        digests += [b'\x00' * 8, b'\x01', b'\xff' * 33]
+        for base in (2, 3, 5, 12, 36, 100, 128):
+            digits, counts = batch_digits(digests, base)
+            for digest, row, count in zip(digests, digits, counts):
+                self.assertEqual(
+                    row[:count].tolist(),
+                    change_base(int.from_bytes(digest, 'little'), base))
+                self.assertFalse(row[count:].any())
+
+    def test_jsonl(self) -> None:
+        """Test JSONL rows against MusicalHash.notes."""
+        for key in (musical_hash.CHROMATIC_SCALE, musical_hash.C_MAJOR,
+                    musical_hash.repeat_scale(musical_hash.C_MAJOR, 3)):
+            for sharps in (True, False):
+                output = io.BytesIO()
+                self.assertEqual(musical_hash.export_notes(
+                    self.hashes, output, key, sharps, chunk_rows=7), 20)
+                rows = [json.loads(line) for line in
+                        output.getvalue().decode('utf-8').splitlines()]
+                self.assertEqual(
+                    rows,
+                    [{'digest': source.hashed_bytes.hex(),
+                      'notes': source.notes(key, sharps)}
+                     for source in self.hashes])
+
+    def test_csv(self) -> None:
+        """Test CSV output, including note names that contain commas."""
+        key = [45, 57, 69, 81]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notes.csv')
+            musical_hash.export_notes(self.hashes, path, key, fmt='csv')
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                rows = list(csv.reader(file))
+        self.assertEqual(rows[0], ['digest', 'notes'])
+        self.assertEqual(rows[1:], [[source.hashed_bytes.hex(),
+                                     ' '.join(source.notes(key))]
+                                    for source in self.hashes])
+
+    def test_inputs(self) -> None:
+        """Test hex digests, raw digests and data hashed on the fly."""
+        expected = io.BytesIO()
+        musical_hash.export_notes(self.hashes, expected)
+        for items, hash_method in (
+                ([source.hashed_bytes.hex() for source in self.hashes], None),
+                ([bytes(source.hashed_bytes) for source in self.hashes],
+                 None),
+                ((bytes([i]) * i for i in range(20)), 'sha512')):
+            output = io.BytesIO()
+            musical_hash.export_notes(items, output, hash_method=hash_method)
+            self.assertEqual(output.getvalue(), expected.getvalue())
+
+    def test_invalid(self) -> None:
+        """Test invalid formats, chunk sizes and keys."""
+        with self.assertRaises(ValueError):
+            musical_hash.export_notes(self.hashes, io.BytesIO(), fmt='xml')
+        with self.assertRaises(ValueError):
+            musical_hash.export_notes(self.hashes, io.BytesIO(),
+                                      chunk_rows=0)
+        with self.assertRaises(ValueError):
+            musical_hash.export_notes(self.hashes, io.BytesIO(), key=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
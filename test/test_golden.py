@@ -0,0 +1,100 @@
+"""Golden corpus equivalence and throughput regression tests."""
+
+
+import tempfile
+import unittest
+import numpy
+import musical_hash
+from . import golden
+
+
+class FlatEngine(golden.RendererEngine):
+    """Engine whose notes differ from the corpus, to test the harness."""
+
+    name = 'Flat'
+
+    def notes(self, digest, hash_method, key):
+        return [note.replace('#', 'b') for note in
+                super().notes(digest, hash_method, key)]
+
+
+class ThreadedEngine(golden.MusicalHashEngine):
+    """Engine that synthesizes samples on several threads."""
+
+    name = 'Threaded'
+
+    def samples(self, digest, hash_method, key):
+        return musical_hash.MusicalHash.from_digest(
+            digest, hash_method).samples(
+                key, golden.NOTE_DURATION, golden.SAMPLE_RATE, threads=3)
+
+
+class ThreadedRendererEngine(golden.RendererEngine):
+    """Renderer engine that synthesizes samples on several threads."""
+
+    name = 'ThreadedRenderer'
+
+    def samples(self, digest, hash_method, key):
+        return self._renderer(key).samples(digest, threads=3)
+
+
+class NoteBankRendererEngine(golden.RendererEngine):
+    """Renderer engine that memory-maps its notes from a note bank."""
+
+    name = 'NoteBankRenderer'
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = directory
+
+    def _renderer(self, key):
+        name = repr(key)
+        if name not in self._renderers:
+            self._renderers[name] = musical_hash.Renderer(
+                key, golden.NOTE_DURATION, golden.SAMPLE_RATE,
+                ticks_per_note=golden.TICKS_PER_NOTE,
+                note_bank=self.directory)
+        return self._renderers[name]
+
+
+class TestGoldenCorpus(unittest.TestCase):
+    """Check every render engine against the golden corpus."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Load the corpus once."""
+        cls.corpus = golden.load_corpus()
+
+    def test_corpus_coverage(self) -> None:
+        """Test that the corpus covers every built-in hash method."""
+        self.assertEqual(
+            {entry['hash_method'] for entry in self.corpus['entries']},
+            set(golden.BUILTIN_METHODS))
+
+    def test_engines(self) -> None:
+        """Test that every engine reproduces the corpus exactly."""
+        for engine in (golden.MusicalHashEngine(), golden.RendererEngine(),
+                       ThreadedEngine(), ThreadedRendererEngine()):
+            self.assertEqual(golden.check_engine(engine, self.corpus), [])
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(golden.check_engine(
+                NoteBankRendererEngine(directory), self.corpus), [])
+
+    def test_harness_detects_changes(self) -> None:
+        """Test that a changed engine is reported."""
+        failures = golden.check_engine(FlatEngine(), self.corpus)
+        self.assertTrue(failures)
+        self.assertTrue(all(failure.endswith('notes differ')
+                            for failure in failures))
+        self.assertNotEqual(
+            golden.samples_checksum(numpy.zeros(4)),
+            golden.samples_checksum(numpy.full(4, 1e-3)))
+
+    def test_throughput(self) -> None:
+        """Test that no engine is slower than its baselines."""
+        for engine in (golden.MusicalHashEngine(), golden.RendererEngine()):
+            self.assertEqual(golden.check_throughput(engine, self.corpus), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+"""Unit test cases for the _hashing module."""
+
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+import numpy
+import musical_hash
+from musical_hash._hashing import TREE_LEAF_SIZE, hash_file
+
+
+class TestHashFile(unittest.TestCase):
+    """Test case for chunked file hashing."""
+
+    def test_chunked_reads(self) -> None:
+        """Test that chunked hashing matches hashing the whole contents."""
+        data = os.urandom(10000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data')
+            with open(path, 'wb') as file:
+                file.write(data)
+            for method in ('md5', 'blake2s', 'crc32', 'adler32'):
+                self.assertEqual(
+                    hash_file(path, method, 333),
+                    musical_hash.MusicalHash(data, method).hashed_bytes)
+            self.assertEqual(
+                hash_file(path, 'crc32', 333),
+                zlib.crc32(data).to_bytes(4, 'little'))
+
+
+class TestBlake2Tree(unittest.TestCase):
+    """Test case for the BLAKE2 tree hash methods."""
+
+    def setUp(self) -> None:
+        """Write a file of a few leaves."""
+        self.data = os.urandom(3 * TREE_LEAF_SIZE + 100)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'image')
+        with open(self.path, 'wb') as file:
+            file.write(self.data)
+
+    def test_tree_structure(self) -> None:
+        """Test the documented leaf and root node parameters."""
+        def node(data, offset, depth, last):
+            return hashlib.blake2s(
+                data, fanout=0, depth=2, leaf_size=TREE_LEAF_SIZE,
+                node_offset=offset, node_depth=depth, inner_size=32,
+                last_node=last).digest()
+
+        data = self.data[:TREE_LEAF_SIZE + 1]
+        root = node(node(data[:TREE_LEAF_SIZE], 0, 0, False) +
+                    node(data[TREE_LEAF_SIZE:], 1, 0, True), 0, 1, True)
+        self.assertEqual(
+            musical_hash.MusicalHash(data, 'blake2s_tree').hashed_bytes, root)
+        self.assertNotEqual(root, hashlib.blake2s(data).digest())
+
+    def test_from_file(self) -> None:
+        """Test that file, memory and streaming digests agree."""
+        expected = musical_hash.MusicalHash(
+            self.data, 'blake2b_tree').hashed_bytes
+        stats = musical_hash.RenderStats()
+        for workers in (1, 4):
+            file_hash = musical_hash.MusicalHash.from_file(
+                self.path, 'blake2b_tree', workers=workers, stats=stats)
+            self.assertEqual(file_hash.hashed_bytes, expected)
+            self.assertIsNone(file_hash.data)
+        self.assertEqual(stats.counters['bytes_hashed'], 2 * len(self.data))
+        stream = musical_hash.StreamingMusicalHash('blake2b_tree')
+        for start in range(0, len(self.data), 777777):
+            stream.update(self.data[start:start + 777777])
+        self.assertEqual(stream.digest(), expected)
+        self.assertEqual(stream.copy().digest(), expected)
+
+    def test_empty_and_other_methods(self) -> None:
+        """Test an empty file and a non-tree method."""
+        empty = os.path.join(self.directory, 'empty')
+        with open(empty, 'wb'):
+            pass
+        self.assertEqual(
+            musical_hash.MusicalHash.from_file(empty, 'blake2s_tree')
+            .hashed_bytes,
+            musical_hash.MusicalHash(b'', 'blake2s_tree').hashed_bytes)
+        self.assertEqual(
+            musical_hash.MusicalHash.from_file(self.path, 'md5').hashed_bytes,
+            hashlib.md5(self.data).digest())
+        with self.assertRaises(ValueError):
+            musical_hash.MusicalHash.from_file(self.path, 'md5', workers=0)
+
+    def tearDown(self) -> None:
+        """Remove the file."""
+        shutil.rmtree(self.directory)
+
+
+class TestFromTree(unittest.TestCase):
+    """Test case for MusicalHash.from_tree."""
+
+    def setUp(self) -> None:
+        """Create a small directory tree."""
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'b', 'c'))
+        for name, contents in (('a.txt', b'alpha'),
+                               (os.path.join('b', 'c', 'd.bin'), b'\x00' * 5),
+                               (os.path.join('b', 'e'), b'')):
+            with open(os.path.join(self.root, name), 'wb') as file:
+                file.write(contents)
+
+    def test_merkle_order(self) -> None:
+        """Test the documented combination of file digests."""
+        expected = hashlib.md5(
+            b'a.txt\x00' + hashlib.md5(b'alpha').digest() +
+            b'b/c/d.bin\x00' + hashlib.md5(b'\x00' * 5).digest() +
+            b'b/e\x00' + hashlib.md5(b'').digest()).digest()
+        tree_hash = musical_hash.MusicalHash.from_tree(self.root, 'md5')
+        self.assertEqual(tree_hash.hashed_bytes, expected)
+        self.assertIsNone(tree_hash.data)
+        self.assertEqual(tree_hash.hash_method, 'md5')
+
+    def test_workers(self) -> None:
+        """Test that the digest does not depend on the number of workers."""
+        stats = musical_hash.RenderStats()
+        self.assertEqual(
+            musical_hash.MusicalHash.from_tree(
+                self.root, 'blake2b', workers=4, stats=stats).notes(),
+            musical_hash.MusicalHash.from_tree(self.root, 'blake2b').notes())
+        self.assertEqual(stats.counters['bytes_hashed'], 10)
+        with self.assertRaises(ValueError):
+            musical_hash.MusicalHash.from_tree(self.root, 'md5', workers=0)
+
+    def test_unsupported_method(self) -> None:
+        """Test with an unsupported hash method."""
+        with self.assertRaises(ValueError):
+            musical_hash.MusicalHash.from_tree(self.root, 'foo')
+
+    def test_not_a_directory(self) -> None:
+        """Test with a missing path and with a regular file."""
+        with self.assertRaises(FileNotFoundError):
+            musical_hash.MusicalHash.from_tree(
+                os.path.join(self.root, 'missing'), 'sha256')
+        with self.assertRaises(NotADirectoryError):
+            musical_hash.MusicalHash.from_tree(
+                os.path.join(self.root, 'a.txt'), 'sha256')
+
+    def tearDown(self) -> None:
+        """Remove the directory tree."""
+        shutil.rmtree(self.root)
+
+
+class TestFromDigest(unittest.TestCase):
+    """Test case for MusicalHash.from_digest and from_digests."""
+
+    def setUp(self) -> None:
+        """Hash some reference data."""
+        self.hashes = [musical_hash.MusicalHash(data, 'sha256')
+                       for data in (b'alpha', b'beta', b'gamma')]
+
+    def test_bytes_and_hex(self) -> None:
+        """Test that a stored digest renders like the original hash."""
+        for digest in (self.hashes[0].hashed_bytes,
+                       self.hashes[0].hashed_bytes.hex().upper()):
+            stored = musical_hash.MusicalHash.from_digest(digest, 'sha256')
+            self.assertIsNone(stored.data)
+            self.assertEqual(stored.notes(), self.hashes[0].notes())
+        self.assertEqual(
+            musical_hash.MusicalHash.from_digest('0badf00d', 'crc32')
+            .hashed_bytes,
+            b'\x0b\xad\xf0\x0d')
+
+    def test_bulk(self) -> None:
+        """Test decoding a numpy array of hex digests."""
+        digests = numpy.array([h.hashed_bytes.hex() for h in self.hashes])
+        stored = musical_hash.MusicalHash.from_digests(digests, 'sha256')
+        self.assertEqual([h.hashed_bytes for h in stored],
+                         [h.hashed_bytes for h in self.hashes])
+        self.assertEqual(
+            musical_hash.MusicalHash.from_digests([], 'sha256'), [])
+
+    def test_invalid_digests(self) -> None:
+        """Test digests of the wrong size, bad hex and unknown methods."""
+        digest = self.hashes[0].hashed_bytes
+        for args in ((digest[:-1], 'sha256'), (digest.hex(), 'md5'),
+                     ('zz' * 32, 'sha256'), (digest, 'foo'),
+                     (digest, lambda data: data)):
+            with self.assertRaises(ValueError):
+                musical_hash.MusicalHash.from_digest(*args)
+        for digests in ([digest.hex(), digest.hex()[:-2]],
+                        [digest.hex(), 'zz' * 32]):
+            with self.assertRaises(ValueError):
+                musical_hash.MusicalHash.from_digests(digests, 'sha256')
+
+
+class TestStreamingMusicalHash(unittest.TestCase):
+    """Test case for the StreamingMusicalHash class."""
+
+    def test_builtin_methods(self) -> None:
+        """Test that chunked updates match hashing everything at once."""
+        for method in ('md5', 'sha1', 'sha512', 'blake2s', 'adler32',
+                       'crc32'):
+            stream = musical_hash.StreamingMusicalHash(method, b'Hello')
+            stream.update(b' ')
+            stream.update(b'World')
+            expected = musical_hash.MusicalHash(b'Hello World', method)
+            self.assertEqual(stream.digest(), expected.hashed_bytes)
+            self.assertEqual(stream.snapshot().notes(), expected.notes())
+
+    def test_copy_and_checkpoints(self) -> None:
+        """Test that copies and snapshots are independent of later data."""
+        stream = musical_hash.StreamingMusicalHash('crc32', b'Hello')
+        checkpoint = stream.snapshot()
+        fork = stream.copy()
+        stream.update(b' World')
+        self.assertEqual(checkpoint.hashed_bytes,
+                         musical_hash.MusicalHash(b'Hello', 'crc32')
+                         .hashed_bytes)
+        self.assertEqual(fork.hexdigest(), checkpoint.hashed_bytes.hex())
+        self.assertNotEqual(stream.digest(), fork.digest())
+
+    def test_unsupported_method(self) -> None:
+        """Test that user-defined and unknown methods are rejected."""
+        with self.assertRaises(ValueError):
+            musical_hash.StreamingMusicalHash(lambda x: x)
+        with self.assertRaises(ValueError):
+            musical_hash.StreamingMusicalHash('foo')
+
+
+if __name__ == '__main__':
+    unittest.main()
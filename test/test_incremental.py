@@ -0,0 +1,148 @@
+"""Unit test cases for the _incremental module."""
+
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import musical_hash
+from musical_hash._hashing import hash_file, list_tree
+from musical_hash._incremental import MANIFEST_NAME
+
+
+class TestIncrementalRenderer(unittest.TestCase):
+    """Test case for the IncrementalRenderer class."""
+
+    def setUp(self) -> None:
+        """Create a small source tree and an empty output directory."""
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, 'source')
+        self.output = os.path.join(self.root, 'output')
+        os.makedirs(os.path.join(self.source, 'sub'))
+        for name, contents in (('a.txt', b'alpha'),
+                               (os.path.join('sub', 'b.bin'), b'beta')):
+            self.write(name, contents)
+        self.renderer = musical_hash.Renderer(note_duration=0.01,
+                                              sample_rate=1000)
+        self.incremental = musical_hash.IncrementalRenderer(
+            self.source, self.output, self.renderer, workers=2)
+
+    def write(self, name: str, contents: bytes) -> None:
+        """Write a file of the source tree."""
+        with open(os.path.join(self.source, name), 'wb') as file:
+            file.write(contents)
+
+    def test_first_update(self) -> None:
+        """Test that every file is rendered and recorded."""
+        result = self.incremental.update()
+        self.assertEqual(result.rendered, ['a.txt', 'sub/b.bin'])
+        self.assertEqual((result.unchanged, result.removed), (0, []))
+        with open(os.path.join(self.output, 'a.txt.wav'), 'rb') as file:
+            self.assertEqual(
+                file.read(),
+                self.renderer.wave_bytes(
+                    musical_hash.MusicalHash(b'alpha', 'sha256')))
+        with open(os.path.join(self.output, MANIFEST_NAME), 'r',
+                  encoding='utf-8') as file:
+            manifest = json.load(file)
+        self.assertEqual(manifest['files']['sub/b.bin']['digest'],
+                         musical_hash.MusicalHash(b'beta', 'sha256')
+                         .hashed_bytes.hex())
+        self.assertEqual(manifest['params']['sample_rate'], 1000)
+
+    def test_only_changes_rendered(self) -> None:
+        """Test that a rebuild only renders changed and new files."""
+        self.incremental.update()
+        self.assertEqual(self.incremental.update().rendered, [])
+        self.write('a.txt', b'ALPHA')
+        self.write('c.txt', b'gamma')
+        result = self.incremental.update()
+        self.assertEqual(result.rendered, ['a.txt', 'c.txt'])
+        self.assertEqual(result.unchanged, 1)
+
+    def test_touched_file_not_rendered(self) -> None:
+        """Test that a new mtime with the same contents is not rendered."""
+        self.incremental.update()
+        path = os.path.join(self.source, 'a.txt')
+        status = os.stat(path)
+        os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns + 10**9))
+        self.assertEqual(self.incremental.update().rendered, [])
+
+    def test_removed_and_parameters(self) -> None:
+        """Test removed inputs and changed render parameters."""
+        self.incremental.update()
+        os.remove(os.path.join(self.source, 'a.txt'))
+        self.assertEqual(self.incremental.update().removed, ['a.txt'])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output, 'a.txt.wav')))
+        midi = musical_hash.IncrementalRenderer(
+            self.source, self.output, self.renderer, fmt='midi')
+        self.assertEqual(midi.update().rendered, ['sub/b.bin'])
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.output, 'sub', 'b.bin.mid')))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output, 'sub', 'b.bin.wav')))
+
+    def test_deleted_while_updating(self) -> None:
+        """Test files deleted between listing, stat and hashing."""
+        self.incremental.update()
+        self.write('c.txt', b'gamma')
+        tree = list_tree(self.source)
+        os.remove(os.path.join(self.source, 'a.txt'))
+
+        def delete_then_hash(path, hash_method):
+            os.remove(path)
+            return hash_file(path, hash_method)
+
+        with mock.patch('musical_hash._incremental.list_tree',
+                        return_value=tree), \
+                mock.patch('musical_hash._incremental.hash_file',
+                           side_effect=delete_then_hash):
+            result = self.incremental.update()
+        self.assertEqual((result.rendered, result.removed), ([], ['a.txt']))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output, 'a.txt.wav')))
+        self.assertEqual(self.incremental.update().rendered, [])
+
+    def test_unchanged_manifest_not_saved(self) -> None:
+        """Test that an update without changes does not rewrite the
+        manifest."""
+        self.incremental.update()
+        with mock.patch.object(self.incremental, '_save') as save:
+            self.incremental.update()
+            save.assert_not_called()
+            self.write('c.txt', b'gamma')
+            self.incremental.update()
+            save.assert_called_once()
+
+    def test_watch(self) -> None:
+        """Test that watch reports changes until stopped."""
+        stop = threading.Event()
+        results = []
+
+        def callback(result: musical_hash.UpdateResult) -> None:
+            results.append(result)
+            stop.set()
+
+        self.incremental.watch(0.01, callback, stop)
+        self.assertEqual(results[0].rendered, ['a.txt', 'sub/b.bin'])
+
+    def test_invalid_arguments(self) -> None:
+        """Test an unsupported format and worker count."""
+        with self.assertRaises(ValueError):
+            musical_hash.IncrementalRenderer('a', 'b', self.renderer,
+                                             fmt='mp3')
+        with self.assertRaises(ValueError):
+            musical_hash.IncrementalRenderer('a', 'b', self.renderer,
+                                             workers=0)
+
+    def tearDown(self) -> None:
+        """Remove the temporary trees."""
+        shutil.rmtree(self.root)
+
+
+if __name__ == '__main__':
+    unittest.main()
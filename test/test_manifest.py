@@ -0,0 +1,120 @@
+"""Unit test cases for the _manifest module."""
+
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import musical_hash
+
+
+class TestReadManifest(unittest.TestCase):
+    """Test case for the read_manifest function."""
+
+    def setUp(self) -> None:
+        """Build the digests of a few files."""
+        self.files = [('a.txt', b'alpha'), ('dir/b.bin', b'beta'),
+                      ('dir/c d.txt', b'gamma'), ('a.txt.copy', b'alpha')]
+        self.expected = [(path, hashlib.sha256(data).digest())
+                         for path, data in self.files]
+
+    def test_formats(self) -> None:
+        """Test text mode, binary mode and BSD tag lines with comments."""
+        lines = ['# release checksums', '']
+        for i, (path, digest) in enumerate(self.expected):
+            if i % 3 == 0:
+                lines.append('{}  {}'.format(digest.hex(), path))
+            elif i % 3 == 1:
+                lines.append('{} *{}'.format(digest.hex().upper(), path))
+            else:
+                lines.append('SHA256 ({}) = {}'.format(path, digest.hex()))
+        for hash_method in (None, 'sha256'):
+            for chunk_lines in (1, 2, 100):
+                entries = list(musical_hash.read_manifest(
+                    io.StringIO('\n'.join(lines) + '\n'), hash_method,
+                    chunk_lines))
+                self.assertEqual(entries, self.expected)
+        self.assertEqual(entries[0].path, 'a.txt')
+
+    def test_escaped_names(self) -> None:
+        """Test names escaped by sha256sum."""
+        digest = hashlib.md5(b'').hexdigest()
+        manifest = io.StringIO('\\{}  new\\nline\\\\name\n'.format(digest))
+        self.assertEqual(list(musical_hash.read_manifest(manifest, 'md5')),
+                         [('new\nline\\name', bytes.fromhex(digest))])
+
+    def test_invalid(self) -> None:
+        """Test malformed lines and digests of the wrong size."""
+        digest = hashlib.sha256(b'').hexdigest()
+        for text, hash_method in (('not a checksum line', None),
+                                  (digest + ' no_separator', None),
+                                  ('xyz  file', None),
+                                  (digest[:-2] + '  file', 'sha256'),
+                                  (digest + '  file', 'md5')):
+            with self.assertRaises(ValueError):
+                list(musical_hash.read_manifest(io.StringIO(text),
+                                                hash_method))
+
+
+class TestRenderManifest(unittest.TestCase):
+    """Test case for the render_manifest function."""
+
+    def setUp(self) -> None:
+        """Write a manifest to a temporary directory."""
+        self.root = tempfile.mkdtemp()
+        self.hashes = [musical_hash.MusicalHash(data, 'md5')
+                       for data in (b'one', b'two', b'one')]
+        self.paths = ['one.txt', 'sub/two.txt', './sub/one-again.txt']
+        self.manifest = os.path.join(self.root, 'MD5SUMS')
+        with open(self.manifest, 'w', encoding='utf-8') as file:
+            for source, path in zip(self.hashes, self.paths):
+                file.write('{}  {}\n'.format(source.hashed_bytes.hex(), path))
+        self.renderer = musical_hash.Renderer(
+            musical_hash.C_MAJOR, 0.01, 8000, ticks_per_note=100)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory."""
+        shutil.rmtree(self.root)
+
+    def test_wave_and_midi(self) -> None:
+        """Test that every entry is rendered at its manifest path."""
+        output = os.path.join(self.root, 'out')
+        for fmt, suffix, render in (
+                ('wav', '.wav', self.renderer.wave_bytes),
+                ('midi', '.mid', self.renderer.midi_bytes)):
+            self.assertEqual(musical_hash.render_manifest(
+                self.manifest, output, self.renderer, fmt, 'md5',
+                chunk_lines=2), 3)
+            for source, path in zip(self.hashes, self.paths):
+                with open(os.path.join(output, path + suffix), 'rb') as file:
+                    self.assertEqual(file.read(), render(source))
+
+    def test_notes(self) -> None:
+        """Test exporting the notes of a manifest as JSONL."""
+        output = os.path.join(self.root, 'notes.jsonl')
+        musical_hash.render_manifest(self.manifest, output, self.renderer,
+                                     'jsonl')
+        with open(output, 'r', encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual([row['notes'] for row in rows],
+                         [source.notes(musical_hash.C_MAJOR)
+                          for source in self.hashes])
+
+    def test_unsafe_path(self) -> None:
+        """Test that paths outside the output directory are rejected."""
+        with open(self.manifest, 'a', encoding='utf-8') as file:
+            file.write('{}  ../escape\n'.format('0' * 32))
+        with self.assertRaises(ValueError):
+            musical_hash.render_manifest(self.manifest,
+                                         os.path.join(self.root, 'out'),
+                                         self.renderer)
+        with self.assertRaises(ValueError):
+            musical_hash.render_manifest(self.manifest, self.root,
+                                         self.renderer, 'flac')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -383,6 +383,15 @@ class TestSamples(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.hash.samples(key=0x111, note_duration=1, sample_rate=0)
 
+    def test_threads(self) -> None:
+        """Test that threaded synthesis gives identical samples."""
+        for threads in (2, 5, 100):
+            numpy.testing.assert_array_equal(
+                self.hash.samples(0xfff, 0.01, 8000, threads=threads),
+                self.hash.samples(0xfff, 0.01, 8000))
+        with self.assertRaises(ValueError):
+            self.hash.samples(threads=0)
+
     def test_positive_sample_rate(self) -> None:
         """Test positive sample rate."""
         self.check_assertions(
@@ -784,5 +793,121 @@ class TestMidi(unittest.TestCase):
                     pass
 
 
+class TestMultiOctaveKeys(unittest.TestCase):
+    """Test keys given as sequences of midi note numbers."""
+
+    def setUp(self) -> None:
+        """Construct a MusicalHash object for this test."""
+        self.hash = musical_hash.MusicalHash(b'Hello World', 'sha512')
+        self.key = musical_hash.repeat_scale(musical_hash.CHROMATIC_SCALE, 4)
+
+    def test_one_octave_matches_scale_constant(self) -> None:
+        """Test that one octave from A4 matches the chromatic scale."""
+        self.assertEqual(self.hash.notes(key=range(69, 81)),
+                         self.hash.notes())
+        numpy.testing.assert_array_equal(
+            self.hash.samples(range(69, 81), 0.01, 8000),
+            self.hash.samples(musical_hash.CHROMATIC_SCALE, 0.01, 8000))
+
+    def test_fewer_notes(self) -> None:
+        """Test that a larger key needs fewer notes."""
+        notes = self.hash.notes(key=self.key)
+        self.assertEqual(len(notes), 92)
+        self.assertLess(len(notes), len(self.hash.notes()))
+        self.assertEqual(self.hash.samples(self.key, 0.01, 8000).size,
+                         len(notes) * 80)
+
+    def test_note_names(self) -> None:
+        """Test that octaves above and below A4 are marked."""
+        self.assertEqual(
+            sorted(set(self.hash.notes(key=[57, 69, 82, 93]))),
+            ["#A'", 'A', "A''", 'A,'])
+        self.assertIn("bB'", self.hash.notes(key=[69, 82], sharps=False))
+
+    def test_midi(self) -> None:
+        """Test that the midi file uses notes from every octave."""
+        self.hash.midi('test.mid', key=self.key)
+        notes_present = {message.note
+                         for message in mido.MidiFile('test.mid').tracks[0]
+                         if message.type == 'note_on'}
+        self.assertTrue(notes_present <= set(self.key))
+        self.assertGreater(max(notes_present), 104)
+
+    def test_invalid_keys(self) -> None:
+        """Test keys with too few, duplicate or out of range notes."""
+        for key in ([69], [69, 69], [69, 128], [-1, 69], []):
+            with self.assertRaises(ValueError):
+                self.hash.notes(key=key)
+
+    def tearDown(self) -> None:
+        """Clean up any created files."""
+        if os.path.isfile('test.mid'):
+            os.remove('test.mid')
+
+
+class TestLazy(unittest.TestCase):
+    """Test lazy construction and memoized digits."""
+
+    def setUp(self) -> None:
+        """Count the calls of a user-defined hash method."""
+        self.calls = []
+
+    def counting_hash(self, data: bytearray) -> bytes:
+        """Hash data with md5 and record the call."""
+        self.calls.append(data)
+        return musical_hash.MusicalHash(data, 'md5').hashed_bytes
+
+    def test_deferred_until_first_use(self) -> None:
+        """Test that a lazy object hashes once, on first use."""
+        hash_object = musical_hash.MusicalHash(b'lazy', self.counting_hash,
+                                               lazy=True)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(hash_object.data, b'lazy')
+        eager = musical_hash.MusicalHash(b'lazy', 'md5')
+        self.assertEqual(hash_object.notes(), eager.notes())
+        numpy.testing.assert_array_equal(hash_object.samples(),
+                                         eager.samples())
+        self.assertEqual(hash_object.hashed_bytes, eager.hashed_bytes)
+        self.assertEqual(self.calls, [b'lazy'])
+
+    def test_lazy_file(self) -> None:
+        """Test that a lazy file is only read on first use."""
+        with open('lazy.bin', 'wb') as file:
+            file.write(b'first')
+        hash_object = musical_hash.MusicalHash.from_file(
+            'lazy.bin', 'sha256', lazy=True)
+        self.assertEqual(hash_object.path, 'lazy.bin')
+        with open('lazy.bin', 'wb') as file:
+            file.write(b'second')
+        self.assertEqual(hash_object.hashed_bytes,
+                         musical_hash.MusicalHash(b'second',
+                                                  'sha256').hashed_bytes)
+        os.remove('lazy.bin')
+        self.assertEqual(len(hash_object.notes()), 72)
+
+    def test_invalid_method(self) -> None:
+        """Test that an unsupported method is rejected at construction."""
+        with self.assertRaises(ValueError):
+            musical_hash.MusicalHash(b'lazy', 'sha3', lazy=True)
+        with self.assertRaises(ValueError):
+            musical_hash.MusicalHash.from_file('missing', 'sha3', lazy=True)
+
+    def test_memoized_digits(self) -> None:
+        """Test that digits are converted once per base and reset when the
+        digest changes."""
+        stats = musical_hash.RenderStats()
+        hash_object = musical_hash.MusicalHash(b'memo', 'sha256', stats)
+        hash_object.notes()
+        hash_object.notes(sharps=False)
+        hash_object.samples(musical_hash.C_MAJOR, 0.01, 1000)
+        hash_object.samples(musical_hash.C_MINOR, 0.01, 1000)
+        self.assertEqual(stats.calls['change_base'], 2)
+        notes = len(hash_object.notes()) * 2 + len(
+            hash_object.notes(musical_hash.C_MAJOR)) * 2
+        self.assertEqual(stats.counters['notes'], notes + notes // 2)
+        hash_object.hashed_bytes = bytes(32)
+        self.assertEqual(hash_object.notes(), ['A'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+"""Unit test cases for the _note_bank module."""
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import musical_hash
+from musical_hash._note_bank import note_waveforms
+
+
+class TestNoteBank(unittest.TestCase):
+    """Test case for building and loading note banks."""
+
+    def setUp(self) -> None:
+        """Create a temporary note bank directory."""
+        self.root = tempfile.mkdtemp()
+        self.directory = os.path.join(self.root, 'bank')
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory."""
+        shutil.rmtree(self.root)
+
+    def test_load_builds_once(self) -> None:
+        """Test that the first load builds the bank and later loads map it."""
+        key = musical_hash.C_MAJOR
+        waveforms = musical_hash.load_note_bank(self.directory, key, 0.05,
+                                                8000)
+        path = musical_hash.note_bank_path(self.directory, key, 0.05, 8000)
+        self.assertIsInstance(waveforms, numpy.memmap)
+        self.assertFalse(waveforms.flags.writeable)
+        numpy.testing.assert_array_equal(waveforms,
+                                         note_waveforms(key, 0.05, 8000))
+        modified = os.stat(path).st_mtime_ns
+        musical_hash.load_note_bank(self.directory, key, 0.05, 8000)
+        self.assertEqual(os.stat(path).st_mtime_ns, modified)
+        with open(path + '.json', 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['shape'], [7, 400])
+
+    def test_distinct_configurations(self) -> None:
+        """Test that each configuration gets its own file."""
+        paths = {musical_hash.note_bank_path(self.directory, key, duration,
+                                             rate)
+                 for key in (musical_hash.C_MAJOR, [60, 72])
+                 for duration in (0.05, 0.1) for rate in (8000, 16000)}
+        self.assertEqual(len(paths), 8)
+
+    def test_rebuild_invalid(self) -> None:
+        """Test that a bank with a mismatched sidecar is rebuilt."""
+        path = musical_hash.build_note_bank(self.directory, [60, 64], 0.01,
+                                            8000)
+        with open(path + '.json', 'w', encoding='utf-8') as file:
+            file.write('{}')
+        numpy.testing.assert_array_equal(
+            musical_hash.load_note_bank(self.directory, [60, 64], 0.01, 8000),
+            note_waveforms([60, 64], 0.01, 8000))
+
+    def test_renderer(self) -> None:
+        """Test that a renderer with a note bank renders identical output."""
+        source = musical_hash.MusicalHash(b'note bank', 'sha256')
+        for key in (musical_hash.CHROMATIC_SCALE,
+                    musical_hash.repeat_scale(musical_hash.C_MAJOR, 2)):
+            plain = musical_hash.Renderer(key, 0.02, 8000)
+            banked = musical_hash.Renderer(key, 0.02, 8000,
+                                           note_bank=self.directory)
+            self.assertIsInstance(banked.waveforms, numpy.memmap)
+            numpy.testing.assert_array_equal(banked.samples(source),
+                                             plain.samples(source))
+            self.assertEqual(banked.wave_bytes(source),
+                             plain.wave_bytes(source))
+
+
+if __name__ == '__main__':
+    unittest.main()
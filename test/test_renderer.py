@@ -0,0 +1,100 @@
+"""Unit test cases for the _renderer module."""
+
+
+import os
+import unittest
+import mido
+import numpy
+import wavio
+import musical_hash
+
+
+class TestRenderer(unittest.TestCase):
+    """Test that a Renderer matches the MusicalHash methods."""
+
+    def setUp(self) -> None:
+        """Construct a MusicalHash object and a renderer for this test."""
+        self.hash = musical_hash.MusicalHash(b'Hello World', 'md5')
+        self.renderer = musical_hash.Renderer(
+            musical_hash.C_MAJOR, 0.05, 8000, instrument=0xa)
+
+    def test_invalid_configuration(self) -> None:
+        """Test that the configuration is validated once, up front."""
+        for kwargs in ({'key': 0x4}, {'key': 0x3fff}, {'note_duration': 0},
+                       {'sample_rate': -1}, {'ticks_per_note': 0}):
+            with self.assertRaises(ValueError):
+                musical_hash.Renderer(**kwargs)
+
+    def test_notes(self) -> None:
+        """Test notes with sharps and flats."""
+        for sharps in (True, False):
+            self.assertEqual(
+                self.renderer.notes(self.hash, sharps),
+                self.hash.notes(musical_hash.C_MAJOR, sharps))
+
+    def test_samples(self) -> None:
+        """Test that samples are identical to MusicalHash.samples."""
+        numpy.testing.assert_array_equal(
+            self.renderer.samples(self.hash),
+            self.hash.samples(musical_hash.C_MAJOR, 0.05, 8000))
+
+    def test_threads(self) -> None:
+        """Test that threaded synthesis gives identical samples."""
+        digest = musical_hash.MusicalHash(b'Hello World', 'sha512')
+        for threads in (2, 7, 1000):
+            numpy.testing.assert_array_equal(
+                self.renderer.samples(digest, threads=threads),
+                self.renderer.samples(digest))
+        with self.assertRaises(ValueError):
+            self.renderer.samples(digest, threads=0)
+
+    def test_raw_digest(self) -> None:
+        """Test rendering raw hashed bytes."""
+        numpy.testing.assert_array_equal(
+            self.renderer.samples(self.hash.hashed_bytes),
+            self.renderer.samples(self.hash))
+
+    def test_wave(self) -> None:
+        """Test that the wave file matches MusicalHash.wave."""
+        self.renderer.wave('renderer.wav', self.hash)
+        self.hash.wave('expected.wav', musical_hash.C_MAJOR, 0.05, 8000)
+        numpy.testing.assert_array_equal(
+            wavio.read('renderer.wav').data,
+            wavio.read('expected.wav').data)
+
+    def test_midi(self) -> None:
+        """Test that the midi file matches MusicalHash.midi."""
+        self.renderer.midi('renderer.mid', self.hash)
+        self.hash.midi('expected.mid', musical_hash.C_MAJOR, instrument=0xa)
+        self.assertEqual(
+            [str(m) for m in mido.MidiFile('renderer.mid').tracks[0]],
+            [str(m) for m in mido.MidiFile('expected.mid').tracks[0]])
+
+    def test_multi_octave_key(self) -> None:
+        """Test a key of midi note numbers spanning several octaves."""
+        key = musical_hash.repeat_scale(musical_hash.C_MAJOR, 3, 45)
+        renderer = musical_hash.Renderer(key, 0.05, 8000)
+        self.assertEqual(renderer.notes(self.hash),
+                         self.hash.notes(key))
+        numpy.testing.assert_array_equal(
+            renderer.samples(self.hash),
+            self.hash.samples(key, 0.05, 8000))
+        self.assertEqual(renderer.midi_notes, key)
+
+    def test_empty_filename(self) -> None:
+        """Test with an empty filename."""
+        with self.assertRaises(FileNotFoundError):
+            self.renderer.wave('', self.hash)
+        with self.assertRaises(FileNotFoundError):
+            self.renderer.midi('', self.hash)
+
+    def tearDown(self) -> None:
+        """Clean up any created files."""
+        for file in ('renderer.wav', 'expected.wav', 'renderer.mid',
+                     'expected.mid'):
+            if os.path.isfile(file):
+                os.remove(file)
+
+
+if __name__ == '__main__':
+    unittest.main()
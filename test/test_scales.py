@@ -43,5 +43,28 @@ class TestGetScale(unittest.TestCase):
             musical_hash.get_scale(['A', 'Foo', 'Bar'])
 
 
+class TestRepeatScale(unittest.TestCase):
+    """Test case for the repeat_scale function."""
+
+    def test_one_octave(self) -> None:
+        """Test that one octave lists the midi notes of the scale."""
+        self.assertEqual(
+            musical_hash.repeat_scale(musical_hash.A_MAJOR_PENTATONIC, 1),
+            [69, 71, 73, 76, 78])
+
+    def test_several_octaves(self) -> None:
+        """Test repeating a scale from another first note."""
+        self.assertEqual(
+            musical_hash.repeat_scale(0x5, 3, first_note=21),
+            [21, 23, 33, 35, 45, 47])
+
+    def test_invalid_arguments(self) -> None:
+        """Test invalid scales, octave counts and midi ranges."""
+        for args in ((0x1, 2), (0x1fff, 2), (0xfff, 0), (0xfff, 6),
+                     (0xfff, 1, -1)):
+            with self.assertRaises(ValueError):
+                musical_hash.repeat_scale(*args)
+
+
 if __name__ == '__main__':
     unittest.main()
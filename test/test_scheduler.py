@@ -0,0 +1,147 @@
+"""Unit test cases for the _scheduler module."""
+
+
+import queue
+import threading
+import unittest
+from unittest import mock
+import numpy
+import musical_hash
+
+
+class BlockingService(musical_hash.RenderService):
+    """RenderService whose renderers wait for an event, so that jobs pile up
+    in the queue while the workers are busy."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.configs = []
+
+    def renderer(self, **config):
+        self.configs.append(config)
+        self.started.set()
+        self.release.wait()
+        return super().renderer(**config)
+
+
+class TestScheduler(unittest.TestCase):
+    """Test case for the Scheduler class."""
+
+    def setUp(self) -> None:
+        """Construct hashes of a few inputs."""
+        self.hashes = [musical_hash.MusicalHash(bytes([i]) * i, 'sha256')
+                       for i in range(12)]
+
+    def test_outputs(self) -> None:
+        """Test that every format matches the Renderer output."""
+        keys = (musical_hash.C_MAJOR, [57, 64, 69, 76])
+        with musical_hash.Scheduler(workers=3, max_batch=4) as scheduler:
+            futures = [
+                (source, key, fmt, scheduler.submit(
+                    source, fmt, key=key, note_duration=0.01,
+                    sample_rate=4000))
+                for source in self.hashes for key in keys
+                for fmt in ('notes', 'samples', 'wave', 'midi')]
+            for source, key, fmt, future in futures:
+                renderer = musical_hash.Renderer(key, 0.01, 4000)
+                result = future.result(timeout=30)
+                if fmt == 'samples':
+                    numpy.testing.assert_array_equal(
+                        result, renderer.samples(source))
+                elif fmt == 'notes':
+                    self.assertEqual(result, renderer.notes(source))
+                else:
+                    self.assertEqual(
+                        result, getattr(renderer, fmt + '_bytes')(source))
+
+    def test_priority_and_grouping(self) -> None:
+        """Test that the most urgent job runs first, together with the
+        pending jobs of its configuration."""
+        service = BlockingService()
+        with musical_hash.Scheduler(workers=1, service=service) as scheduler:
+            blocker = scheduler.submit(self.hashes[0], key=0x5)
+            service.started.wait()
+            low = [scheduler.submit(source, 'notes', musical_hash.PRIORITY_LOW,
+                                    key=musical_hash.C_MAJOR)
+                   for source in self.hashes[:3]]
+            normal = scheduler.submit(self.hashes[3], 'notes')
+            high = scheduler.submit(self.hashes[4], 'notes',
+                                    musical_hash.PRIORITY_HIGH,
+                                    key=musical_hash.C_MAJOR)
+            self.assertEqual(scheduler.pending(), 5)
+            service.release.set()
+            for future in low + [normal, high, blocker]:
+                future.result(timeout=30)
+        self.assertEqual(service.configs,
+                         [{'key': 0x5}, {'key': musical_hash.C_MAJOR}, {}])
+
+    def test_backpressure(self) -> None:
+        """Test that submit blocks, then fails, when the queue is full."""
+        service = BlockingService()
+        scheduler = musical_hash.Scheduler(workers=1, max_pending=2,
+                                           service=service)
+        scheduler.submit(self.hashes[0])
+        service.started.wait()
+        scheduler.submit(self.hashes[1])
+        scheduler.submit(self.hashes[2])
+        with self.assertRaises(queue.Full):
+            scheduler.submit(self.hashes[3], timeout=0.05)
+        service.release.set()
+        self.assertEqual(len(scheduler.submit(self.hashes[4], 'notes',
+                                              timeout=30).result(30)),
+                         len(self.hashes[4].notes()))
+        scheduler.shutdown()
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(self.hashes[0])
+
+    def test_independent_results(self) -> None:
+        """Test that batched samples are separate, writable arrays."""
+        service = BlockingService()
+        with musical_hash.Scheduler(workers=1, service=service) as scheduler:
+            blocker = scheduler.submit(self.hashes[0], key=0x5)
+            service.started.wait()
+            futures = [scheduler.submit(source, key=musical_hash.C_MAJOR)
+                       for source in self.hashes[:3]]
+            service.release.set()
+            blocker.result(30)
+            tunes = [future.result(30) for future in futures]
+        self.assertTrue(all(tune.base is None for tune in tunes))
+        tunes[0] *= 0
+        numpy.testing.assert_array_equal(
+            tunes[1], musical_hash.Renderer(musical_hash.C_MAJOR).samples(
+                self.hashes[1]))
+
+    def test_batch_failure(self) -> None:
+        """Test that a failed batched synthesis fails its futures and keeps
+        the worker running."""
+        with mock.patch('musical_hash._scheduler._batch_samples',
+                        side_effect=MemoryError):
+            with musical_hash.Scheduler(workers=1) as scheduler:
+                futures = {(source, fmt): scheduler.submit(source, fmt)
+                           for source in self.hashes[:2]
+                           for fmt in ('samples', 'wave', 'notes')}
+                for (source, fmt), future in futures.items():
+                    if fmt == 'notes':
+                        self.assertEqual(future.result(30), source.notes())
+                    else:
+                        self.assertIsInstance(future.exception(30),
+                                              MemoryError)
+                self.assertEqual(
+                    scheduler.submit(self.hashes[3], 'notes').result(30),
+                    self.hashes[3].notes())
+
+    def test_errors(self) -> None:
+        """Test invalid formats and configurations."""
+        with musical_hash.Scheduler() as scheduler:
+            with self.assertRaises(ValueError):
+                scheduler.submit(self.hashes[0], 'flac')
+            with self.assertRaises(ValueError):
+                scheduler.submit(self.hashes[0], key=0).result(30)
+        with self.assertRaises(ValueError):
+            musical_hash.Scheduler(workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
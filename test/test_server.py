@@ -0,0 +1,138 @@
+"""Unit test cases for the _server module."""
+
+
+import http.client
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import musical_hash
+
+
+class TestRenderService(unittest.TestCase):
+    """Test case for the RenderService class."""
+
+    def setUp(self) -> None:
+        """Construct a service and a reference hash."""
+        self.service = musical_hash.RenderService(
+            cache=musical_hash.RenderCache())
+        self.hash = musical_hash.MusicalHash(b'Hello World', 'md5')
+
+    def test_notes_from_digest(self) -> None:
+        """Test rendering notes from a hex digest."""
+        status, content_type, body = self.service.handle(
+            '/notes',
+            {'digest': self.hash.hashed_bytes.hex(), 'key': '0xab5'},
+            b'')
+        self.assertEqual((status, content_type), (200, 'application/json'))
+        self.assertEqual(json.loads(body.decode('utf-8')),
+                         self.hash.notes(musical_hash.A_MAJOR))
+
+    def test_multi_octave_key(self) -> None:
+        """Test a key of comma separated midi note numbers."""
+        status, _, body = self.service.handle(
+            '/notes',
+            {'digest': self.hash.hashed_bytes.hex(), 'key': '57,69,81,93'},
+            b'')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body.decode('utf-8')),
+                         self.hash.notes([57, 69, 81, 93]))
+
+    def test_wave_from_data(self) -> None:
+        """Test hashing raw data and rendering a wave file."""
+        status, _, body = self.service.handle(
+            '/wave',
+            {'hash_method': 'md5', 'note_duration': '0.01',
+             'sample_rate': '1000'},
+            b'Hello World')
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            body,
+            musical_hash.Renderer(note_duration=0.01, sample_rate=1000)
+            .wave_bytes(self.hash))
+
+    def test_warm_renderers(self) -> None:
+        """Test that renderers are reused per configuration."""
+        self.assertIs(self.service.renderer(key=0xfff),
+                      self.service.renderer(key=0xfff))
+        self.assertIsNot(self.service.renderer(key=0xfff),
+                         self.service.renderer(key=0xab5))
+
+    def test_bad_requests(self) -> None:
+        """Test invalid parameters and paths."""
+        self.assertEqual(self.service.handle('/midi', {}, b'')[0], 400)
+        self.assertEqual(
+            self.service.handle('/midi', {'digest': 'zz'}, b'')[0], 400)
+        self.assertEqual(
+            self.service.handle('/notes', {'digest': '00', 'key': '4'},
+                                b'')[0],
+            400)
+        self.assertEqual(
+            self.service.handle('/foo', {'digest': '00'}, b'')[0], 404)
+        self.assertEqual(
+            self.service.handle('/wave', {'hash_method': 'MD5'}, b'')[0], 400)
+        self.assertEqual(
+            self.service.handle('/wave', {'digest': '00',
+                                          'note_duration': 'inf'}, b'')[0],
+            400)
+
+    def test_internal_error(self) -> None:
+        """Test that unexpected errors are answered with a 500."""
+        with mock.patch.object(musical_hash.Renderer, 'notes',
+                               side_effect=MemoryError):
+            self.assertEqual(
+                self.service.handle('/notes', {'digest': '00'}, b'')[0], 500)
+
+
+class TestServer(unittest.TestCase):
+    """Test the HTTP front end."""
+
+    def test_http_midi(self) -> None:
+        """Test a midi request over a local TCP connection."""
+        server = musical_hash.make_server(port=0, workers=2)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            connection = http.client.HTTPConnection(
+                '127.0.0.1', server.server_address[1])
+            connection.request('POST', '/midi?hash_method=crc32', b'abc')
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(
+                response.read(),
+                musical_hash.Renderer().midi_bytes(
+                    musical_hash.MusicalHash(b'abc', 'crc32')))
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'needs Unix sockets')
+    def test_unix_socket_path(self) -> None:
+        """Test that a stale socket is replaced but other files are kept."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'render.sock')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('keep')
+            with self.assertRaises(FileExistsError):
+                musical_hash.make_server(unix_socket=path)
+            with open(path, 'r', encoding='utf-8') as file:
+                self.assertEqual(file.read(), 'keep')
+            os.remove(path)
+            for _ in range(2):
+                server = musical_hash.make_server(unix_socket=path)
+                server.server_close()
+                self.assertTrue(stat.S_ISSOCK(os.lstat(path).st_mode))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit test cases for the _shared module."""
+
+
+import os
+import tempfile
+import unittest
+import numpy
+import musical_hash
+
+
+class TestSamplesShared(unittest.TestCase):
+    """Test case for shared memory batch rendering."""
+
+    def test_matches_renderer(self) -> None:
+        """Test that every tune in the arena matches Renderer.samples."""
+        renderer = musical_hash.Renderer(
+            musical_hash.C_MINOR, note_duration=0.01, sample_rate=1000)
+        hashes = [musical_hash.MusicalHash(bytes([i]) * i, 'md5')
+                  for i in range(20)]
+        with musical_hash.samples_shared(hashes, renderer,
+                                         processes=2, chunksize=3) as tunes:
+            self.assertEqual(len(tunes), 20)
+            self.assertEqual(tunes.offsets[-1], tunes.buffer.size)
+            for i, hash_object in enumerate(hashes):
+                numpy.testing.assert_array_equal(
+                    tunes[i], renderer.samples(hash_object))
+            self.assertTrue(numpy.shares_memory(tunes[3], tunes.buffer))
+
+    def test_indexing(self) -> None:
+        """Test negative and out of range indices."""
+        renderer = musical_hash.Renderer(
+            musical_hash.C_MINOR, note_duration=0.01, sample_rate=1000)
+        hashes = [musical_hash.MusicalHash(bytes([i]), 'md5')
+                  for i in range(3)]
+        with musical_hash.samples_shared(hashes, renderer,
+                                         processes=1) as tunes:
+            numpy.testing.assert_array_equal(
+                tunes[-1], renderer.samples(hashes[2]))
+            numpy.testing.assert_array_equal(
+                tunes[-3], renderer.samples(hashes[0]))
+            for index in (3, -4):
+                with self.assertRaises(IndexError):
+                    tunes[index]  # pylint: disable=pointless-statement
+            self.assertEqual(len(list(tunes)), 3)
+
+    def test_note_bank(self) -> None:
+        """Test that workers memory-map the renderer's note bank."""
+        hashes = [musical_hash.MusicalHash(bytes([i]), 'md5')
+                  for i in range(5)]
+        with tempfile.TemporaryDirectory() as directory:
+            renderer = musical_hash.Renderer(
+                musical_hash.C_MINOR, note_duration=0.01, sample_rate=1000,
+                note_bank=directory)
+            with musical_hash.samples_shared(hashes, renderer,
+                                             processes=2) as tunes:
+                for i, hash_object in enumerate(hashes):
+                    numpy.testing.assert_array_equal(
+                        tunes[i], renderer.samples(hash_object))
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+    def test_empty_batch(self) -> None:
+        """Test with no sources."""
+        with musical_hash.samples_shared([], musical_hash.Renderer(),
+                                         processes=1) as tunes:
+            self.assertEqual(len(tunes), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
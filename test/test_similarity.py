@@ -0,0 +1,59 @@
+"""Unit test cases for the _similarity module."""
+
+
+import unittest
+import numpy
+import musical_hash
+
+
+class TestSimilarity(unittest.TestCase):
+    """Test case for the vectorized comparison functions."""
+
+    def setUp(self) -> None:
+        """Build a small corpus of note sequences."""
+        self.corpus = numpy.array([[0, 1, 2, 3],
+                                   [0, 1, 5, 3],
+                                   [0, 1, 2, -1],
+                                   [4, 1, 2, 3]], dtype=numpy.int8)
+
+    def test_note_indices(self) -> None:
+        """Test that rows match MusicalHash.notes and are padded."""
+        hashes = [musical_hash.MusicalHash(data, 'crc32')
+                  for data in (b'a', b'bc', b'')]
+        indices = musical_hash.note_indices(hashes, musical_hash.A_MAJOR)
+        names = musical_hash.MusicalHash(b'', 'crc32').notes(
+            musical_hash.A_MAJOR)
+        self.assertEqual(indices.shape[0], 3)
+        self.assertEqual(len(names), numpy.count_nonzero(indices[2] >= 0))
+        for hash_object, row in zip(hashes, indices):
+            scale = ['A', 'B', '#C', 'D', 'E', '#F', '#G']
+            self.assertEqual(hash_object.notes(musical_hash.A_MAJOR),
+                             [scale[i] for i in row if i >= 0])
+        with self.assertRaises(ValueError):
+            musical_hash.note_indices(hashes, 0x4)
+
+    def test_hamming_distance(self) -> None:
+        """Test positional Hamming distance including padded positions."""
+        numpy.testing.assert_array_equal(
+            musical_hash.hamming_distance(self.corpus[0], self.corpus),
+            [0, 1, 1, 1])
+        numpy.testing.assert_array_equal(
+            musical_hash.hamming_distance([0, 1], self.corpus),
+            [2, 2, 1, 3])
+
+    def test_common_prefix_length(self) -> None:
+        """Test the longest common prefix."""
+        numpy.testing.assert_array_equal(
+            musical_hash.common_prefix_length(self.corpus[0], self.corpus),
+            [4, 2, 3, 0])
+
+    def test_nearest(self) -> None:
+        """Test top-k search with ties broken by row index."""
+        indices, distances = musical_hash.nearest(
+            self.corpus[1], self.corpus, k=3)
+        numpy.testing.assert_array_equal(indices, [1, 0, 2])
+        numpy.testing.assert_array_equal(distances, [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Unit test cases for the _stats module."""
+
+
+import os
+import unittest
+import musical_hash
+from musical_hash._musical_hash import change_base
+
+
+class TestRenderStats(unittest.TestCase):
+    """Test case for the RenderStats class."""
+
+    def setUp(self) -> None:
+        """Create a stats object that also records callback invocations."""
+        self.events = []
+        self.stats = musical_hash.RenderStats(
+            lambda stage, seconds: self.events.append(stage))
+
+    def test_hash_stage(self) -> None:
+        """Test that hashing is timed and the input bytes are counted."""
+        musical_hash.MusicalHash(b'Hello World', 'md5', self.stats)
+        self.assertEqual(self.stats.calls['hash'], 1)
+        self.assertGreaterEqual(self.stats.timings['hash'], 0.0)
+        self.assertEqual(self.stats.counters['bytes_hashed'], 11)
+        self.assertEqual(self.events, ['hash'])
+
+    def test_samples_stages(self) -> None:
+        """Test that base conversion and synthesis are recorded."""
+        hash_object = musical_hash.MusicalHash(b'Hello World', 'md5',
+                                               self.stats)
+        samples = hash_object.samples(musical_hash.A_MAJOR, 0.01, 1000)
+        self.assertEqual(self.stats.calls['change_base'], 1)
+        self.assertEqual(self.stats.calls['pitches_to_tune'], 1)
+        self.assertEqual(self.stats.counters['samples'], samples.size)
+        self.assertEqual(self.stats.counters['notes'] * 10, samples.size)
+
+    def test_wave_and_midi_stages(self) -> None:
+        """Test that file encoding stages are recorded."""
+        hash_object = musical_hash.MusicalHash(b'Hello World', 'md5',
+                                               self.stats)
+        hash_object.wave('stats.wav', note_duration=0.01, sample_rate=1000)
+        hash_object.midi('stats.mid')
+        for stage in ('wave_write', 'midi_encode', 'midi_write'):
+            self.assertEqual(self.stats.calls[stage], 1)
+
+    def test_module_functions(self) -> None:
+        """Test the stats argument of the module level functions."""
+        digits = change_base(1000, 12, self.stats)
+        self.assertEqual(self.stats.counters['notes'], len(digits))
+
+    def test_reset(self) -> None:
+        """Test that reset discards everything."""
+        musical_hash.MusicalHash(b'', 'crc32', self.stats)
+        self.stats.reset()
+        self.assertEqual(
+            self.stats.as_dict(),
+            {'timings': {}, 'calls': {}, 'counters': {}})
+
+    def test_disabled(self) -> None:
+        """Test that nothing is recorded without a stats object."""
+        hash_object = musical_hash.MusicalHash(b'Hello World', 'md5')
+        self.assertIsNone(hash_object.stats)
+        hash_object.notes()
+
+    def tearDown(self) -> None:
+        """Clean up any created files."""
+        for file in ('stats.wav', 'stats.mid'):
+            if os.path.isfile(file):
+                os.remove(file)
+
+
+if __name__ == '__main__':
+    unittest.main()